@@ -3,42 +3,182 @@ Build Sheet Generator V3 - Web Application
 Flask app for generating computer build sheets with automated pricing.
 """
 
-from flask import Flask, render_template, request, jsonify, send_file
+import time
+
+# Startup timing: importing Flask, reportlab, PyPDF2 and numpy (logged by the warm-up)
+_import_start = time.perf_counter()
+
+from flask import Flask, Blueprint, Response, current_app, g, render_template, request, jsonify, send_file
+from concurrent.futures import ThreadPoolExecutor
+from itsdangerous import BadSignature, URLSafeTimedSerializer
 import pricing
 import pdf_filler
+import metrics
+import jobs
+import output_cache
+import warmup
+import buildsheet_data
+import io
 import os
 import datetime
-from werkzeug.utils import secure_filename
+import hashlib
+import json
+import threading
+import zipfile
 from calibration_routes import calibration_bp
 
-app = Flask(__name__)
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'freegeek-buildsheet-secret-key-2026')
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+IMPORT_SECONDS = time.perf_counter() - _import_start
 
-# Register blueprints
-app.register_blueprint(calibration_bp)
+# Main routes; registered on the app by create_app()
+main_bp = Blueprint('main', __name__)
 
 # Initialize PDF filler
 pdf_generator = pdf_filler.BuildSheetPDFFiller()
 
+# Single background thread for archive writes, so requests never wait on disk
+archive_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='archive')
+
+
+def archive_pdf(pdf_bytes, filename, directory, retention=None):
+    """
+    Write a generated PDF into the archive directory.
+    Writes to a temp file and renames it into place, so concurrent requests for
+    the same model/serial never leave a half-written file behind.
+    retention (output_cache.BoundedDirectory) keeps the archive within its caps.
+    """
+    try:
+        os.makedirs(directory, exist_ok=True)
+        final_path = os.path.join(directory, filename)
+        tmp_path = f"{final_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with metrics.stage('archive_write'):
+            with open(tmp_path, 'wb') as f:
+                f.write(pdf_bytes)
+            os.replace(tmp_path, final_path)
+        metrics.BYTES_WRITTEN.inc(len(pdf_bytes), target='archive')
+    except Exception as e:
+        print(f"Warning: could not archive {filename}: {e}")
+        return
+    
+    if retention is not None:
+        retention.maybe_prune()
+
+
+def _archive_in_background(pdf_bytes, filename):
+    """Queue an archive copy of a generated PDF if archiving is enabled (request context only)."""
+    if current_app.config['ARCHIVE_BUILDSHEETS']:
+        archive_executor.submit(archive_pdf, pdf_bytes, filename, current_app.config['ARCHIVE_DIR'],
+                                current_app.extensions['pdf_archive'])
+
+
+def cached_buildsheet(pdf_data):
+    """
+    Look up a rendered build sheet in the output cache.
+    Returns: (PDF bytes or None, cache key or None when the cache is off)
+    """
+    cache = current_app.extensions['pdf_output_cache']
+    if cache is None:
+        return None, None
+    key = cache.make_key(pdf_data, pdf_generator.get_output_version())
+    return cache.get(key), key
+
+
+def store_buildsheet(key, pdf_bytes):
+    """Add a rendered build sheet to the output cache (key from cached_buildsheet)."""
+    cache = current_app.extensions['pdf_output_cache']
+    if cache is not None and key is not None:
+        cache.put(key, pdf_bytes)
 
-@app.route('/')
+
+def render_buildsheet(pdf_data):
+    """PDF bytes for one build sheet: from the output cache, or rendered (and cached)."""
+    pdf_bytes, key = cached_buildsheet(pdf_data)
+    if pdf_bytes is None:
+        buffer = io.BytesIO()
+        pdf_generator.fill_template(pdf_data, buffer)
+        pdf_bytes = buffer.getvalue()
+        store_buildsheet(key, pdf_bytes)
+    return pdf_bytes
+
+
+def _quote_serializer():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt='price-quote')
+
+
+def _quote_fingerprint(specs, manual_passmark):
+    """
+    Hash of the pricing inputs and the prices.txt/cpus.db versions they were
+    priced under. Drive capacities are compared as floats, since
+    /api/calculate_price and /api/generate_buildsheet parse them differently.
+    """
+    canonical = dict(specs, drives=[
+        {'capacity_gb': float(d['capacity_gb']), 'type': d['type']} for d in specs['drives']
+    ])
+    versions = [pricing.get_prices_config_version(), pricing.get_db_version('cpus.db')]
+    payload = json.dumps([canonical, manual_passmark, versions], sort_keys=True,
+                         separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:24]
+
+
+def issue_quote_token(specs, manual_passmark, price_data):
+    """
+    Signed token binding a quote (price breakdown and resolved CPU) to the
+    specs it was calculated for. Valid for QUOTE_TOKEN_MAX_AGE seconds.
+    """
+    return _quote_serializer().dumps({
+        'fingerprint': _quote_fingerprint(specs, manual_passmark),
+        'quote': price_data
+    })
+
+
+def redeem_quote_token(token, specs, manual_passmark):
+    """
+    The quote carried by a token from issue_quote_token, or None if the token
+    is invalid or expired, the specs differ from the quoted ones, or
+    prices.txt/cpus.db changed since.
+    """
+    try:
+        payload = _quote_serializer().loads(token, max_age=current_app.config['QUOTE_TOKEN_MAX_AGE'])
+        valid = payload['fingerprint'] == _quote_fingerprint(specs, manual_passmark)
+    except (BadSignature, KeyError, TypeError, ValueError):
+        valid = False
+    metrics.cache_lookup('quote_token', valid)
+    return payload['quote'] if valid else None
+
+
+def prepare_buildsheet(data):
+    """
+    Price one machine from a generate request and build its PDF field data.
+    A valid 'quote_token' from /api/calculate_price supplies the price, so
+    the machine isn't priced (or its CPU looked up) again.
+    Returns: (pdf_data dict, download filename)
+    """
+    price_data = None
+    if data.get('quote_token'):
+        specs_for_pricing, manual_passmark = buildsheet_data.buildsheet_specs(data)
+        price_data = redeem_quote_token(data['quote_token'], specs_for_pricing, manual_passmark)
+    return buildsheet_data.prepare(data, price_data, db_path='cpus.db')
+
+
+@main_bp.route('/')
 def index():
     """Main form page."""
     return render_template('index.html')
 
 
-@app.route('/api/search_cpu', methods=['GET'])
+@main_bp.route('/api/search_cpu', methods=['GET'])
 def search_cpu():
     """
     Search for CPUs in the database.
     Query parameter: q (search query)
     Returns: JSON list of CPU candidates
+    
+    Responses carry an ETag and Cache-Control, so browsers reuse recent
+    results and a repeat request with If-None-Match gets an empty 304.
     """
     query = request.args.get('q', '')
     
     if not query or len(query) < 2:
-        return jsonify([])
+        return _cacheable(jsonify([]))
     
     try:
         candidates = pricing.get_cpu_candidates(query, db_path='cpus.db', limit=10)
@@ -57,17 +197,26 @@ def search_cpu():
                 'score': cpu.get('score', 0)
             })
         
-        return jsonify(results)
+        return _cacheable(jsonify(results))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
-@app.route('/api/calculate_price', methods=['POST'])
+def _cacheable(response):
+    """Add ETag/Cache-Control to a GET response and answer If-None-Match with 304."""
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config['SEARCH_CACHE_MAX_AGE']
+    response.add_etag()
+    return response.make_conditional(request)
+
+
+@main_bp.route('/api/calculate_price', methods=['POST'])
 def calculate_price():
     """
     Calculate the price based on submitted specs.
     Expects JSON with computer specifications.
-    Returns: JSON with price breakdown
+    Returns: JSON with price breakdown, and a quote_token that
+    /api/generate_buildsheet accepts in place of pricing the machine again
     """
     try:
         data = request.json
@@ -106,113 +255,371 @@ def calculate_price():
             'success': True,
             'final_price': price_data['final_price'],
             'breakdown': price_data['breakdown'],
-            'specs_used': price_data['specs_used']
+            'specs_used': price_data['specs_used'],
+            'quote_token': issue_quote_token(specs, manual_passmark, price_data)
         })
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 400
 
 
-@app.route('/api/generate_buildsheet', methods=['POST'])
+@main_bp.route('/api/generate_buildsheet', methods=['POST'])
 def generate_buildsheet():
     """
     Generate a filled PDF build sheet.
-    Expects JSON with complete computer data.
+    Expects JSON with complete computer data, optionally with the
+    quote_token from /api/calculate_price for the same specs.
     Returns: PDF file download
+    
+    With 'async': true in the JSON (or ?async=1) the PDF is rendered in the
+    background instead, and this returns 202 with a job id straight away:
+        {'success': True, 'job_id', 'status_url', 'download_url'}
+    Poll status_url until its status is 'done', then fetch download_url.
     """
     try:
         data = request.json
         
-        # Parse drives for display
-        drives = []
-        if 'drives' in data:
-            for drive_data in data['drives']:
-                drives.append({
-                    'capacity_gb': int(drive_data.get('capacity', 0)),
-                    'type': drive_data.get('type', 'SSD')
-                })
+        pdf_data, output_filename = prepare_buildsheet(data)
         
-        # Build specs for pricing (needed for final price)
-        specs_for_pricing = {
-            'cpu_name': data.get('cpu_name', ''),
-            'cpu_model_name': data.get('cpu_model_name'),
-            'ram_gb': float(data.get('ram_gb', 0)),
-            'ram_type': data.get('ram_type', 'DDR4'),
-            'drives': drives,
-            'gpu_price': float(data.get('gpu_price', 0)),
-            'os_name': data.get('os_name', 'Windows'),
-            'os_price_type': data.get('os_price_type', 'Windows'),
-            'is_laptop': data.get('is_laptop', False)
-        }
+        if data.get('async') or request.args.get('async', '').lower() in ('1', 'true', 'yes'):
+            return enqueue_buildsheet(pdf_data, output_filename)
         
-        # Calculate price
-        manual_passmark = None
-        if data.get('manual_passmark'):
-            manual_passmark = float(data['manual_passmark'])
+        # Fill the PDF in memory (or reuse an identical sheet from the output cache)
+        pdf_bytes = render_buildsheet(pdf_data)
         
-        price_data = pricing.calculate_price(specs_for_pricing, db_path='cpus.db', manual_passmark=manual_passmark)
-        
-        # Build data dict for PDF
-        pdf_data = {
-            'model': data.get('model', 'Unknown Model'),
-            'serial': data.get('serial', 'N/A'),
-            'cpu_name': data.get('cpu_name', 'Unknown CPU').split('@')[0].strip(),  # Remove @ and clock speed
-            'cpu_cores': data.get('cpu_cores', price_data['specs_used'].get('cores', '?')),
-            'cpu_threads': data.get('cpu_threads', price_data['specs_used'].get('threads', '?')),
-            'cpu_speed': data.get('cpu_speed', '0.00'),  # Use cpu_speed from form data
-            'ram_gb': data.get('ram_gb', 0),
-            'ram_type': data.get('ram_type', 'DDR4'),
-            'drives': drives,
-            'gpu_name': data.get('gpu_name', ''),
-            'os_name': data.get('os_name', 'Unknown'),
-            'price': float(data.get('price', price_data['final_price'])),  # Use actual price from form, fallback to calculated
-            'builder_name': data.get('builder_name', ''),
-            'date': datetime.datetime.now().strftime('%Y-%m-%d'),
-            'is_laptop': data.get('is_laptop', False),
-            'screen_size': data.get('screen_size', ''),
-            'battery_health': data.get('battery_health', ''),
-            'battery_duration': data.get('battery_duration', ''),
-            'features': {
-                'wifi': data.get('wifi', False),
-                'bluetooth': data.get('bluetooth', False),
-                'webcam': data.get('webcam', False),
-                'touchscreen': data.get('touchscreen', False),
-                'sound': data.get('sound', False),
-                'microphone': data.get('microphone', False)
-            }
-        }
+        # Archive a copy to disk off the request thread
+        _archive_in_background(pdf_bytes, output_filename)
         
-        # Generate PDF
-        model_safe = secure_filename(data.get('model', 'buildsheet')).replace(' ', '_')
-        serial_safe = secure_filename(data.get('serial', 'NA')).replace(' ', '_')
-        output_filename = f"BuildSheet_{model_safe}_{serial_safe}.pdf"
-        output_path = os.path.join('generated', output_filename)
+        # Stream the bytes straight back
+        return send_file(
+            io.BytesIO(pdf_bytes),
+            as_attachment=True,
+            download_name=output_filename,
+            mimetype='application/pdf'
+        )
         
-        # Create generated folder if it doesn't exist
-        os.makedirs('generated', exist_ok=True)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+def enqueue_buildsheet(pdf_data, output_filename):
+    """
+    Queue a priced build sheet on the background job queue and return 202 with its job id.
+    A sheet already in the output cache becomes a finished job straight away.
+    """
+    queue = current_app.extensions['pdf_jobs']
+    pdf_bytes, key = cached_buildsheet(pdf_data)
+    if pdf_bytes is not None:
+        job_id = queue.add_finished(pdf_bytes, output_filename)
+        _archive_in_background(pdf_bytes, output_filename)
+        status = 'done'
+    else:
+        # The job finishes on a pool callback thread, outside the request context
+        cache = current_app.extensions['pdf_output_cache']
+        archive_dir = current_app.config['ARCHIVE_DIR'] if current_app.config['ARCHIVE_BUILDSHEETS'] else None
+        retention = current_app.extensions['pdf_archive']
         
-        # Fill the PDF
-        pdf_generator.fill_template(pdf_data, output_path)
+        def on_done(rendered):
+            if cache is not None:
+                cache.put(key, rendered)
+            if archive_dir:
+                archive_executor.submit(archive_pdf, rendered, output_filename, archive_dir, retention)
+        
+        job_id = queue.submit(
+            pdf_data, output_filename,
+            template_path=pdf_generator.template_path,
+            max_workers=current_app.config['BATCH_WORKERS'],
+            on_done=on_done,
+            compact=pdf_generator.compact
+        )
+        status = 'pending'
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'status': status,
+        'status_url': f"/api/jobs/{job_id}",
+        'download_url': f"/api/jobs/{job_id}/download"
+    }), 202
+
+
+@main_bp.route('/api/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """
+    Status of a background PDF job.
+    Returns: JSON {'job_id', 'status': 'pending'|'done'|'failed', 'filename'[, 'error']}
+    """
+    status = current_app.extensions['pdf_jobs'].status(job_id)
+    if status is None:
+        return jsonify({'success': False, 'error': 'Unknown job'}), 404
+    return jsonify(status)
+
+
+@main_bp.route('/api/jobs/<job_id>/download', methods=['GET'])
+def job_download(job_id):
+    """
+    Download a finished background PDF job.
+    Returns: PDF file download (409 while the job is still pending)
+    """
+    queue = current_app.extensions['pdf_jobs']
+    status = queue.status(job_id)
+    if status is None:
+        return jsonify({'success': False, 'error': 'Unknown job'}), 404
+    if status['status'] == 'pending':
+        return jsonify({'success': False, 'status': 'pending', 'error': 'Job is not finished yet'}), 409
+    if status['status'] == 'failed':
+        return jsonify({'success': False, 'status': 'failed', 'error': status.get('error')}), 500
+    
+    return send_file(
+        os.path.abspath(queue.pdf_path(job_id)),
+        as_attachment=True,
+        download_name=status['filename'],
+        mimetype='application/pdf'
+    )
+
+
+def stream_print_job(pdf_data_list, download_name):
+    """
+    Response streaming the sheets as one combined print job PDF (see
+    pdf_filler.PrintJob): the template is sent with the first page, then each
+    further page adds only its own fields. Overlays are drawn on the render
+    pool; the combined file is archived once it is complete.
+    The first page is rendered before the response starts, so a batch that
+    can't render at all still fails with an error status.
+    """
+    layout = pdf_generator.get_layout()
+    overlays = pdf_filler.render_overlays(
+        pdf_data_list, layout,
+        template_path=pdf_generator.template_path,
+        max_workers=current_app.config['BATCH_WORKERS'],
+        compact=pdf_generator.compact
+    )
+    chunks = pdf_filler.stream_print_job(pdf_generator, overlays, layout)
+    first = next(chunks)
+    archive_dir = current_app.config['ARCHIVE_DIR'] if current_app.config['ARCHIVE_BUILDSHEETS'] else None
+    retention = current_app.extensions['pdf_archive']
+    
+    def generate():
+        sent = [first]
+        yield first
+        try:
+            for chunk in chunks:
+                sent.append(chunk)
+                yield chunk
+        except Exception as e:
+            # The 200 is already on its way; re-raising makes the server drop the
+            # connection, so the client sees a failed download rather than a
+            # truncated PDF. Nothing is archived.
+            print(f"Error: print job {download_name} failed after {len(sent) - 1} of "
+                  f"{len(pdf_data_list)} sheets: {e}")
+            raise
+        if archive_dir:
+            archive_executor.submit(archive_pdf, b''.join(sent), download_name, archive_dir, retention)
+    
+    response = Response(generate(), mimetype='application/pdf')
+    response.headers['Content-Disposition'] = f'attachment; filename="{download_name}"'
+    return response
+
+
+@main_bp.route('/api/generate_buildsheets', methods=['POST'])
+def generate_buildsheets():
+    """
+    Generate build sheets for a batch of machines (e.g. a pallet of identical units).
+    Expects JSON: {
+        'machines': [ {same fields as /api/generate_buildsheet}, ... ],
+        'defaults': {fields shared by every machine, optional},
+        'format': 'pdf' (one combined print job, streamed page by page; default)
+                  or 'zip' (a separate PDF per machine)
+    }
+    Returns: PDF or ZIP file download
+    """
+    try:
+        data = request.json or {}
+        machines = data.get('machines') or []
+        defaults = data.get('defaults') or {}
+        output_format = data.get('format', 'pdf')
         
-        # Send file for download
+        if not machines:
+            return jsonify({'success': False, 'error': 'No machines provided'}), 400
+        if len(machines) > current_app.config['MAX_BATCH_SIZE']:
+            return jsonify({'success': False, 'error': f"Batch too large (max {current_app.config['MAX_BATCH_SIZE']} machines)"}), 400
+        if output_format not in ('pdf', 'zip'):
+            return jsonify({'success': False, 'error': f"Unknown format: {output_format}"}), 400
+        
+        # Price every machine here (fast, in-memory)
+        prepared = [prepare_buildsheet({**defaults, **machine}) for machine in machines]
+        batch_name = f"BuildSheets_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}_{len(prepared)}"
+        
+        if output_format == 'pdf':
+            return stream_print_job([pdf_data for pdf_data, _ in prepared], f"{batch_name}.pdf")
+        
+        # Render the sheets the output cache doesn't already have across the process pool
+        lookups = [cached_buildsheet(pdf_data) for pdf_data, _ in prepared]
+        missing = [i for i, (pdf_bytes, _) in enumerate(lookups) if pdf_bytes is None]
+        rendered = pdf_filler.render_many(
+            [prepared[i][0] for i in missing],
+            template_path=pdf_generator.template_path,
+            max_workers=current_app.config['BATCH_WORKERS'],
+            compact=pdf_generator.compact
+        ) if missing else []
+        pdf_list = [pdf_bytes for pdf_bytes, _ in lookups]
+        for i, pdf_bytes in zip(missing, rendered):
+            pdf_list[i] = pdf_bytes
+            store_buildsheet(lookups[i][1], pdf_bytes)
+        
+        filenames = []
+        seen = {}
+        for _, filename in prepared:
+            # Identical model/serial pairs would collide inside a zip
+            count = seen.get(filename, 0)
+            seen[filename] = count + 1
+            if count:
+                stem, ext = os.path.splitext(filename)
+                filename = f"{stem}_{count + 1}{ext}"
+            filenames.append(filename)
+        
+        for pdf_bytes, filename in zip(pdf_list, filenames):
+            _archive_in_background(pdf_bytes, filename)
+        
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for pdf_bytes, filename in zip(pdf_list, filenames):
+                archive.writestr(filename, pdf_bytes)
+        
+        buffer.seek(0)
         return send_file(
-            output_path,
+            buffer,
             as_attachment=True,
-            download_name=output_filename,
-            mimetype='application/pdf'
+            download_name=f"{batch_name}.zip",
+            mimetype='application/zip'
         )
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
-@app.route('/health')
+@main_bp.route('/health')
 def health():
-    """Health check endpoint."""
+    """Liveness check: the process is up (it may still be warming up, see /ready)."""
     return jsonify({'status': 'healthy', 'timestamp': datetime.datetime.now().isoformat()})
 
 
+@main_bp.route('/ready')
+def ready():
+    """
+    Readiness check: 503 until this worker's startup warm-up (see warmup.py)
+    has passed, with the time each phase took.
+    """
+    status = current_app.extensions['warmup'].status()
+    return jsonify(status), 200 if status['ready'] else 503
+
+
+@main_bp.route('/metrics')
+def metrics_endpoint():
+    """
+    Prometheus metrics for this process: per-stage latency histograms, request
+    latency and counters for cache hits/misses, DB queries and bytes written.
+    """
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+
+def _start_request_timer():
+    g.request_start = time.perf_counter()
+
+
+def _record_request_time(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint,
+                                        method=request.method, status=response.status_code)
+    return response
+
+
+def create_app(config=None):
+    """
+    Application factory.
+    Used by the production server (gunicorn "app:create_app()", see gunicorn.conf.py)
+    and by the development server below. config overrides the defaults.
+    """
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'freegeek-buildsheet-secret-key-2026')
+    app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+    # Keep a copy of every generated build sheet in generated/ (written in the background)
+    app.config['ARCHIVE_BUILDSHEETS'] = os.environ.get('ARCHIVE_BUILDSHEETS', '1').lower() not in ('0', 'false', 'no')
+    app.config['ARCHIVE_DIR'] = os.environ.get('ARCHIVE_DIR', 'generated')
+    # Batch generation: render worker processes per server worker and max machines per request.
+    # Default: one per CPU, or, when WEB_WORKERS is set, the CPUs shared out among that many
+    # server workers (each has its own render pool), at least one each
+    web_workers = int(os.environ.get('WEB_WORKERS', 0))
+    cpus = os.cpu_count() or 1
+    app.config['BATCH_WORKERS'] = (int(os.environ.get('BATCH_WORKERS', 0))
+                                   or (max(1, cpus // web_workers) if web_workers else cpus))
+    app.config['MAX_BATCH_SIZE'] = int(os.environ.get('MAX_BATCH_SIZE', 500))
+    # Seconds browsers may reuse a /api/search_cpu response before revalidating it
+    app.config['SEARCH_CACHE_MAX_AGE'] = int(os.environ.get('SEARCH_CACHE_MAX_AGE', 300))
+    # Archive caps: total size in MB and age in days (0 = unlimited); least recently written go first
+    app.config['ARCHIVE_MAX_MB'] = float(os.environ.get('ARCHIVE_MAX_MB', 500))
+    app.config['ARCHIVE_MAX_AGE_DAYS'] = float(os.environ.get('ARCHIVE_MAX_AGE_DAYS', 0))
+    # Content-addressed cache of rendered sheets, so identical requests skip rendering (same caps, LRU)
+    app.config['OUTPUT_CACHE'] = os.environ.get('OUTPUT_CACHE', '1').lower() not in ('0', 'false', 'no')
+    app.config['OUTPUT_CACHE_DIR'] = os.environ.get('OUTPUT_CACHE_DIR', os.path.join('generated', 'cache'))
+    app.config['OUTPUT_CACHE_MAX_MB'] = float(os.environ.get('OUTPUT_CACHE_MAX_MB', 200))
+    app.config['OUTPUT_CACHE_MAX_AGE_DAYS'] = float(os.environ.get('OUTPUT_CACHE_MAX_AGE_DAYS', 7))
+    # Background PDF jobs (async generate): shared job directory and how long finished jobs are kept
+    app.config['JOBS_DIR'] = os.environ.get('JOBS_DIR', os.path.join('generated', 'jobs'))
+    app.config['JOB_RETENTION_SECONDS'] = int(os.environ.get('JOB_RETENTION_SECONDS', 3600))
+    # Seconds a quote_token from /api/calculate_price can be used to generate without re-pricing
+    app.config['QUOTE_TOKEN_MAX_AGE'] = int(os.environ.get('QUOTE_TOKEN_MAX_AGE', 900))
+    # Compress generated PDFs' content streams (about a quarter smaller; 0 writes them uncompressed)
+    app.config['PDF_COMPACT'] = os.environ.get('PDF_COMPACT', '1').lower() not in ('0', 'false', 'no')
+    # Warm up (catalog, pricing config, template, one throwaway sheet, render pool) at startup, see warmup.py;
+    # in the background, with /ready answering 503 until done, or before create_app returns
+    # (gunicorn.conf.py defaults to the latter; background suits the dev server)
+    app.config['PRELOAD'] = os.environ.get('PRELOAD', '1').lower() not in ('0', 'false', 'no')
+    app.config['WARMUP_BACKGROUND'] = os.environ.get('WARMUP_BACKGROUND', '1').lower() not in ('0', 'false', 'no')
+    if config:
+        app.config.update(config)
+    
+    # Shared PDF filler (cached template and base page), e.g. for calibration previews
+    pdf_generator.compact = app.config['PDF_COMPACT']
+    app.extensions['pdf_generator'] = pdf_generator
+    
+    app.extensions['pdf_jobs'] = jobs.PDFJobQueue(
+        app.config['JOBS_DIR'],
+        retention_seconds=app.config['JOB_RETENTION_SECONDS']
+    )
+    
+    app.extensions['pdf_archive'] = output_cache.BoundedDirectory(
+        app.config['ARCHIVE_DIR'],
+        max_bytes=int(app.config['ARCHIVE_MAX_MB'] * 1024 * 1024),
+        max_age_seconds=app.config['ARCHIVE_MAX_AGE_DAYS'] * 86400
+    )
+    app.extensions['pdf_output_cache'] = output_cache.OutputCache(
+        app.config['OUTPUT_CACHE_DIR'],
+        max_bytes=int(app.config['OUTPUT_CACHE_MAX_MB'] * 1024 * 1024),
+        max_age_seconds=app.config['OUTPUT_CACHE_MAX_AGE_DAYS'] * 86400
+    ) if app.config['OUTPUT_CACHE'] else None
+    
+    # Register blueprints
+    app.register_blueprint(main_bp)
+    app.register_blueprint(calibration_bp)
+    
+    # Request latency for /metrics
+    app.before_request(_start_request_timer)
+    app.after_request(_record_request_time)
+    
+    # Without PRELOAD there is nothing to wait for: ready straight away
+    phases = warmup.build_phases(pdf_generator, render_workers=app.config['BATCH_WORKERS']) if app.config['PRELOAD'] else []
+    app.extensions['warmup'] = warm = warmup.WarmUp(phases)
+    warm.record('imports', IMPORT_SECONDS)
+    warm.start(background=app.config['WARMUP_BACKGROUND'])
+    
+    return app
+
+
 if __name__ == '__main__':
+    # Development server (single process, auto-reload). In production run:
+    #   gunicorn -c gunicorn.conf.py "app:create_app()"
     # Run on all network interfaces so it's accessible from other computers
     # Port 5000 is default Flask port
     print("=" * 60)
@@ -223,4 +630,5 @@ if __name__ == '__main__':
     print("Press CTRL+C to stop")
     print("=" * 60)
     
+    app = create_app()
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,356 @@
+"""
+Performance Benchmark Suite
+
+Times the hot paths of the app and compares them against a stored baseline:
+  - search:    pricing.get_cpu_candidates on raw CPU strings as scanners report them
+  - pricing:   pricing.calculate_price on varied machine specs
+  - overlay:   BuildSheetPDFFiller.create_overlay
+  - fill:      BuildSheetPDFFiller.fill_template end to end (in memory)
+  - endpoints: /api/search_cpu, /api/calculate_price and /api/generate_buildsheet
+               through the Flask test client
+
+Each benchmark reports p50/p95/p99 latency and throughput (sequential ops/s).
+The main figures are cold: the result caches (CPU search LRU, price quote memo,
+rendered sheet cache) are off, so every call does the work. Benchmarks served
+by a cache are then run again warm, as "<name>_warm", with the cache on and
+primed with the corpus, which times repeat requests.
+
+Usage:
+  python benchmark.py                   # run and compare against the baseline
+  python benchmark.py --save-baseline   # run and store the results as the new baseline
+  python benchmark.py --only search,fill --rounds 5 --threshold 0.3   (search runs cold and warm)
+
+Exits with status 1 if any benchmark's p50 or p95 is more than --threshold
+(default 25%) slower than the baseline. Baselines are machine specific, so
+record one on the machine you compare on.
+"""
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import random
+import re
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+import pricing
+import pdf_filler
+
+BASELINE_FILE = 'benchmark_baseline.json'
+DEFAULT_THRESHOLD = 0.25
+COMPARED_METRICS = ('p50_ms', 'p95_ms')
+
+# Strings as they come out of /proc/cpuinfo, WMI and dmidecode
+RAW_CPU_STRINGS = [
+    "Intel(R) Core(TM) i7-7600U CPU @ 2.80GHz",
+    "Intel(R) Core(TM) i5-8350U CPU @ 1.70GHz",
+    "Intel(R) Core(TM) i5-6500 CPU @ 3.20GHz",
+    "Intel(R) Core(TM) i3-10110U CPU @ 2.10GHz",
+    "11th Gen Intel(R) Core(TM) i5-1145G7 @ 2.60GHz",
+    "12th Gen Intel(R) Core(TM) i7-1265U",
+    "Intel(R) Core(TM)2 Duo CPU     E8400  @ 3.00GHz",
+    "Intel(R) Pentium(R) CPU G4560 @ 3.50GHz",
+    "Intel(R) Celeron(R) N4020 CPU @ 1.10GHz",
+    "Intel(R) Xeon(R) CPU E5-2680 v4 @ 2.40GHz",
+    "Intel(R) Core(TM) m3-7Y30 CPU @ 1.00GHz",
+    "AMD Ryzen 5 3500U with Radeon Vega Mobile Gfx",
+    "AMD Ryzen 7 5800X 8-Core Processor",
+    "AMD Ryzen 5 PRO 4650U with Radeon Graphics",
+    "AMD A10-9700 RADEON R7, 10 COMPUTE CORES 4C+6G",
+    "AMD Athlon Silver 3050U with Radeon Graphics",
+    "AMD Phenom(tm) II X4 965 Processor",
+    "i5-8530U",
+    "Core i3-10110U",
+    "ryzen 5 2600",
+]
+
+
+def _rawify(name, rng):
+    """Turn a catalog name into the kind of string a scanner reports for it."""
+    raw = name
+    if raw.startswith('Intel '):
+        raw = re.sub(r'^Intel (Core|Xeon|Pentium|Celeron|Atom)', r'Intel(R) \1(TM)', raw)
+        if ' @ ' in raw:
+            raw = raw.replace(' @ ', ' CPU @ ')
+    elif raw.startswith('AMD Ryzen'):
+        raw += rng.choice([' with Radeon Graphics', ' 6-Core Processor', ''])
+    if rng.random() < 0.2:
+        raw = raw.lower()
+    if rng.random() < 0.2:
+        raw = raw.replace(' ', '  ', 1)
+    return raw
+
+
+def build_search_corpus(db_path='cpus.db', size=80, seed=1234):
+    """RAW_CPU_STRINGS plus scanner-style variants of a fixed sample of catalog rows."""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(pricing._resolve_db_path(db_path))
+    try:
+        names = [row[0] for row in conn.execute("SELECT name FROM cpus ORDER BY rowid") if row[0]]
+    finally:
+        conn.close()
+    sample = rng.sample(names, max(0, min(size - len(RAW_CPU_STRINGS), len(names))))
+    return RAW_CPU_STRINGS + [_rawify(name, rng) for name in sample]
+
+
+def build_spec_corpus(search_corpus, size=120, seed=4321):
+    """Varied calculate_price specs: desktops and laptops, mixed RAM, drives and OS."""
+    rng = random.Random(seed)
+    specs_list = []
+    for _ in range(size):
+        drives = [{'capacity_gb': rng.choice([128, 256, 500, 512, 1000, 2000]),
+                   'type': rng.choice(['SSD', 'NVMe SSD', 'HDD'])}
+                  for _ in range(rng.choice([1, 1, 1, 2]))]
+        specs_list.append({
+            'cpu_name': rng.choice(search_corpus),
+            'cpu_model_name': None,
+            'ram_gb': float(rng.choice([4, 8, 8, 16, 16, 32, 64])),
+            'ram_type': rng.choice(['DDR3', 'DDR4', 'DDR4', 'DDR5']),
+            'drives': drives,
+            'gpu_price': float(rng.choice([0, 0, 0, 25, 60])),
+            'os_name': rng.choice(['Windows 11 Pro', 'Windows 10 Home', 'Linux Mint 21']),
+            'os_price_type': rng.choice(['Windows', 'Windows', 'Linux']),
+            'is_laptop': rng.random() < 0.5,
+        })
+    return specs_list
+
+
+def build_sheet_data(specs, index):
+    """fill_template data for one spec, shaped like prepare_buildsheet's output."""
+    return {
+        'model': f"Dell Latitude {5000 + index}",
+        'serial': f"BENCH{index:06d}",
+        'cpu_name': specs['cpu_name'].split('@')[0].strip(),
+        'cpu_cores': 4,
+        'cpu_threads': 8,
+        'cpu_speed': '2.40',
+        'ram_gb': specs['ram_gb'],
+        'ram_type': specs['ram_type'],
+        'drives': specs['drives'],
+        'os_name': specs['os_name'],
+        'price': 199,
+        'builder_name': 'Benchmark',
+        'date': '2026-01-01',
+        'is_laptop': specs['is_laptop'],
+        'screen_size': '14',
+        'battery_health': '85%',
+        'battery_duration': '4h',
+        'features': {'wifi': True, 'bluetooth': True, 'webcam': specs['is_laptop'],
+                     'touchscreen': False, 'sound': True, 'microphone': True},
+    }
+
+
+def _request_body(specs, index):
+    """JSON body for the calculate_price/generate_buildsheet endpoints."""
+    body = dict(specs)
+    body['drives'] = [{'capacity': d['capacity_gb'], 'type': d['type']} for d in specs['drives']]
+    body.update(model=f"Dell Latitude {5000 + index}", serial=f"BENCH{index:06d}", builder_name='Benchmark')
+    return body
+
+
+@contextlib.contextmanager
+def result_caches(enabled):
+    """
+    Turns pricing's result caches (CPU search LRU, price quote memo) on or off
+    for the duration. They start empty either way.
+    """
+    saved = pricing.CPU_SEARCH_CACHE_SIZE, pricing.PRICE_QUOTE_CACHE_SIZE
+    if not enabled:
+        pricing.CPU_SEARCH_CACHE_SIZE = pricing.PRICE_QUOTE_CACHE_SIZE = 0
+    pricing.clear_search_cache()
+    pricing.clear_price_cache()
+    try:
+        yield
+    finally:
+        pricing.CPU_SEARCH_CACHE_SIZE, pricing.PRICE_QUOTE_CACHE_SIZE = saved
+        pricing.clear_search_cache()
+        pricing.clear_price_cache()
+
+
+def measure(func, inputs, rounds=1, warmup=3):
+    """
+    Calls func(item) for every item, `rounds` times, after untimed calls on the
+    first `warmup` items.
+    Returns latency percentiles (ms) and sequential throughput (ops/s).
+    """
+    for item in inputs[:warmup]:
+        func(item)
+
+    samples = []
+    total_start = time.perf_counter()
+    for _ in range(rounds):
+        for item in inputs:
+            start = time.perf_counter()
+            func(item)
+            samples.append((time.perf_counter() - start) * 1000)
+    total = time.perf_counter() - total_start
+
+    samples.sort()
+
+    def pct(p):
+        return samples[min(len(samples) - 1, max(0, int(round(p / 100 * len(samples))) - 1))]
+
+    return {
+        'n': len(samples),
+        'p50_ms': statistics.median(samples),
+        'p95_ms': pct(95),
+        'p99_ms': pct(99),
+        'ops_per_sec': len(samples) / total if total else 0.0,
+    }
+
+
+def run_benchmarks(rounds=5, only=None, db_path='cpus.db'):
+    """Runs the suite (or the benchmarks named in `only`) and returns {name: result}."""
+    search_corpus = build_search_corpus(db_path)
+    spec_corpus = build_spec_corpus(search_corpus)
+    sheets = [build_sheet_data(specs, i) for i, specs in enumerate(spec_corpus[:40])]
+    bodies = [_request_body(specs, i) for i, specs in enumerate(spec_corpus)]
+
+    filler = pdf_filler.BuildSheetPDFFiller()
+
+    def fill(data):
+        filler.fill_template(data, io.BytesIO())
+
+    tmp = tempfile.TemporaryDirectory()
+    clients = {}
+    if only is None or any(name.startswith('endpoint') for name in only):
+        from app import create_app
+        # Cold: no rendered sheet cache; warm: one in a scratch directory
+        for warm in (False, True):
+            app = create_app({
+                'ARCHIVE_BUILDSHEETS': False, 'TESTING': True, 'OUTPUT_CACHE': warm,
+                'OUTPUT_CACHE_DIR': os.path.join(tmp.name, 'cache'), 'JOBS_DIR': os.path.join(tmp.name, 'jobs'),
+            })
+            app.extensions['warmup'].wait()
+            clients[warm] = app.test_client()
+
+    def endpoint(method, url):
+        def make(warm):
+            client = clients[warm]
+
+            def call(payload):
+                if method == 'GET':
+                    response = client.get(url, query_string={'q': payload})
+                else:
+                    response = client.post(url, json=payload)
+                if response.status_code != 200:
+                    raise RuntimeError(f"{url} returned {response.status_code}: {response.get_data(as_text=True)[:200]}")
+                response.close()
+            return call
+        return make
+
+    def direct(func):
+        return lambda warm: func
+
+    # (name, func factory taking warm, inputs, rounds, cached): cached benchmarks also run warm
+    benchmarks = [
+        ('search', direct(lambda q: pricing.get_cpu_candidates(q, db_path, limit=10)), search_corpus, rounds, True),
+        ('pricing', direct(lambda s: pricing.calculate_price(s, db_path)), spec_corpus, rounds, True),
+        ('overlay', direct(filler.create_overlay), sheets, rounds, False),
+        ('fill', direct(fill), sheets, max(1, rounds // 2), False),
+        ('endpoint_search', endpoint('GET', '/api/search_cpu'), search_corpus, rounds, True),
+        ('endpoint_price', endpoint('POST', '/api/calculate_price'), bodies, rounds, True),
+        ('endpoint_generate', endpoint('POST', '/api/generate_buildsheet'), bodies[:40], max(1, rounds // 2), True),
+    ]
+
+    results = {}
+    try:
+        for name, make, inputs, bench_rounds, cached in benchmarks:
+            if only is not None and name not in only:
+                continue
+            for warm in ((False, True) if cached else (False,)):
+                label = f"{name}_warm" if warm else name
+                # Keep "CPU not found" warnings for unknown corpus strings out of the report
+                with contextlib.redirect_stdout(io.StringIO()), result_caches(warm):
+                    # Warm runs first pass over the whole corpus, so the timed rounds are repeats
+                    results[label] = measure(make(warm), inputs, rounds=bench_rounds,
+                                             warmup=len(inputs) if warm else 3)
+                print_result(label, results[label])
+    finally:
+        tmp.cleanup()
+    return results
+
+
+def print_result(name, result):
+    line = (f"{name:<22} n={result['n']:<5} p50={result['p50_ms']:8.2f}ms  p95={result['p95_ms']:8.2f}ms  "
+            f"p99={result['p99_ms']:8.2f}ms  {result['ops_per_sec']:9.1f} ops/s")
+    print(line)
+
+
+def compare(results, baseline, threshold):
+    """
+    Compares results against baseline results.
+    Returns a list of (name, metric, baseline value, current value) regressions.
+    """
+    regressions = []
+    print()
+    print(f"{'benchmark':<22} {'metric':<7} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"{name:<22} (no baseline)")
+            continue
+        for metric in COMPARED_METRICS:
+            before = baseline[name][metric]
+            after = result[metric]
+            change = (after - before) / before if before else 0.0
+            flag = '  REGRESSION' if change > threshold else ''
+            print(f"{name:<22} {metric[:3]:<7} {before:>8.2f}ms {after:>8.2f}ms {change:>+7.0%}{flag}")
+            if change > threshold:
+                regressions.append((name, metric, before, after))
+    return regressions
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def save_baseline(path, results):
+    baseline = {
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_search_backend': pricing.CPU_SEARCH_BACKEND,
+        'results': results,
+    }
+    with open(path, 'w') as f:
+        json.dump(baseline, f, indent=2)
+    print(f"\nBaseline saved to {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark search, pricing and PDF generation.")
+    parser.add_argument("--rounds", type=int, default=5, help="Passes over each corpus (default 5)")
+    parser.add_argument("--only", help="Comma-separated benchmark names to run")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help=f"Baseline file (default {BASELINE_FILE})")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed slowdown before failing, as a fraction (default 0.25)")
+    args = parser.parse_args()
+
+    only = set(args.only.split(',')) if args.only else None
+    results = run_benchmarks(rounds=args.rounds, only=only)
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        sys.exit(0)
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to record one.")
+        sys.exit(0)
+
+    regressions = compare(results, baseline['results'], args.threshold)
+    if regressions:
+        print(f"\nFAIL: {len(regressions)} metric(s) regressed more than {args.threshold:.0%}")
+        sys.exit(1)
+    print(f"\nOK: no regressions beyond {args.threshold:.0%}")
@@ -0,0 +1,113 @@
+"""
+CPU Search Index Builder
+
+Migrates cpus.db for indexed CPU search: adds B-tree indexes on name and an
+FTS5 trigram table (see pricing.build_search_index).
+Re-run it whenever the cpus table is updated.
+
+Usage:
+  python build_cpu_index.py [cpus.db]
+  python build_cpu_index.py --benchmark [--sizes 5401,20000,80000,320000]
+
+The benchmark grows synthetic copies of the catalog and times the indexed
+SQLite search against the plain LIKE scans it replaces.
+"""
+
+import argparse
+import os
+import re
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+
+import benchmark
+import pricing
+
+BENCHMARK_QUERIES = [
+    "Intel(R) Core(TM) i7-7600U CPU @ 2.80GHz",
+    "Intel(R) Core(TM) i5-8350U CPU @ 1.70GHz",
+    "Intel(R) Pentium(R) CPU G4560 @ 3.50GHz",
+    "AMD Ryzen 5 3500U with Radeon Vega Mobile Gfx",
+    "AMD Ryzen 7 5800X 8-Core Processor",
+    "Intel(R) Xeon(R) CPU E5-2680 v4 @ 2.40GHz",
+    "Intel(R) Celeron(R) N4020 CPU @ 1.10GHz",
+    "i5-8530U",
+    "Core i3-10110U",
+    "Athlon Silver 3050U",
+]
+
+
+def _grow_catalog(source_db, target_db, size):
+    """
+    Writes a copy of the cpus table grown to `size` rows. Extra rows are the
+    real rows with their digits rotated, so the catalog gains new distinct
+    model numbers rather than duplicates of the ones being searched for.
+    """
+    shutil.copyfile(source_db, target_db)
+    conn = sqlite3.connect(target_db)
+    try:
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(cpus)") if row[1] != 'id']
+        base = conn.execute(f"SELECT {', '.join(columns)} FROM cpus ORDER BY rowid").fetchall()
+        name_idx = columns.index('name')
+        generation = 1
+        count = len(base)
+        while count < size:
+            batch = []
+            for row in base[:size - count]:
+                row = list(row)
+                row[name_idx] = re.sub(r'\d', lambda m: str((int(m.group()) + generation) % 10), row[name_idx])
+                row[name_idx] += f" G{generation}"
+                batch.append(row)
+            placeholders = ', '.join('?' for _ in columns)
+            conn.executemany(f"INSERT INTO cpus ({', '.join(columns)}) VALUES ({placeholders})", batch)
+            count += len(batch)
+            generation += 1
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _time_queries(db_path, backend, rounds):
+    samples = []
+    # Without the search cache, so later rounds time queries rather than cache hits
+    with benchmark.result_caches(False):
+        for _ in range(rounds):
+            for query in BENCHMARK_QUERIES:
+                start = time.perf_counter()
+                pricing.get_cpu_candidates(query, db_path, limit=10, backend=backend)
+                samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def run_benchmark(db_path, sizes, rounds=5):
+    print(f"{'rows':>8}  {'LIKE scan p50/p95 (ms)':>24}  {'indexed p50/p95 (ms)':>22}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            plain_db = os.path.join(tmp, f"plain_{size}.db")
+            indexed_db = os.path.join(tmp, f"indexed_{size}.db")
+            _grow_catalog(db_path, plain_db, size)
+            shutil.copyfile(plain_db, indexed_db)
+            pricing.build_search_index(indexed_db)
+
+            plain = _time_queries(plain_db, 'sqlite', rounds)
+            indexed = _time_queries(indexed_db, 'sqlite', rounds)
+            print(f"{size:>8}  {plain[0]:>11.2f} / {plain[1]:<10.2f}  {indexed[0]:>9.2f} / {indexed[1]:<10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or benchmark the CPU search index.")
+    parser.add_argument("db_path", nargs="?", default="cpus.db")
+    parser.add_argument("--benchmark", action="store_true", help="Benchmark search latency as the catalog grows")
+    parser.add_argument("--sizes", default="5401,20000,80000,320000", help="Catalog sizes for --benchmark")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        run_benchmark(args.db_path, [int(s) for s in args.sizes.split(',')])
+    else:
+        start = time.perf_counter()
+        pricing.build_search_index(args.db_path)
+        print(f"Search index built for {args.db_path} in {time.perf_counter() - start:.2f}s")
+        print("Set CPU_SEARCH_BACKEND=sqlite to search through it.")
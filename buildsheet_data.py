@@ -0,0 +1,106 @@
+"""
+Build Sheet Data
+
+Turns a generate request (the JSON fields of /api/generate_buildsheet) into
+pricing inputs and PDF field data. Shared by the web app and the bulk intake
+CLI, so neither needs the other.
+"""
+
+import datetime
+
+from werkzeug.utils import secure_filename
+
+import pricing
+
+
+def prepare(data, price_data=None, db_path='cpus.db'):
+    """
+    Price one machine from a generate request (unless price_data is given,
+    e.g. from a quote token) and build its PDF field data.
+    Raises TypeError/ValueError/AttributeError for malformed fields.
+    Returns: (pdf_data dict, download filename)
+    """
+    specs_for_pricing, manual_passmark = buildsheet_specs(data)
+    if price_data is None:
+        price_data = pricing.calculate_price(specs_for_pricing, db_path=db_path, manual_passmark=manual_passmark)
+    return buildsheet_pdf_data(data, specs_for_pricing, price_data)
+
+
+def buildsheet_specs(data):
+    """
+    Pricing inputs for one machine from a generate request.
+    Returns: (specs dict for pricing.calculate_price, manual passmark or None)
+    """
+    # Parse drives for display
+    drives = []
+    if 'drives' in data:
+        for drive_data in data['drives']:
+            drives.append({
+                'capacity_gb': int(drive_data.get('capacity', 0)),
+                'type': drive_data.get('type', 'SSD')
+            })
+    
+    # Build specs for pricing (needed for final price)
+    specs_for_pricing = {
+        'cpu_name': data.get('cpu_name', ''),
+        'cpu_model_name': data.get('cpu_model_name'),
+        'ram_gb': float(data.get('ram_gb', 0)),
+        'ram_type': data.get('ram_type', 'DDR4'),
+        'drives': drives,
+        'gpu_price': float(data.get('gpu_price', 0)),
+        'os_name': data.get('os_name', 'Windows'),
+        'os_price_type': data.get('os_price_type', 'Windows'),
+        'is_laptop': data.get('is_laptop', False)
+    }
+    
+    manual_passmark = None
+    if data.get('manual_passmark'):
+        manual_passmark = float(data['manual_passmark'])
+    
+    return specs_for_pricing, manual_passmark
+
+
+def buildsheet_pdf_data(data, specs_for_pricing, price_data):
+    """
+    PDF field data for one machine, from its generate request, pricing specs
+    (see buildsheet_specs) and calculated price.
+    Returns: (pdf_data dict, download filename)
+    """
+    drives = specs_for_pricing['drives']
+    
+    # Build data dict for PDF
+    pdf_data = {
+        'model': data.get('model', 'Unknown Model'),
+        'serial': data.get('serial', 'N/A'),
+        'cpu_name': data.get('cpu_name', 'Unknown CPU').split('@')[0].strip(),  # Remove @ and clock speed
+        'cpu_cores': data.get('cpu_cores', price_data['specs_used'].get('cores', '?')),
+        'cpu_threads': data.get('cpu_threads', price_data['specs_used'].get('threads', '?')),
+        'cpu_speed': data.get('cpu_speed', '0.00'),  # Use cpu_speed from form data
+        'ram_gb': data.get('ram_gb', 0),
+        'ram_type': data.get('ram_type', 'DDR4'),
+        'drives': drives,
+        'gpu_name': data.get('gpu_name', ''),
+        'os_name': data.get('os_name', 'Unknown'),
+        'price': float(data.get('price', price_data['final_price'])),  # Use actual price from form, fallback to calculated
+        'builder_name': data.get('builder_name', ''),
+        'date': datetime.datetime.now().strftime('%Y-%m-%d'),
+        'is_laptop': data.get('is_laptop', False),
+        'screen_size': data.get('screen_size', ''),
+        'battery_health': data.get('battery_health', ''),
+        'battery_duration': data.get('battery_duration', ''),
+        'features': {
+            'wifi': data.get('wifi', False),
+            'bluetooth': data.get('bluetooth', False),
+            'webcam': data.get('webcam', False),
+            'touchscreen': data.get('touchscreen', False),
+            'sound': data.get('sound', False),
+            'microphone': data.get('microphone', False)
+        }
+    }
+    
+    # Download filename
+    model_safe = secure_filename(data.get('model', 'buildsheet')).replace(' ', '_')
+    serial_safe = secure_filename(data.get('serial', 'NA')).replace(' ', '_')
+    output_filename = f"BuildSheet_{model_safe}_{serial_safe}.pdf"
+    
+    return pdf_data, output_filename
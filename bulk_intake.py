@@ -0,0 +1,390 @@
+"""
+Bulk Intake
+
+Prices an inventory dump and generates a build sheet for every machine in it,
+instead of entering machines one at a time through the web form.
+
+Input is JSONL (one JSON object per line) or CSV (a header row, then one
+machine per row), using the fields of /api/generate_buildsheet. In CSV files,
+drives are written as "256:SSD; 1000:HDD" and yes/no columns accept
+1/0, true/false, yes/no or x.
+
+The file is streamed in chunks. Each chunk is priced with one
+pricing.calculate_prices call, and its sheets are rendered on the PDF render
+process pool. Only a bounded number of machines are in flight at once, so
+memory use stays flat however long the file is.
+
+Output directory:
+  <record>_BuildSheet_<model>_<serial>.pdf   one sheet per machine
+  manifest.csv     one row per machine: status, model, serial, matched CPU, price, file, error
+  checkpoint.json  progress, saved every few seconds
+  summary.json     totals, written when the run finishes
+
+If a run is interrupted (crash, Ctrl+C), running the same command again
+resumes from the last checkpoint. Use --restart to start over.
+
+Usage:
+  python bulk_intake.py inventory.jsonl [--out DIR] [--workers 4] [--chunk-size 64]
+  python bulk_intake.py inventory.csv --no-pdf    # prices and manifest only
+"""
+
+import argparse
+import contextlib
+import csv
+import datetime
+import io
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+
+import buildsheet_data
+import pdf_filler
+import pricing
+
+CHECKPOINT_FILE = 'checkpoint.json'
+MANIFEST_FILE = 'manifest.csv'
+SUMMARY_FILE = 'summary.json'
+MANIFEST_FIELDS = ['record', 'status', 'model', 'serial', 'cpu_name', 'cpu_model', 'price', 'file', 'error']
+
+CSV_TRUE = ('1', 'true', 'yes', 'y', 'x')
+CSV_BOOLEAN_FIELDS = ('is_laptop', 'wifi', 'bluetooth', 'webcam', 'touchscreen', 'sound', 'microphone')
+
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _parse_csv_drives(text):
+    """'256:SSD; 1000:HDD' -> [{'capacity': '256', 'type': 'SSD'}, ...]"""
+    drives = []
+    for part in (text or '').split(';'):
+        part = part.strip()
+        if not part:
+            continue
+        capacity, _, drive_type = part.partition(':')
+        drives.append({'capacity': capacity.strip(), 'type': drive_type.strip() or 'SSD'})
+    return drives
+
+
+def _csv_record(row):
+    """A CSV row (dict of strings) as a generate request. Empty cells are left out."""
+    data = {key.strip(): value.strip() for key, value in row.items() if key and value and value.strip()}
+    if 'drives' in data:
+        data['drives'] = _parse_csv_drives(data['drives'])
+    for key in CSV_BOOLEAN_FIELDS:
+        if key in data:
+            data[key] = data[key].lower() in CSV_TRUE
+    return data
+
+
+def read_records(path, input_format=None):
+    """
+    Yield (record number, data dict or exception) for each machine in a JSONL
+    or CSV file, numbered from 1. Blank JSONL lines are skipped; a line that
+    isn't a JSON object is yielded as a ValueError.
+    """
+    input_format = input_format or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        if input_format == 'csv':
+            for n, row in enumerate(csv.DictReader(f), 1):
+                yield n, _csv_record(row)
+            return
+
+        n = 0
+        for line in f:
+            if not line.strip():
+                continue
+            n += 1
+            try:
+                data = json.loads(line)
+                if not isinstance(data, dict):
+                    raise ValueError("expected a JSON object")
+            except ValueError as e:
+                data = ValueError(f"invalid JSON: {e}")
+            yield n, data
+
+
+def _chunks(records, size):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _input_fingerprint(path):
+    st = os.stat(path)
+    return {'path': os.path.abspath(path), 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+class IntakeRun:
+    """
+    Progress of one intake run: which records are done, the manifest and the
+    checkpoint file.
+
+    Records finish out of order (rendering is parallel), so progress is kept
+    as a low-water mark (every record before next_record is done) plus the
+    finished records after it, which never number more than are in flight.
+    The checkpoint also stores the manifest length, so a resumed run truncates
+    rows written after the last checkpoint and redoes those records.
+    """
+
+    def __init__(self, out_dir, fingerprint, restart=False):
+        self.out_dir = out_dir
+        self.fingerprint = fingerprint
+        self.checkpoint_path = os.path.join(out_dir, CHECKPOINT_FILE)
+        self.manifest_path = os.path.join(out_dir, MANIFEST_FILE)
+        self.next_record = 1
+        self.done_above = set()
+        self.counts = {'ok': 0, 'failed': 0, 'cpu_not_found': 0}
+        self.total_price = 0.0
+        self.resumed_from = None
+
+        os.makedirs(out_dir, exist_ok=True)
+        manifest_bytes = 0
+        if not restart and os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, 'r') as f:
+                state = json.load(f)
+            if state.get('input') != fingerprint:
+                raise ValueError(f"{self.checkpoint_path} is for a different or changed input file; "
+                                 f"use --restart to start over")
+            self.next_record = state['next_record']
+            self.done_above = set(state['done_above'])
+            self.counts = state['counts']
+            self.total_price = state['total_price']
+            manifest_bytes = state['manifest_bytes']
+            self.resumed_from = self.next_record
+
+        # Drop manifest rows newer than the checkpoint (those records are redone)
+        self.manifest = open(self.manifest_path, 'a+', newline='', encoding='utf-8')
+        self.manifest.truncate(manifest_bytes)
+        self.manifest.seek(manifest_bytes)
+        self.writer = csv.DictWriter(self.manifest, fieldnames=MANIFEST_FIELDS)
+        if manifest_bytes == 0:
+            self.writer.writeheader()
+
+    def is_done(self, record):
+        return record < self.next_record or record in self.done_above
+
+    def finish(self, record, row):
+        """Record one machine's outcome in the manifest and the progress."""
+        self.writer.writerow(row)
+        if row['status'] == 'ok':
+            self.counts['ok'] += 1
+            self.total_price += float(row['price'] or 0)
+            if row['cpu_model'].endswith('(Not Found)'):
+                self.counts['cpu_not_found'] += 1
+        else:
+            self.counts['failed'] += 1
+        self.done_above.add(record)
+        while self.next_record in self.done_above:
+            self.done_above.remove(self.next_record)
+            self.next_record += 1
+
+    def save_checkpoint(self):
+        self.manifest.flush()
+        os.fsync(self.manifest.fileno())
+        state = {
+            'input': self.fingerprint,
+            'next_record': self.next_record,
+            'done_above': sorted(self.done_above),
+            'counts': self.counts,
+            'total_price': self.total_price,
+            'manifest_bytes': self.manifest.tell(),
+            'saved': datetime.datetime.now().isoformat(timespec='seconds'),
+        }
+        _write_atomic(self.checkpoint_path, json.dumps(state, indent=2).encode('utf-8'))
+
+    def close(self):
+        self.manifest.close()
+
+
+def _price_chunk(chunk):
+    """
+    Price a chunk of (record, data) pairs in one calculate_prices call.
+    Returns [(record, data, pdf_data, filename, price_data, error)], where
+    error is a message for records that couldn't be priced.
+    """
+    prepared, results = [], []
+    for record, data in chunk:
+        if isinstance(data, Exception):
+            results.append((record, {}, None, None, None, str(data)))
+            continue
+        try:
+            specs, manual_passmark = buildsheet_data.buildsheet_specs(data)
+        except (TypeError, ValueError, AttributeError) as e:
+            results.append((record, data, None, None, None, f"invalid field: {e}"))
+            continue
+        prepared.append((record, data, specs, manual_passmark))
+
+    # Unknown CPUs show up in the manifest (cpu_model "... (Not Found)"), so
+    # keep pricing's per-machine warnings out of the progress output
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            price_list = pricing.calculate_prices([p[2] for p in prepared], db_path='cpus.db',
+                                                  manual_passmarks=[p[3] for p in prepared])
+        except Exception:
+            # Find the bad record(s) by pricing one at a time
+            price_list = []
+            for _, _, specs, manual_passmark in prepared:
+                try:
+                    price_list.append(pricing.calculate_price(specs, db_path='cpus.db', manual_passmark=manual_passmark))
+                except Exception as e:
+                    price_list.append(e)
+
+    for (record, data, specs, _), price_data in zip(prepared, price_list):
+        if isinstance(price_data, Exception):
+            results.append((record, data, None, None, None, f"pricing failed: {price_data}"))
+            continue
+        try:
+            pdf_data, filename = buildsheet_data.buildsheet_pdf_data(data, specs, price_data)
+        except Exception as e:
+            # e.g. a "price" column that isn't a number
+            results.append((record, data, None, None, price_data, f"invalid field: {e}"))
+            continue
+        results.append((record, data, pdf_data, f"{record:06d}_{filename}", price_data, None))
+    results.sort(key=lambda r: r[0])
+    return results
+
+
+def _manifest_row(record, data, price_data=None, filename='', error=None):
+    return {
+        'record': record,
+        'status': 'failed' if error else 'ok',
+        'model': data.get('model', ''),
+        'serial': data.get('serial', ''),
+        'cpu_name': data.get('cpu_name', ''),
+        'cpu_model': price_data['breakdown']['cpu_model'] if price_data else '',
+        'price': price_data['final_price'] if price_data else '',
+        'file': filename,
+        'error': error or '',
+    }
+
+
+def run_intake(input_path, out_dir, workers=None, chunk_size=64, render=True,
+               restart=False, checkpoint_seconds=5.0, input_format=None, quiet=False):
+    """
+    Price (and render) every machine in input_path into out_dir, resuming a
+    previous run unless restart. Returns the summary dict (also written to
+    summary.json).
+    """
+    start = time.perf_counter()
+    run = IntakeRun(out_dir, _input_fingerprint(input_path), restart=restart)
+    if run.resumed_from and not quiet:
+        print(f"Resuming at record {run.resumed_from} "
+              f"({run.counts['ok']} done, {run.counts['failed']} failed so far)")
+
+    window = max(chunk_size, 2 * (workers or os.cpu_count() or 1))
+    in_flight = {}  # future -> (record, data, filename, price_data)
+    processed = 0
+    last_checkpoint = time.monotonic()
+
+    def complete(future):
+        nonlocal processed
+        record, data, filename, price_data = in_flight.pop(future)
+        try:
+            _write_atomic(os.path.join(out_dir, filename), future.result())
+            run.finish(record, _manifest_row(record, data, price_data, filename))
+        except Exception as e:
+            run.finish(record, _manifest_row(record, data, price_data, error=f"render failed: {e}"))
+        processed += 1
+
+    def maybe_checkpoint():
+        nonlocal last_checkpoint
+        if time.monotonic() - last_checkpoint >= checkpoint_seconds:
+            run.save_checkpoint()
+            last_checkpoint = time.monotonic()
+            if not quiet:
+                print(f"  {run.counts['ok'] + run.counts['failed']} records done "
+                      f"({run.counts['failed']} failed), up to record {run.next_record - 1}")
+
+    try:
+        pending = ((record, data) for record, data in read_records(input_path, input_format)
+                   if not run.is_done(record))
+        for chunk in _chunks(pending, chunk_size):
+            for record, data, pdf_data, filename, price_data, error in _price_chunk(chunk):
+                if error or not render:
+                    run.finish(record, _manifest_row(record, data, price_data, error=error))
+                    processed += 1
+                    continue
+                future = pdf_filler.submit_render(pdf_data, max_workers=workers)
+                in_flight[future] = (record, data, filename, price_data)
+                # Bound the work (and memory) in flight
+                while len(in_flight) >= window:
+                    done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                    for future in done:
+                        complete(future)
+            maybe_checkpoint()
+
+        while in_flight:
+            done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+            for future in done:
+                complete(future)
+        run.save_checkpoint()
+    except KeyboardInterrupt:
+        run.save_checkpoint()
+        run.close()
+        print(f"\nInterrupted; progress saved. Run the same command again to resume at record {run.next_record}.")
+        raise
+    run.close()
+
+    elapsed = time.perf_counter() - start
+    summary = {
+        'input': os.path.abspath(input_path),
+        'output': os.path.abspath(out_dir),
+        'records': run.counts['ok'] + run.counts['failed'],
+        'ok': run.counts['ok'],
+        'failed': run.counts['failed'],
+        'cpu_not_found': run.counts['cpu_not_found'],
+        'total_price': round(run.total_price, 2),
+        'rendered': render,
+        'processed_this_run': processed,
+        'resumed_from_record': run.resumed_from,
+        'elapsed_seconds': round(elapsed, 2),
+        'records_per_second': round(processed / elapsed, 1) if elapsed > 0 else None,
+        'finished': datetime.datetime.now().isoformat(timespec='seconds'),
+        'manifest': MANIFEST_FILE,
+    }
+    _write_atomic(os.path.join(out_dir, SUMMARY_FILE), json.dumps(summary, indent=2).encode('utf-8'))
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Price and generate build sheets for a JSONL/CSV inventory file.")
+    parser.add_argument("input", help="Inventory file (.jsonl or .csv)")
+    parser.add_argument("--out", help="Output directory (default generated/intake/<input name>)")
+    parser.add_argument("--format", choices=("jsonl", "csv"), help="Input format (default: from the file extension)")
+    parser.add_argument("--workers", type=int, default=None, help="PDF render processes (default: one per CPU)")
+    parser.add_argument("--chunk-size", type=int, default=64, help="Machines priced per batch (default 64)")
+    parser.add_argument("--no-pdf", action="store_true", help="Only price the machines and write the manifest")
+    parser.add_argument("--restart", action="store_true", help="Ignore any checkpoint and start over")
+    parser.add_argument("--checkpoint-seconds", type=float, default=5.0, help="Seconds between checkpoints (default 5)")
+    args = parser.parse_args()
+
+    out_dir = args.out or os.path.join('generated', 'intake', os.path.splitext(os.path.basename(args.input))[0])
+    try:
+        summary = run_intake(args.input, out_dir, workers=args.workers, chunk_size=args.chunk_size,
+                             render=not args.no_pdf, restart=args.restart,
+                             checkpoint_seconds=args.checkpoint_seconds, input_format=args.format)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(2)
+    except KeyboardInterrupt:
+        sys.exit(130)
+
+    print(f"\n{summary['records']} machines: {summary['ok']} ok, {summary['failed']} failed, "
+          f"total ${summary['total_price']:,.2f}")
+    if summary['cpu_not_found']:
+        print(f"{summary['cpu_not_found']} priced with default CPU specs (CPU not found; see cpu_model in the manifest)")
+    print(f"{summary['processed_this_run']} processed in {summary['elapsed_seconds']} s "
+          f"({summary['records_per_second']}/s); manifest: {os.path.join(out_dir, MANIFEST_FILE)}")
+    sys.exit(1 if summary['failed'] else 0)
@@ -0,0 +1,39 @@
+"""
+Gunicorn settings for the production server.
+
+Usage:
+  gunicorn -c gunicorn.conf.py "app:create_app()"
+
+Each worker process builds its own app through create_app(), which warms up
+the CPU catalog, pricing config and PDF template and renders a throwaway sheet
+(see warmup.py). Here that runs before the worker accepts connections, so no
+request waits behind it. Tune through environment variables (see
+docker-compose.yml).
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get('WEB_BIND', '0.0.0.0:5000')
+
+# Worker processes (0 = 2 x CPUs + 1) and request threads per worker. Each worker also
+# has its own render pool: BATCH_WORKERS processes, by default one per CPU, or the CPUs
+# shared out among the workers when WEB_WORKERS is set (see create_app in app.py)
+workers = int(os.environ.get('WEB_WORKERS', 0)) or multiprocessing.cpu_count() * 2 + 1
+threads = int(os.environ.get('WEB_THREADS', 4))
+worker_class = 'gthread'
+
+# Batch requests render many sheets, so allow them a while
+timeout = int(os.environ.get('WEB_TIMEOUT', 120))
+
+# Load the app in each worker after the fork, not once in the master: the
+# SQLite connections, caches and their locks are per process.
+preload_app = False
+
+# Warm up in the foreground: gunicorn loads the app before the worker starts
+# accepting, so a worker only takes traffic once it is warm (the workers are
+# forked from this process and inherit the setting)
+os.environ.setdefault('WARMUP_BACKGROUND', '0')
+
+accesslog = '-'
+errorlog = '-'
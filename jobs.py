@@ -0,0 +1,178 @@
+"""
+Background PDF Job Queue
+
+/api/generate_buildsheet can hand a build sheet to the render process pool
+and return a job id straight away. The client then polls /api/jobs/<id> and
+downloads the PDF from /api/jobs/<id>/download when it is done.
+
+Job state lives in files rather than in memory, so whichever server worker
+process gets the status or download request can answer it:
+  <id>.json   job record (download filename, submit time), written on submit
+  <id>.pdf    the rendered PDF, written when the job finishes
+  <id>.error  the error message, written if rendering failed
+Job files are deleted once they are older than the retention period.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+import uuid
+
+import metrics
+import pdf_filler
+
+JOB_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+def _write_atomic(path, data):
+    """Write bytes to path via a temp file, so readers never see a partial file."""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class PDFJobQueue:
+    """Queues build sheet renders on the process pool and tracks them on disk."""
+
+    def __init__(self, directory='generated/jobs', retention_seconds=3600, stale_seconds=600):
+        """
+        Args:
+            directory (str): Where job files are kept (shared by all server workers)
+            retention_seconds (int): Age after which job files are deleted
+            stale_seconds (int): Pending jobs older than this are reported as failed
+                (the process rendering them was restarted)
+        """
+        self.directory = directory
+        self.retention_seconds = retention_seconds
+        self.stale_seconds = stale_seconds
+        self._last_sweep = 0.0
+        self._sweep_lock = threading.Lock()
+
+    def _path(self, job_id, ext):
+        return os.path.join(self.directory, f"{job_id}.{ext}")
+
+    def submit(self, pdf_data, filename, template_path="FGAR_BuildSheet.pdf", max_workers=None, on_done=None,
+               compact=True):
+        """
+        Queue one build sheet for rendering.
+
+        Args:
+            pdf_data (dict): Field data, as passed to fill_template
+            filename (str): Download filename for the finished PDF
+            template_path (str): Template PDF used by the render pool
+            max_workers (int): Render pool size (defaults to the number of CPUs)
+            on_done (callable): Called with the PDF bytes once rendered (e.g. archiving)
+            compact (bool): Compressed output (see pdf_filler.BuildSheetPDFFiller)
+
+        Returns:
+            str: job id
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        self.sweep()
+
+        job_id = uuid.uuid4().hex
+        record = {'filename': filename, 'created': time.time()}
+        _write_atomic(self._path(job_id, 'json'), json.dumps(record).encode('utf-8'))
+        metrics.PDF_JOBS.inc(status='submitted')
+
+        future = pdf_filler.submit_render(pdf_data, template_path=template_path, max_workers=max_workers,
+                                          compact=compact)
+        future.add_done_callback(lambda f: self._finish(job_id, f, on_done))
+        return job_id
+
+    def add_finished(self, pdf_bytes, filename):
+        """
+        Record a job whose PDF is already available (e.g. from the output
+        cache), so the client polls and downloads it like any other job.
+        Returns: job id
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        self.sweep()
+
+        job_id = uuid.uuid4().hex
+        record = {'filename': filename, 'created': time.time()}
+        _write_atomic(self._path(job_id, 'json'), json.dumps(record).encode('utf-8'))
+        _write_atomic(self._path(job_id, 'pdf'), pdf_bytes)
+        metrics.PDF_JOBS.inc(status='submitted')
+        metrics.PDF_JOBS.inc(status='done')
+        return job_id
+
+    def _finish(self, job_id, future, on_done):
+        try:
+            pdf_bytes = future.result()
+        except Exception as e:
+            print(f"Warning: PDF job {job_id} failed: {e}")
+            try:
+                _write_atomic(self._path(job_id, 'error'), str(e).encode('utf-8'))
+            except OSError:
+                pass
+            metrics.PDF_JOBS.inc(status='failed')
+            return
+
+        try:
+            _write_atomic(self._path(job_id, 'pdf'), pdf_bytes)
+            metrics.BYTES_WRITTEN.inc(len(pdf_bytes), target='job')
+            metrics.PDF_JOBS.inc(status='done')
+        except OSError as e:
+            print(f"Warning: could not store PDF job {job_id}: {e}")
+            metrics.PDF_JOBS.inc(status='failed')
+            return
+
+        if on_done is not None:
+            on_done(pdf_bytes)
+
+    def status(self, job_id):
+        """
+        Returns {'job_id', 'status', 'filename'[, 'error']} where status is
+        'pending', 'done' or 'failed', or None for an unknown job id.
+        """
+        if not JOB_ID_PATTERN.match(job_id or ''):
+            return None
+        try:
+            with open(self._path(job_id, 'json'), 'r') as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        result = {'job_id': job_id, 'filename': record.get('filename')}
+        if os.path.exists(self._path(job_id, 'pdf')):
+            result['status'] = 'done'
+        elif os.path.exists(self._path(job_id, 'error')):
+            result['status'] = 'failed'
+            try:
+                with open(self._path(job_id, 'error'), 'r') as f:
+                    result['error'] = f.read()
+            except OSError:
+                result['error'] = 'Rendering failed'
+        elif time.time() - record.get('created', 0) > self.stale_seconds:
+            result['status'] = 'failed'
+            result['error'] = 'Job was lost (the server was restarted); please generate it again'
+        else:
+            result['status'] = 'pending'
+        return result
+
+    def pdf_path(self, job_id):
+        """Path of a finished job's PDF (check status() first)."""
+        return self._path(job_id, 'pdf')
+
+    def sweep(self, min_interval=60):
+        """Delete job files past the retention period (at most once per min_interval seconds)."""
+        now = time.time()
+        with self._sweep_lock:
+            if now - self._last_sweep < min_interval:
+                return
+            self._last_sweep = now
+
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError:
+            return
+        for entry in entries:
+            try:
+                if now - entry.stat().st_mtime > self.retention_seconds:
+                    os.remove(entry.path)
+            except OSError:
+                pass
@@ -0,0 +1,250 @@
+"""
+PDF Coordinate Layout Store
+
+The position of every field on the build sheet, plus the font settings, live
+in pdf_layout.json:
+    {
+      "version": 3,
+      "font_name": "Helvetica", "font_size": 10,
+      "font_size_price": 25, "font_size_model": 15,
+      "checkbox_yes": "✓",
+      "fields": {"serial": {"x": 105, "y": 639}, ...}
+    }
+PDF coordinates have their origin at the bottom-left of the 612 x 792 page:
+increase y to move a field up, x to move it right.
+
+The file is parsed once into a Layout, a read-only snapshot with a compact
+(x, y) lookup per field. A render takes one snapshot and uses it for the whole
+sheet. The calibration page saves through LayoutStore.save, which writes a new
+version of the file atomically and swaps the new snapshot in, so a render in
+progress never sees a half-written or half-applied layout. Other processes
+(server workers, render pool) reload the file when it changes on disk.
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+import metrics
+
+DEFAULT_LAYOUT_PATH = 'pdf_layout.json'
+
+# Fields every layout must place (the overlay draws all of them)
+REQUIRED_FIELDS = (
+    "battery_duration", "battery_health", "build_date", "built_by", "chrome", "cpu_cores",
+    "cpu_model", "cpu_speed", "cpu_threads", "description", "firefox", "libreoffice",
+    "microphone", "os_name", "os_version", "price", "ram", "ram_type", "screen_size",
+    "serial", "speakers", "storage_capacity", "storage_type_hdd", "storage_type_ssd",
+    "vlc", "webcam", "wifi",
+)
+
+PAGE_WIDTH = 612
+PAGE_HEIGHT = 792
+
+DEFAULT_SETTINGS = {
+    'font_name': 'Helvetica',
+    'font_size': 10,
+    'font_size_price': None,  # None: 2.5x font_size
+    'font_size_model': None,  # None: 1.5x font_size
+    'checkbox_yes': '✓',
+}
+
+
+class Layout:
+    """A parsed layout. Read-only: saving builds a new one."""
+
+    __slots__ = ('version', 'digest', 'fields', 'font_name', 'font_size',
+                 'font_size_price', 'font_size_model', 'checkbox_yes')
+
+    def __init__(self, fields, version=0, **settings):
+        settings = {**DEFAULT_SETTINGS, **settings}
+        self.version = version
+        self.fields = fields
+        self.font_name = settings['font_name']
+        self.font_size = settings['font_size']
+        self.font_size_price = settings['font_size_price'] or self.font_size * 2.5
+        self.font_size_model = settings['font_size_model'] or self.font_size * 1.5
+        self.checkbox_yes = settings['checkbox_yes']
+        # Identifies what the layout draws (not its version number), for output caching
+        canonical = json.dumps([self.settings(), sorted(fields.items())], separators=(',', ':'))
+        self.digest = hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:12]
+
+    def settings(self):
+        return {
+            'font_name': self.font_name,
+            'font_size': self.font_size,
+            'font_size_price': self.font_size_price,
+            'font_size_model': self.font_size_model,
+            'checkbox_yes': self.checkbox_yes,
+        }
+
+    def coordinates(self):
+        """Field positions as {name: {'x', 'y'}} (the calibration page's format)."""
+        return {name: {'x': x, 'y': y} for name, (x, y) in sorted(self.fields.items())}
+
+    def to_json(self):
+        """pdf_layout.json content: indented, one field per line."""
+        lines = [f'  {json.dumps(key)}: {json.dumps(value, ensure_ascii=False)},'
+                 for key, value in [('version', self.version)] + list(self.settings().items())]
+        fields = [f'    {json.dumps(name)}: {json.dumps(coords)}' for name, coords in self.coordinates().items()]
+        return '{\n' + '\n'.join(lines) + '\n  "fields": {\n' + ',\n'.join(fields) + '\n  }\n}\n'
+
+    def with_coordinates(self, coordinates):
+        """
+        A copy of this layout with some fields moved.
+        coordinates: {name: {'x', 'y'}}; fields not listed keep their position.
+        Raises ValueError for malformed or off-page positions.
+        """
+        fields = dict(self.fields)
+        fields.update(parse_coordinates(coordinates))
+        return Layout(fields, self.version, **self.settings())
+
+
+def _number(value, name, axis, limit):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name}: {axis} must be a number, got {value!r}")
+    if not 0 <= number <= limit:
+        raise ValueError(f"{name}: {axis}={number:g} is off the page (0-{limit})")
+    return int(number) if number.is_integer() else number
+
+
+def parse_coordinates(coordinates):
+    """{name: {'x', 'y'}} -> {name: (x, y)}, validated."""
+    if not isinstance(coordinates, dict):
+        raise ValueError("coordinates must be an object of {field: {x, y}}")
+    fields = {}
+    for name, coords in coordinates.items():
+        if not isinstance(coords, dict):
+            raise ValueError(f"{name}: expected {{x, y}}")
+        fields[str(name)] = (_number(coords.get('x'), name, 'x', PAGE_WIDTH),
+                             _number(coords.get('y'), name, 'y', PAGE_HEIGHT))
+    return fields
+
+
+def parse_layout(text):
+    """Parse pdf_layout.json content into a Layout. Raises ValueError if it is invalid."""
+    document = json.loads(text)
+    if not isinstance(document, dict):
+        raise ValueError("layout must be a JSON object")
+    fields = parse_coordinates(document.get('fields'))
+    missing = [name for name in REQUIRED_FIELDS if name not in fields]
+    if missing:
+        raise ValueError(f"layout is missing fields: {', '.join(missing)}")
+    settings = {key: document[key] for key in DEFAULT_SETTINGS if document.get(key) is not None}
+    return Layout(fields, int(document.get('version', 0)), **settings)
+
+
+def _legacy_layout(directory):
+    """
+    The layout from a pdf_coordinates.py (the old Python settings module) in
+    directory, or None. Used once, to create pdf_layout.json.
+    """
+    path = os.path.join(directory, 'pdf_coordinates.py')
+    if not os.path.exists(path):
+        return None
+    namespace = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        exec(compile(f.read(), path, 'exec'), namespace)
+    settings = {key: namespace[key.upper()] for key in DEFAULT_SETTINGS if key.upper() in namespace}
+    return Layout(parse_coordinates(namespace['FIELD_COORDINATES']), 1, **settings)
+
+
+def _write_atomic(path, text):
+    """Write text to path via a temp file, so readers see the old or the new file, never part of one."""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _signature(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    # Every save replaces the file, so the inode changes even within one mtime tick
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class LayoutStore:
+    """The current Layout for one pdf_layout.json, reloaded when the file changes."""
+
+    def __init__(self, path=DEFAULT_LAYOUT_PATH):
+        self.path = path
+        # (file signature, Layout), replaced as one object so readers never mix the two
+        self._current = (None, None)
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Returns the current Layout (a stat() per call; parsed only after a change)."""
+        signature, layout = self._current
+        if layout is not None and _signature(self.path) == signature:
+            metrics.cache_lookup('pdf_layout', True)
+            return layout
+        metrics.cache_lookup('pdf_layout', False)
+        with self._lock:
+            return self._load()
+
+    def _load(self):
+        """Current Layout, re-reading the file if it changed (call with self._lock held)."""
+        signature = _signature(self.path)
+        loaded_signature, current = self._current
+        if current is not None and signature == loaded_signature:
+            return current
+        if signature is None:
+            legacy = _legacy_layout(os.path.dirname(os.path.abspath(self.path)))
+            if legacy is None:
+                raise FileNotFoundError(f"Layout file not found: {self.path}")
+            _write_atomic(self.path, legacy.to_json())
+            print(f"Migrated pdf_coordinates.py to {self.path}")
+            signature = _signature(self.path)
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                layout = parse_layout(f.read())
+        except (OSError, ValueError) as e:
+            if current is None:
+                raise
+            # Keep rendering with the last good layout
+            print(f"Warning: could not load {self.path} ({e}); keeping layout version {current.version}")
+            self._current = (signature, current)
+            return current
+        self._current = (signature, layout)
+        return layout
+
+    def save(self, coordinates):
+        """
+        Move fields and write the result as the next layout version.
+        coordinates: {name: {'x', 'y'}}; fields not listed keep their position.
+        Returns the new Layout. Raises ValueError for invalid coordinates.
+        """
+        with self._lock:
+            current = self._load()
+            updated = current.with_coordinates(coordinates)
+            layout = Layout(updated.fields, current.version + 1, **updated.settings())
+            _write_atomic(self.path, layout.to_json())
+            self._current = (_signature(self.path), layout)
+            return layout
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_layout_store(path=DEFAULT_LAYOUT_PATH):
+    """Returns the process-wide LayoutStore for path."""
+    key = os.path.abspath(path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = LayoutStore(path)
+        return store
+
+
+def get_layout(path=DEFAULT_LAYOUT_PATH):
+    """Returns the current Layout from path."""
+    return get_layout_store(path).get()
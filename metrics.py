@@ -0,0 +1,176 @@
+"""
+In-process metrics for the hot paths.
+
+Stage timings (histograms) and counters for cache hits, DB queries and bytes
+written, rendered in the Prometheus text exposition format for /metrics.
+
+Numbers are kept per process: under gunicorn each worker reports only the
+work it did, and render pool processes (pdf_filler.render_many) are not
+included.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; covers sub-millisecond searches up to slow batch requests
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_registry = []
+
+
+def _format_labels(label_names, label_values, extra=None):
+    pairs = list(zip(label_names, label_values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if isinstance(value, float) and value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram (seconds) with optional labels."""
+
+    def __init__(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._values = {}  # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.label_names)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, (list(entry[0]), entry[1], entry[2])) for key, entry in self._values.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.label_names, key, ('le', _format_value(float(bound))))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+# --- Application metrics -----------------------------------------------------
+
+STAGE_SECONDS = Histogram(
+    'buildsheet_stage_seconds',
+    'Time spent in each hot-path stage (pricing, CPU search, PDF generation).',
+    ('stage',))
+
+REQUEST_SECONDS = Histogram(
+    'buildsheet_http_request_seconds',
+    'HTTP request latency by endpoint.',
+    ('endpoint', 'method', 'status'))
+
+CACHE_HITS = Counter(
+    'buildsheet_cache_hits_total',
+    'Lookups served from an in-process cache.',
+    ('cache',))
+
+CACHE_MISSES = Counter(
+    'buildsheet_cache_misses_total',
+    'Lookups that had to (re)load their data.',
+    ('cache',))
+
+CACHE_EVICTIONS = Counter(
+    'buildsheet_cache_evictions_total',
+    'Generated PDFs deleted by the size/age caps, by directory.',
+    ('directory',))
+
+DB_QUERIES = Counter(
+    'buildsheet_db_queries_total',
+    'SQLite queries run against cpus.db.',
+    ('query',))
+
+PDF_JOBS = Counter(
+    'buildsheet_pdf_jobs_total',
+    'Background PDF jobs by outcome (submitted, done, failed).',
+    ('status',))
+
+STARTUP_SECONDS = Histogram(
+    'buildsheet_startup_phase_seconds',
+    'Time spent in each startup warm-up phase (see warmup.py).',
+    ('phase',))
+
+BYTES_WRITTEN = Counter(
+    'buildsheet_bytes_written_total',
+    'Bytes of generated PDF written.',
+    ('target',))
+
+
+def stage(name):
+    """Context manager timing one stage into buildsheet_stage_seconds."""
+    return STAGE_SECONDS.time(stage=name)
+
+
+def cache_lookup(cache, hit):
+    """Count one cache hit or miss."""
+    (CACHE_HITS if hit else CACHE_MISSES).inc(cache=cache)
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,137 @@
+"""
+Generated PDF Storage
+
+BoundedDirectory keeps a directory of generated PDFs within a size and age
+cap, evicting the least recently used files first. File mtimes record last
+use, so every server worker process shares the same LRU order.
+
+OutputCache is a content-addressed store on top of it: each rendered sheet
+is filed under a hash of its normalized pdf_data plus the template and
+coordinate layout versions, so an identical request is served from disk
+instead of being rendered again.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+import metrics
+
+
+def prune_directory(directory, max_bytes=0, max_age_seconds=0, suffix='.pdf'):
+    """
+    Delete files ending in suffix (top level only) from directory: first those
+    not used for max_age_seconds, then the least recently used until the rest
+    fit in max_bytes. A limit of 0 means no limit.
+    Returns: (files removed, bytes removed)
+    """
+    try:
+        entries = [e for e in os.scandir(directory) if e.name.endswith(suffix) and e.is_file()]
+    except OSError:
+        return 0, 0
+
+    now = time.time()
+    files = []
+    for entry in entries:
+        try:
+            st = entry.stat()
+        except OSError:
+            continue
+        files.append((st.st_mtime, st.st_size, entry.path))
+    files.sort()  # least recently used first
+
+    total = sum(size for _, size, _ in files)
+    removed = removed_bytes = 0
+    for mtime, size, path in files:
+        expired = max_age_seconds and now - mtime > max_age_seconds
+        over = max_bytes and total > max_bytes
+        if not expired and not over:
+            # Oldest remaining file is fresh and the rest fit
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+        removed_bytes += size
+    return removed, removed_bytes
+
+
+class BoundedDirectory:
+    """A directory of PDFs capped by total size and age (see prune_directory)."""
+
+    def __init__(self, directory, max_bytes=0, max_age_seconds=0, prune_interval=60):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.prune_interval = prune_interval
+        self._last_prune = 0.0
+        self._prune_lock = threading.Lock()
+
+    def prune(self):
+        """Enforce the caps now. Returns (files removed, bytes removed)."""
+        removed, removed_bytes = prune_directory(self.directory, self.max_bytes, self.max_age_seconds)
+        if removed:
+            metrics.CACHE_EVICTIONS.inc(removed, directory=os.path.basename(os.path.normpath(self.directory)))
+        return removed, removed_bytes
+
+    def maybe_prune(self):
+        """Enforce the caps if they haven't been checked in the last prune_interval seconds."""
+        if not (self.max_bytes or self.max_age_seconds):
+            return
+        now = time.time()
+        with self._prune_lock:
+            if now - self._last_prune < self.prune_interval:
+                return
+            self._last_prune = now
+        self.prune()
+
+
+class OutputCache(BoundedDirectory):
+    """Content-addressed store of rendered build sheets."""
+
+    @staticmethod
+    def make_key(pdf_data, version):
+        """
+        Cache key for a sheet: a hash of pdf_data in canonical JSON form
+        (sorted keys, no whitespace) and the output version (template and
+        coordinate layout, see BuildSheetPDFFiller.get_output_version).
+        """
+        canonical = json.dumps({'version': version, 'data': pdf_data},
+                               sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pdf")
+
+    def get(self, key):
+        """Returns the stored PDF bytes for key, or None."""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                pdf_bytes = f.read()
+            # Mark as recently used for LRU eviction
+            os.utime(path)
+        except OSError:
+            metrics.cache_lookup('pdf_output', False)
+            return None
+        metrics.cache_lookup('pdf_output', True)
+        return pdf_bytes
+
+    def put(self, key, pdf_bytes):
+        """Store PDF bytes under key (atomically), then enforce the caps if due."""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._path(key)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(pdf_bytes)
+            os.replace(tmp_path, path)
+            metrics.BYTES_WRITTEN.inc(len(pdf_bytes), target='cache')
+        except OSError as e:
+            print(f"Warning: could not cache generated PDF: {e}")
+            return
+        self.maybe_prune()
@@ -5,42 +5,272 @@ Uses PyPDF2 and reportlab to overlay text onto the existing PDF template.
 This version is specifically tailored to the FGAR Build Sheet template with correct coordinates.
 """
 
-from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2 import PdfReader, PdfWriter, PageObject
+from PyPDF2.generic import (
+    ArrayObject, DecodedStreamObject, DictionaryObject, EncodedStreamObject, NameObject, NumberObject,
+)
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import io
 import os
+import math
 import datetime
+import hashlib
+import threading
+import multiprocessing
+import zlib
+
+import layout_store
+import metrics
+
+
+# Bump when a code change alters the rendered output, so cached sheets
+# (output_cache.OutputCache) from the old code are not reused
+OUTPUT_FORMAT_VERSION = 1
+
+# Fields drawn identically on every sheet (software is always installed).
+# They are rendered once into the cached base page rather than per sheet.
+STATIC_CHECKMARK_FIELDS = ("vlc", "chrome", "firefox", "libreoffice")
+
+# Resource categories an overlay can contribute to a page
+OVERLAY_RESOURCE_KEYS = ("/ExtGState", "/Font", "/XObject", "/ColorSpace", "/Pattern", "/Shading", "/Properties")
+
+
+def _set_flate_data(stream, data):
+    """Store data in stream Flate-compressed at the highest level, replacing its other filters."""
+    stream[NameObject("/Filter")] = NameObject("/FlateDecode")
+    stream.pop(NameObject("/DecodeParms"), None)
+    # PyPDF2 can't re-encode an existing stream; its /Length is set from _data on write
+    stream._data = zlib.compress(data, 9)
 
 
 class BuildSheetPDFFiller:
     """Fills in the FGAR Build Sheet PDF template with computer specifications and pricing."""
     
-    def __init__(self, template_path="FGAR_BuildSheet.pdf"):
+    def __init__(self, template_path="FGAR_BuildSheet.pdf", layout_path=layout_store.DEFAULT_LAYOUT_PATH,
+                 compact=True):
         self.template_path = template_path
+        # Field coordinates and fonts (see layout_store)
+        self.layout_path = layout_path
+        # Compress the content streams written per sheet (see _flatten_contents, _compact_overlay)
+        self.compact = compact
         # PDF is standard letter size: 612 x 792 points
         # Origin (0,0) is at bottom-left
         self.page_width = 612
         self.page_height = 792
         
-    def create_overlay(self, data):
-        """
-        Create a PDF overlay with the data to be filled in.
-        Uses coordinates from pdf_coordinates.py configuration file.
+        # Parsed template, shared by every fill_template call (see _get_template_page)
+        self.template_version = None
+        self._template_signature = None
+        self._template_page = None
+        self._template_lock = threading.Lock()
+        
+        # Template with the static layer merged in (see _get_base_page)
+        self._base_key = None
+        self._base_page = None
+        self._base_holder = None
+        
+        # Template alone, flattened the same way (see _get_bare_page)
+        self._bare_key = None
+        self._bare_page = None
+        self._bare_holder = None
+        
+    def _get_template_page(self):
         """
-        from pdf_coordinates import FIELD_COORDINATES, FONT_NAME, FONT_SIZE, CHECKBOX_YES
+        Returns the cached, pre-parsed template page 0.
         
-        # Optional: larger font size for price (default to 3x normal if not defined)
+        The template is parsed once and every object reachable from the page is
+        resolved up front, so later reads never touch the parser. Callers must work
+        on a copy (as _get_base_page does) and never modify this page. The cache
+        is reloaded if the template file changes.
+        """
         try:
-            from pdf_coordinates import FONT_SIZE_PRICE
-        except ImportError:
-            FONT_SIZE_PRICE = FONT_SIZE * 2.5
+            st = os.stat(self.template_path)
+        except OSError:
+            raise FileNotFoundError(f"Template PDF not found: {self.template_path}")
+        signature = (st.st_mtime_ns, st.st_size)
+        
+        with self._template_lock:
+            metrics.cache_lookup('pdf_template', self._template_signature == signature)
+            if self._template_signature != signature:
+                with open(self.template_path, 'rb') as f:
+                    raw = f.read()
+                page = PdfReader(io.BytesIO(raw)).pages[0]
+                # Cloning walks (and caches) every object the page references
+                PdfWriter().add_page(page)
+                self._template_page = page
+                self._template_signature = signature
+                self.template_version = hashlib.sha256(raw).hexdigest()[:12]
+            return self._template_page
+    
+    def get_layout(self):
+        """The current coordinate layout (layout_store.Layout), reloaded after calibration saves."""
+        return layout_store.get_layout(self.layout_path)
+    
+    def get_output_version(self):
+        """
+        Identifies everything besides the field data that shapes a filled sheet:
+        the renderer, the template file and the coordinate layout (which
+        calibration can change at runtime).
+        """
+        self._get_template_page()
+        mode = "z" if self.compact else ""
+        return f"{OUTPUT_FORMAT_VERSION}{mode}-{self.template_version}-{self.get_layout().digest}"
+    
+    @staticmethod
+    def _static_layer_key(layout):
+        """Everything the static layer depends on; the base page is rebuilt when it changes."""
+        positions = tuple(layout.fields[f] for f in STATIC_CHECKMARK_FIELDS)
+        return (layout.font_name, layout.font_size, layout.checkbox_yes, positions)
+    
+    @staticmethod
+    def _draw_static_fields(can, layout):
+        """Draw the fields that are the same on every sheet."""
+        # Software checkboxes - use checkmarks
+        for field in STATIC_CHECKMARK_FIELDS:
+            can.drawString(*layout.fields[field], layout.checkbox_yes)
+    
+    def create_static_overlay(self, layout=None):
+        """Create a PDF overlay holding only the fields shared by every sheet."""
+        layout = layout or self.get_layout()
         
-        try:
-            from pdf_coordinates import FONT_SIZE_MODEL
-        except ImportError:
-            FONT_SIZE_MODEL = FONT_SIZE * 1.5
+        packet = io.BytesIO()
+        can = canvas.Canvas(packet, pagesize=letter)
+        can.setFont(layout.font_name, layout.font_size)
+        self._draw_static_fields(can, layout)
+        can.save()
+        packet.seek(0)
+        return packet
+    
+    def _get_base_page(self, layout=None):
+        """
+        Returns the cached template page with the static layer already merged in.
+        
+        Its content is flattened into a single stream that saves and restores the
+        graphics state, so a per-sheet overlay can simply be appended after it
+        (see _merge_overlay). Rebuilt when the template or the static layout changes.
+        """
+        layout = layout or self.get_layout()
+        template_page = self._get_template_page()
+        key = (self._template_signature, self._static_layer_key(layout), self.compact)
+        
+        with self._template_lock:
+            metrics.cache_lookup('pdf_base_page', self._base_key == key)
+            if self._base_key != key:
+                page = PageObject(template_page.pdf)
+                page.update(template_page)
+                page.merge_page(PdfReader(self.create_static_overlay(layout)).pages[0])
+                self._base_holder = self._flatten_contents(page, self.compact)
+                self._base_page = page
+                self._base_key = key
+            return self._base_page
+    
+    def _get_bare_page(self):
+        """
+        Returns the cached template page with its content flattened like the
+        base page's but without the static layer, for sheets drawn with a
+        layout other than the saved one (see fill_template).
+        """
+        template_page = self._get_template_page()
+        
+        key = (self._template_signature, self.compact)
+        
+        with self._template_lock:
+            if self._bare_key != key:
+                page = PageObject(template_page.pdf)
+                page.update(template_page)
+                self._bare_holder = self._flatten_contents(page, self.compact)
+                self._bare_page = page
+                self._bare_key = key
+            return self._bare_page
+    
+    @staticmethod
+    def _flatten_contents(page, compress=False):
+        """
+        Replace page's content with one stream wrapped in a graphics state
+        save/restore, serialized once so later sheets never re-parse it.
+        With compress=True the stream is Flate-compressed (PyPDF2 writes the
+        merged template content uncompressed, a third of every sheet).
+        Returns the writer holding the stream, which must be kept alive with the page.
+        """
+        data = b"q\n" + page.get_contents().get_data() + b"\nQ\n"
+        if compress:
+            content = EncodedStreamObject()
+            _set_flate_data(content, data)
+        else:
+            content = DecodedStreamObject()
+            content.set_data(data)
+        # Streams inside a /Contents array must be indirect objects
+        holder = PdfWriter()
+        page[NameObject("/Contents")] = holder._add_object(content)
+        return holder
+    
+    def preload(self):
+        """Parse the template and layout and build the base page now instead of on the first fill."""
+        self._get_base_page()
+    
+    def _clone_base_page(self, layout=None, bare=False):
+        """Returns a fresh page dict over the cached base page's (or with bare=True, the bare page's) objects."""
+        base_page = self._get_bare_page() if bare else self._get_base_page(layout)
+        page = PageObject(base_page.pdf)
+        page.update(base_page)
+        return page
+    
+    @staticmethod
+    def _compact_overlay(overlay_page):
+        """
+        Re-encode an overlay's content stream with Flate alone, in place.
+        reportlab adds an ASCII85 layer on top, which makes it a quarter bigger.
+        """
+        content = overlay_page["/Contents"].get_object()
+        _set_flate_data(content, content.get_data())
+    
+    @staticmethod
+    def _merge_overlay(page, overlay_page):
+        """
+        Merge an overlay page onto a base page copy without parsing either content stream.
+        
+        The overlay's content is appended to the page's /Contents array and its
+        resources are added next to the page's own. This needs every overlay
+        resource name to be either new to the page or bound to an identical
+        object (e.g. the same standard font). Otherwise it returns False and
+        leaves the page untouched, and the caller falls back to merge_page.
+        """
+        base_resources = page["/Resources"]
+        overlay_resources = overlay_page.get("/Resources", DictionaryObject())
+        merged = DictionaryObject(base_resources)
+        
+        for key in OVERLAY_RESOURCE_KEYS:
+            if key not in overlay_resources:
+                continue
+            category = DictionaryObject(base_resources.get(key, DictionaryObject()))
+            for name, value in overlay_resources[key].items():
+                if name in category:
+                    if category[name].get_object() != value.get_object():
+                        return False
+                    continue
+                category[name] = overlay_resources[key].raw_get(name)
+            merged[NameObject(key)] = category
+        
+        page[NameObject("/Resources")] = merged
+        page[NameObject("/Contents")] = ArrayObject([page["/Contents"], overlay_page.raw_get("/Contents")])
+        return True
+    
+    def create_overlay(self, data, include_static=True, layout=None):
+        """
+        Create a PDF overlay with the data to be filled in.
+        Uses the coordinates and fonts of layout (default: the current layout,
+        see layout_store).
+        
+        With include_static=False the fields shared by every sheet are left
+        out; fill_template gets those from the cached base page instead.
+        """
+        layout = layout or self.get_layout()
+        pos = layout.fields
+        FONT_NAME, FONT_SIZE, CHECKBOX_YES = layout.font_name, layout.font_size, layout.checkbox_yes
+        FONT_SIZE_PRICE, FONT_SIZE_MODEL = layout.font_size_price, layout.font_size_model
         
         packet = io.BytesIO()
         can = canvas.Canvas(packet, pagesize=letter)
@@ -51,102 +281,87 @@ class BuildSheetPDFFiller:
         # === TOP SECTION ===
         if data.get('model'):
             can.setFont(FONT_NAME, FONT_SIZE_MODEL)
-            coords = FIELD_COORDINATES["description"]
-            can.drawString(coords["x"], coords["y"], data['model'])
+            can.drawString(*pos["description"], data['model'])
             can.setFont(FONT_NAME, FONT_SIZE)
         
         if data.get('serial'):
-            coords = FIELD_COORDINATES["serial"]
-            can.drawString(coords["x"], coords["y"], data['serial'])
+            can.drawString(*pos["serial"], data['serial'])
         
         # === HARDWARE SECTION ===
         if data.get('price'):
-            coords = FIELD_COORDINATES["price"]
+            x, y = pos["price"]
             # Use larger font for price
             can.setFont(FONT_NAME, FONT_SIZE_PRICE)
-            can.drawString(coords["x"], coords["y"], f"${data['price']:.0f}")
+            can.drawString(x, y, f"${data['price']:.0f}")
             can.setFont(FONT_NAME, FONT_SIZE)  # Reset to normal font
         
         # === CPU SECTION ===
         if data.get('cpu_name'):
-            coords = FIELD_COORDINATES["cpu_model"]
-            can.drawString(coords["x"], coords["y"], data['cpu_name'][:45])
+            can.drawString(*pos["cpu_model"], data['cpu_name'][:45])
         
         if data.get('cpu_cores'):
-            coords = FIELD_COORDINATES["cpu_cores"]
-            can.drawString(coords["x"], coords["y"], str(data['cpu_cores']))
+            can.drawString(*pos["cpu_cores"], str(data['cpu_cores']))
         
         if data.get('cpu_threads'):
-            coords = FIELD_COORDINATES["cpu_threads"]
-            can.drawString(coords["x"], coords["y"], str(data['cpu_threads']))
+            can.drawString(*pos["cpu_threads"], str(data['cpu_threads']))
         
         if data.get('cpu_speed'):
-            coords = FIELD_COORDINATES["cpu_speed"]
-            can.drawString(coords["x"], coords["y"], str(data['cpu_speed']))
+            can.drawString(*pos["cpu_speed"], str(data['cpu_speed']))
         
         # === MEMORY & STORAGE ===
         # RAM - just the number
         if data.get('ram_gb'):
-            coords = FIELD_COORDINATES["ram"]
-            can.drawString(coords["x"], coords["y"], str(data['ram_gb']))
+            can.drawString(*pos["ram"], str(data['ram_gb']))
         
         # RAM Type - DDR3/DDR4/DDR5 (separate field)
         if data.get('ram_type'):
-            coords = FIELD_COORDINATES["ram_type"]
-            can.drawString(coords["x"], coords["y"], data['ram_type'])
+            can.drawString(*pos["ram_type"], data['ram_type'])
         
         drives = data.get('drives', [])
         if drives:
             drive = drives[0]
-            coords = FIELD_COORDINATES["storage_capacity"]
-            can.drawString(coords["x"], coords["y"], f"{drive['capacity_gb']}")
+            can.drawString(*pos["storage_capacity"], f"{drive['capacity_gb']}")
             
             # HDD/SSD indicator - draw circle around the text (text already on template)
             drive_type = drive.get('type', 'SSD').upper()
             if 'HDD' in drive_type:
-                coords = FIELD_COORDINATES["storage_type_hdd"]
+                x, y = pos["storage_type_hdd"]
                 # Draw a circle at the position (radius 12 points)
-                can.circle(coords["x"] + 15, coords["y"] + 5, 12, stroke=1, fill=0)
+                can.circle(x + 15, y + 5, 12, stroke=1, fill=0)
             elif 'SSD' in drive_type or 'NVME' in drive_type:
-                coords = FIELD_COORDINATES["storage_type_ssd"]
+                x, y = pos["storage_type_ssd"]
                 # Draw a circle at the position (radius 12 points)
-                can.circle(coords["x"] + 15, coords["y"] + 5, 12, stroke=1, fill=0)
+                can.circle(x + 15, y + 5, 12, stroke=1, fill=0)
         
         # === LAPTOP-SPECIFIC FIELDS ===
         is_laptop = data.get('is_laptop', False)
         
         # Battery Health - without % symbol
         if is_laptop and data.get('battery_health'):
-            coords = FIELD_COORDINATES["battery_health"]
+            x, y = pos["battery_health"]
             health_str = str(data['battery_health']).replace('%', '').strip()
-            can.drawString(coords["x"], coords["y"], health_str)
+            can.drawString(x, y, health_str)
         
         if is_laptop and data.get('screen_size'):
-            coords = FIELD_COORDINATES["screen_size"]
-            can.drawString(coords["x"], coords["y"], str(data['screen_size']))
+            can.drawString(*pos["screen_size"], str(data['screen_size']))
         
         if is_laptop and data.get('battery_duration'):
-            coords = FIELD_COORDINATES["battery_duration"]
-            can.drawString(coords["x"], coords["y"], str(data['battery_duration']))
+            can.drawString(*pos["battery_duration"], str(data['battery_duration']))
         
         # === FEATURES ===
         features = data.get('features', {})
         
         if features.get('wifi'):
-            coords = FIELD_COORDINATES["wifi"]
-            can.drawString(coords["x"], coords["y"], CHECKBOX_YES)
+            can.drawString(*pos["wifi"], CHECKBOX_YES)
         
         if features.get('webcam'):
-            coords = FIELD_COORDINATES["webcam"]
-            can.drawString(coords["x"], coords["y"], CHECKBOX_YES)
+            can.drawString(*pos["webcam"], CHECKBOX_YES)
         
         if features.get('sound'):
-            coords = FIELD_COORDINATES["speakers"]
-            can.drawString(coords["x"], coords["y"], CHECKBOX_YES)
+            can.drawString(*pos["speakers"], CHECKBOX_YES)
         
         if features.get('microphone'):
-            coords = FIELD_COORDINATES["microphone"]
-            can.drawString(coords["x"], coords["y"], CHECKBOX_YES)
+            can.drawString(*pos["microphone"], CHECKBOX_YES)
         
         # === SOFTWARE SECTION ===
         if data.get('os_name'):
@@ -155,37 +370,23 @@ class BuildSheetPDFFiller:
                 os_base = ' '.join(os_parts[:2])
                 os_version = ' '.join(os_parts[2:]) if len(os_parts) > 2 else ""
                 
-                coords = FIELD_COORDINATES["os_name"]
-                can.drawString(coords["x"], coords["y"], os_base)
+                can.drawString(*pos["os_name"], os_base)
                 
                 if os_version:
-                    coords = FIELD_COORDINATES["os_version"]
-                    can.drawString(coords["x"], coords["y"], os_version)
+                    can.drawString(*pos["os_version"], os_version)
             else:
-                coords = FIELD_COORDINATES["os_name"]
-                can.drawString(coords["x"], coords["y"], data['os_name'])
-        
-        # Software checkboxes - use checkmarks
-        coords = FIELD_COORDINATES["vlc"]
-        can.drawString(coords["x"], coords["y"], CHECKBOX_YES)
-        
-        coords = FIELD_COORDINATES["chrome"]
-        can.drawString(coords["x"], coords["y"], CHECKBOX_YES)
+                can.drawString(*pos["os_name"], data['os_name'])
         
-        coords = FIELD_COORDINATES["firefox"]
-        can.drawString(coords["x"], coords["y"], CHECKBOX_YES)
-        
-        coords = FIELD_COORDINATES["libreoffice"]
-        can.drawString(coords["x"], coords["y"], CHECKBOX_YES)
+        # Software checkboxes (same on every sheet)
+        if include_static:
+            self._draw_static_fields(can, layout)
         
         # === BUILD INFO ===
         if data.get('builder_name'):
-            coords = FIELD_COORDINATES["built_by"]
-            can.drawString(coords["x"], coords["y"], data['builder_name'])
+            can.drawString(*pos["built_by"], data['builder_name'])
         
         build_date = data.get('date', datetime.datetime.now().strftime('%Y-%m-%d'))
-        coords = FIELD_COORDINATES["build_date"]
-        can.drawString(coords["x"], coords["y"], build_date)
+        can.drawString(*pos["build_date"], build_date)
         
         # Approved By - Y ~265
         # Leave blank - filled manually
@@ -197,45 +398,395 @@ class BuildSheetPDFFiller:
         packet.seek(0)
         return packet
     
-    def fill_template(self, data, output_path="filled_buildsheet.pdf"):
+    def fill_template(self, data, output_path="filled_buildsheet.pdf", layout=None):
         """
         Fill the template PDF with data and save to output_path.
         
         Args:
             data (dict): Computer specs and pricing data
-            output_path (str): Path to save the filled PDF
+            output_path (str or file): Path to save the filled PDF, or a binary
+                file-like object (e.g. io.BytesIO) to write it to in memory
+            layout (layout_store.Layout): Draw with this layout instead of the
+                saved one (e.g. a calibration preview of unsaved coordinates)
         
         Returns:
-            str: Path to the generated PDF
+            str or file: output_path
         """
-        # Check if template exists
-        if not os.path.exists(self.template_path):
-            raise FileNotFoundError(f"Template PDF not found: {self.template_path}")
-        
-        # Create overlay
-        overlay_pdf = self.create_overlay(data)
-        
-        # Read template
-        template = PdfReader(self.template_path)
-        overlay = PdfReader(overlay_pdf)
+        # A preview layout is drawn, static fields included, onto the bare
+        # template, so it never replaces the base page cached for the saved layout
+        preview = layout is not None
+        
+        # One layout snapshot for the whole sheet, even if calibration saves meanwhile
+        if layout is None:
+            layout = self.get_layout()
+        
+        # Copy of the cached template + static layer (raises FileNotFoundError if missing)
+        with metrics.stage('pdf_template'):
+            page = self._clone_base_page(layout, bare=preview)
+        
+        # Create overlay with just this machine's fields
+        with metrics.stage('pdf_overlay_draw'):
+            overlay_pdf = self.create_overlay(data, include_static=preview, layout=layout)
+        with metrics.stage('pdf_overlay_parse'):
+            overlay = PdfReader(overlay_pdf)
+            if self.compact:
+                self._compact_overlay(overlay.pages[0])
         
         # Create output
         output = PdfWriter()
         
-        # Merge overlay onto template
-        template_page = template.pages[0]
-        overlay_page = overlay.pages[0]
-        
-        # Merge the overlay onto the template
-        template_page.merge_page(overlay_page)
-        output.add_page(template_page)
-        
-        # Write to file
-        with open(output_path, 'wb') as output_file:
-            output.write(output_file)
+        # Merge the overlay onto the base page copy
+        with metrics.stage('pdf_merge'):
+            if not self._merge_overlay(page, overlay.pages[0]):
+                page.merge_page(overlay.pages[0])
+            output.add_page(page)
+        
+        # Write to buffer or file
+        with metrics.stage('pdf_write'):
+            if hasattr(output_path, 'write'):
+                start = output_path.tell()
+                output.write(output_path)
+                metrics.BYTES_WRITTEN.inc(output_path.tell() - start, target='stream')
+            else:
+                with open(output_path, 'wb') as output_file:
+                    output.write(output_file)
+                    metrics.BYTES_WRITTEN.inc(output_file.tell(), target='file')
         
         return output_path
 
+    def print_job(self, output, layout=None):
+        """Start a combined print job writing to output (see PrintJob)."""
+        return PrintJob(self, output, layout)
+
+    def fill_many(self, data_list, output_path="buildsheets.pdf"):
+        """
+        Fill one sheet per entry of data_list into a single PDF whose pages
+        share the template's objects (see PrintJob).
+
+        Args:
+            data_list (list): pdf data dicts, as passed to fill_template
+            output_path (str or file): Path or binary file-like object to write to
+
+        Returns:
+            str or file: output_path
+        """
+        if hasattr(output_path, 'write'):
+            job = PrintJob(self, output_path)
+            for data in data_list:
+                job.add_sheet(data)
+            job.close()
+        else:
+            with open(output_path, 'wb') as output_file:
+                self.fill_many(data_list, output_file)
+        return output_path
+
+
+# --- Combined print jobs ------------------------------------------------------
+#
+# A pallet's sheets printed back to back as one PDF. Every page is a copy of
+# the cached base page plus that machine's overlay, so the template's content,
+# fonts and images are written once and referenced by every page; each further
+# sheet only adds its own overlay objects. Objects are written out as soon as
+# their page is added, so the file can be sent while later sheets render.
+
+class PrintJob:
+    """
+    Many filled build sheets written as one PDF, page by page:
+
+        job = filler.print_job(output)
+        for data in machines:
+            job.add_sheet(data)
+        job.close()
+
+    output only needs a write() method. Nothing is written until the first
+    sheet is added, and the file is incomplete until close().
+    Writing page by page uses PdfWriter's private internals, so PyPDF2 is
+    pinned (see requirements.txt and test_print_job.py).
+    """
+
+    def __init__(self, filler, output, layout=None):
+        self.filler = filler
+        self.output = output
+        # One layout snapshot for every page, even if calibration saves meanwhile
+        self.layout = layout or filler.get_layout()
+        self.pages = 0
+        self.bytes_written = 0
+        self._writer = PdfWriter()
+        # The page tree, info and catalog change with every page; close() writes them
+        self._deferred = (self._writer._pages.idnum, self._writer._info.idnum, self._writer._root.idnum)
+        self._positions = {}  # idnum -> byte offset, for the xref table
+        self._flushed = 0  # leading entries of the writer's object list already handled
+        self._closed = False
+
+    def add_sheet(self, data=None, overlay_pdf=None):
+        """
+        Append one sheet and write out its objects.
+
+        Args:
+            data (dict): pdf data, as passed to fill_template
+            overlay_pdf (bytes or file): Instead of data, an overlay already drawn
+                with create_overlay(..., include_static=False) and this job's
+                layout (e.g. by the render pool, see render_overlays)
+        """
+        if self._closed:
+            raise ValueError("print job is already closed")
+        page = self.filler._clone_base_page(self.layout)
+        if overlay_pdf is None:
+            overlay_pdf = self.filler.create_overlay(data, include_static=False, layout=self.layout)
+        elif isinstance(overlay_pdf, (bytes, bytearray)):
+            overlay_pdf = io.BytesIO(overlay_pdf)
+        overlay = PdfReader(overlay_pdf)
+        if self.filler.compact:
+            self.filler._compact_overlay(overlay.pages[0])
+        if not self.filler._merge_overlay(page, overlay.pages[0]):
+            page.merge_page(overlay.pages[0])
+        self._writer.add_page(page)
+        # The writer maps cloned objects by id() of their source document; drop
+        # this overlay's mapping so a later reader reusing the id can't alias it
+        self._writer._id_translated.pop(id(overlay), None)
+        self.pages += 1
+        self._flush()
+
+    def _flush(self):
+        """Write every object added since the last flush, then let go of the per-sheet ones."""
+        writer = self._writer
+        objects = writer._objects
+        buffer = io.BytesIO()
+        if not self.bytes_written:
+            buffer.write(writer.pdf_header + b"\n%\xE2\xE3\xCF\xD3\n")
+        # Template and base page objects stay mapped, so later pages reuse them
+        shared = {idnum for translated in writer._id_translated.values() for idnum in translated.values()}
+        for i in range(self._flushed, len(objects)):
+            idnum = i + 1
+            if idnum in self._deferred:
+                continue
+            self._write_object(buffer, idnum, objects[i])
+            if idnum not in shared:
+                objects[i] = None
+        self._flushed = len(objects)
+        self._emit(buffer.getvalue())
+
+    def _write_object(self, buffer, idnum, obj):
+        self._positions[idnum] = self.bytes_written + buffer.tell()
+        buffer.write(b"%d 0 obj\n" % idnum)
+        obj.write_to_stream(buffer, None)
+        buffer.write(b"\nendobj\n")
+
+    def _emit(self, data):
+        self.output.write(data)
+        self.bytes_written += len(data)
+        metrics.BYTES_WRITTEN.inc(len(data), target='print_job')
+
+    def close(self):
+        """Write the page tree, cross-reference table and trailer, completing the file."""
+        if self._closed:
+            return
+        self._closed = True
+        writer = self._writer
+        buffer = io.BytesIO()
+        if not self.bytes_written:
+            buffer.write(writer.pdf_header + b"\n%\xE2\xE3\xCF\xD3\n")
+        for idnum in self._deferred:
+            self._write_object(buffer, idnum, writer._objects[idnum - 1])
+
+        size = len(writer._objects) + 1
+        xref_location = self.bytes_written + buffer.tell()
+        buffer.write(b"xref\n0 %d\n0000000000 65535 f \n" % size)
+        for idnum in range(1, size):
+            buffer.write(b"%010d 00000 n \n" % self._positions[idnum])
+        buffer.write(b"trailer\n")
+        trailer = DictionaryObject({
+            NameObject("/Size"): NumberObject(size),
+            NameObject("/Root"): writer._root,
+            NameObject("/Info"): writer._info,
+        })
+        trailer.write_to_stream(buffer, None)
+        buffer.write(b"\nstartxref\n%d\n%%%%EOF\n" % xref_location)
+        self._emit(buffer.getvalue())
+
+
+def stream_print_job(filler, sheets, layout=None):
+    """
+    Generate a combined print job as chunks of PDF bytes: one per sheet as it is
+    added, then the trailer. sheets yields pdf data dicts or overlay PDF bytes
+    (see PrintJob.add_sheet); with overlay bytes, pass the layout they were drawn with.
+    """
+    buffer = io.BytesIO()
+    job = PrintJob(filler, buffer, layout)
+    for sheet in sheets:
+        if isinstance(sheet, (bytes, bytearray)):
+            job.add_sheet(overlay_pdf=sheet)
+        else:
+            job.add_sheet(sheet)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    job.close()
+    yield buffer.getvalue()
+
+
+# --- Batch rendering ----------------------------------------------------------
+#
+# Rendering is CPU-bound pure Python, so batches fan out across processes. Each
+# worker process keeps its own filler (and so parses the template once).
+
+_worker_filler = None
+_render_pools = {}
+_render_pools_lock = threading.Lock()
+
+
+def _init_render_worker(template_path, compact=True):
+    global _worker_filler
+    _worker_filler = BuildSheetPDFFiller(template_path, compact=compact)
+    _worker_filler._get_template_page()
+
+
+def _render_worker(data):
+    buffer = io.BytesIO()
+    _worker_filler.fill_template(data, buffer)
+    return buffer.getvalue()
+
+
+def _overlay_worker(args):
+    data, layout = args
+    return _worker_filler.create_overlay(data, include_static=False, layout=layout).getvalue()
+
+
+def get_render_pool(template_path="FGAR_BuildSheet.pdf", max_workers=None, compact=True):
+    """
+    Returns a process pool for rendering build sheets, created on first use and
+    kept for the life of the process. Workers are spawned (not forked) so they
+    are safe to start from a multi-threaded server.
+    """
+    key = (os.path.abspath(template_path), max_workers, compact)
+    with _render_pools_lock:
+        pool = _render_pools.get(key)
+        if pool is None:
+            pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_render_worker,
+                initargs=(template_path, compact),
+            )
+            _render_pools[key] = pool
+        return pool
+
+
+def _discard_render_pool(pool):
+    """Forget a broken render pool so the next get_render_pool builds a new one."""
+    with _render_pools_lock:
+        for key, cached in list(_render_pools.items()):
+            if cached is pool:
+                del _render_pools[key]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _map_on_pool(func, items, template_path, max_workers, compact):
+    """
+    Yield func(item) for each item, in order, from the render pool. If the pool
+    breaks (a worker process died, e.g. killed for running out of memory) it is
+    replaced once and the items not yet returned are run again on the new pool.
+    """
+    done = 0
+    workers = max_workers or os.cpu_count() or 1
+    for attempt in (1, 2):
+        pool = get_render_pool(template_path, max_workers, compact)
+        remaining = items[done:]
+        # A few chunks per worker keeps everyone busy without per-item IPC overhead
+        chunksize = max(1, math.ceil(len(remaining) / (workers * 4)))
+        try:
+            for result in pool.map(func, remaining, chunksize=chunksize):
+                done += 1
+                yield result
+            return
+        except BrokenProcessPool:
+            _discard_render_pool(pool)
+            if attempt == 2:
+                raise
+            print(f"Warning: render pool broke after {done} of {len(items)} items, retrying the rest on a new pool")
+
+
+def submit_render(data, template_path="FGAR_BuildSheet.pdf", max_workers=None, compact=True):
+    """
+    Render one build sheet in the background on the render pool.
+    Returns a concurrent.futures.Future resolving to the PDF bytes. If the pool
+    breaks under the job it is replaced and the job resubmitted once.
+    """
+    result = Future()
+
+    def submit(retry):
+        pool = get_render_pool(template_path, max_workers, compact)
+        try:
+            future = pool.submit(_render_worker, data)
+        except BrokenProcessPool as e:
+            broken(pool, e, retry)
+            return
+        future.add_done_callback(lambda future: finished(future, pool, retry))
+
+    def finished(future, pool, retry):
+        try:
+            result.set_result(future.result())
+        except BrokenProcessPool as e:
+            broken(pool, e, retry)
+        except BaseException as e:
+            result.set_exception(e)
+
+    def broken(pool, error, retry):
+        _discard_render_pool(pool)
+        if not retry:
+            result.set_exception(error)
+            return
+        print("Warning: render pool broke, resubmitting the job on a new pool")
+        try:
+            submit(False)
+        except BaseException as e:
+            result.set_exception(e)
+
+    result.set_running_or_notify_cancel()
+    submit(True)
+    return result
+
+
+def render_many(data_list, template_path="FGAR_BuildSheet.pdf", max_workers=None, compact=True):
+    """
+    Render many build sheets in parallel.
+    
+    Args:
+        data_list (list): pdf data dicts, as passed to fill_template
+        template_path (str): Template PDF used by the worker processes
+        max_workers (int): Pool size (defaults to the number of CPUs)
+        compact (bool): Compressed output (see BuildSheetPDFFiller)
+    
+    Returns:
+        list: PDF bytes for each entry, in input order
+    """
+    if not data_list:
+        return []
+    return list(_map_on_pool(_render_worker, list(data_list), template_path, max_workers, compact))
+
+
+def render_overlays(data_list, layout, template_path="FGAR_BuildSheet.pdf", max_workers=None, compact=True):
+    """
+    Draw the per-sheet overlays for a print job in parallel.
+    
+    Args:
+        data_list (list): pdf data dicts, as passed to fill_template
+        layout (layout_store.Layout): The print job's layout
+        template_path (str): Template PDF used by the worker processes
+        max_workers (int): Pool size (defaults to the number of CPUs)
+        compact (bool): Selects the pool shared with render_many (the print
+            job compacts overlays itself)
+    
+    Returns:
+        iterator: Overlay PDF bytes for each entry, in input order, each
+            available as soon as it is drawn (for PrintJob.add_sheet); work
+            starts when the first one is asked for
+    """
+    if not data_list:
+        return iter(())
+    items = [(data, layout) for data in data_list]
+    return _map_on_pool(_overlay_worker, items, template_path, max_workers, compact)
+
 
 # Test function
 if __name__ == "__main__":
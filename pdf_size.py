@@ -0,0 +1,192 @@
+"""
+PDF Output Size Report
+
+Measures how many bytes a build sheet costs, standard vs compact output
+(see BuildSheetPDFFiller's compact mode):
+  - sheet:     one standalone PDF, as archived in generated/ and sent to the browser
+  - print job: bytes added by each further page of a combined print job (PrintJob)
+and breaks a sheet down by what its bytes are spent on (content streams,
+fonts, images, other objects), including objects stored more than once.
+
+Usage:
+  python pdf_size.py                       # sample sheets, both modes
+  python pdf_size.py --sheets 100          # longer print job
+  python pdf_size.py --files generated/*.pdf
+
+Exits with status 1 if compact output misses the size targets (--max-sheet-kb,
+--max-page-kb), so a change that bloats the output shows up like a benchmark
+regression.
+"""
+
+import argparse
+import glob
+import hashlib
+import io
+import re
+import statistics
+import sys
+
+from PyPDF2 import PdfReader
+from PyPDF2.generic import StreamObject
+
+import benchmark
+import pdf_filler
+
+# Compact output targets, in KB: a standalone sheet, and each further print job page
+DEFAULT_MAX_SHEET_KB = 85
+DEFAULT_MAX_PAGE_KB = 1.0
+
+OBJECT_PATTERN = re.compile(rb'(\d+) 0 obj\b')
+FONT_KEYS = ('/Length1', '/Length2', '/Length3')
+
+
+def sample_sheets(count, db_path='cpus.db'):
+    """fill_template data for count varied machines (the benchmark corpus)."""
+    search_corpus = benchmark.build_search_corpus(db_path)
+    specs_list = benchmark.build_spec_corpus(search_corpus, size=count)
+    return [benchmark.build_sheet_data(specs, i) for i, specs in enumerate(specs_list)]
+
+
+def _classify(obj, content_ids, idnum):
+    if idnum in content_ids:
+        return 'content'
+    if isinstance(obj, StreamObject):
+        if obj.get('/Subtype') == '/Image':
+            return 'images'
+        if any(key in obj for key in FONT_KEYS) or obj.get('/Subtype') in ('/Type1C', '/CIDFontType0C', '/OpenType'):
+            return 'fonts'
+        return 'other'
+    if hasattr(obj, 'get') and obj.get('/Type') in ('/Font', '/FontDescriptor'):
+        return 'fonts'
+    return 'other'
+
+
+def breakdown(pdf_bytes):
+    """
+    Bytes per object kind in one PDF: {'content', 'fonts', 'images', 'other',
+    'overhead' (header, xref, trailer), 'duplicate' (objects identical to an
+    earlier one), 'objects'}.
+    """
+    reader = PdfReader(io.BytesIO(pdf_bytes))
+    content_ids = set()
+    for page in reader.pages:
+        contents = page.raw_get('/Contents')
+        for ref in (contents if isinstance(contents, list) else [contents]):
+            if hasattr(ref, 'idnum'):
+                content_ids.add(ref.idnum)
+
+    # Each object runs from its "n 0 obj" to the next object (or the xref table)
+    starts = [(m.start(), int(m.group(1))) for m in OBJECT_PATTERN.finditer(pdf_bytes)]
+    xref = pdf_bytes.rfind(b'\nxref')
+    ends = [start for start, _ in starts[1:]] + [xref if xref > 0 else len(pdf_bytes)]
+
+    result = {'content': 0, 'fonts': 0, 'images': 0, 'other': 0, 'duplicate': 0, 'objects': len(starts)}
+    seen = set()
+    for (start, idnum), end in zip(starts, ends):
+        size = end - start
+        body = pdf_bytes[start:end].split(b' obj', 1)[1]
+        digest = hashlib.sha256(body).digest()
+        if digest in seen:
+            result['duplicate'] += size
+        seen.add(digest)
+        result[_classify(reader.get_object(idnum), content_ids, idnum)] += size
+    result['overhead'] = len(pdf_bytes) - sum(end - start for (start, _), end in zip(starts, ends))
+    return result
+
+
+def measure_mode(sheets, compact):
+    """Size of a standalone sheet and of each further print job page, for one output mode."""
+    filler = pdf_filler.BuildSheetPDFFiller(compact=compact)
+    singles = []
+    for data in sheets:
+        buffer = io.BytesIO()
+        filler.fill_template(data, buffer)
+        singles.append(buffer.getvalue())
+
+    job = io.BytesIO()
+    filler.fill_many(sheets, job)
+    first_page = len(singles[0])
+    per_page = (len(job.getvalue()) - first_page) / max(1, len(sheets) - 1)
+    return {
+        'sheet_bytes': statistics.mean(len(pdf_bytes) for pdf_bytes in singles),
+        'job_bytes': len(job.getvalue()),
+        'page_bytes': per_page,
+        'breakdown': breakdown(singles[0]),
+    }
+
+
+def _print_breakdown(parts, total):
+    for key in ('content', 'fonts', 'images', 'other', 'overhead'):
+        print(f"    {key:<10} {parts[key]:>9,} B  {parts[key] / total:6.1%}")
+    print(f"    {'duplicate':<10} {parts['duplicate']:>9,} B  (objects stored twice)")
+
+
+def report_samples(count):
+    """Print standard vs compact sizes for count sample sheets. Returns the compact results."""
+    sheets = sample_sheets(count)
+    results = {mode: measure_mode(sheets, mode == 'compact') for mode in ('standard', 'compact')}
+
+    print(f"{'':<24}{'standard':>12}{'compact':>12}{'saved':>9}")
+    for key, label in (('sheet_bytes', 'bytes per sheet'),
+                       ('page_bytes', 'bytes per job page'),
+                       ('job_bytes', f'print job, {count} sheets')):
+        before, after = results['standard'][key], results['compact'][key]
+        saved = 1 - after / before if before else 0
+        print(f"{label:<24}{before:>12,.0f}{after:>12,.0f}{saved:>9.1%}")
+
+    for mode in ('standard', 'compact'):
+        parts = results[mode]['breakdown']
+        print(f"\n{mode} sheet ({parts['objects']} objects):")
+        _print_breakdown(parts, results[mode]['sheet_bytes'])
+    return results['compact']
+
+
+def report_files(patterns):
+    """Print the size and breakdown totals of existing PDFs."""
+    paths = sorted({path for pattern in patterns for path in glob.glob(pattern)})
+    if not paths:
+        print("No PDF files matched")
+        return
+    total = pages = 0
+    parts = {}
+    for path in paths:
+        with open(path, 'rb') as f:
+            pdf_bytes = f.read()
+        try:
+            counts = breakdown(pdf_bytes)
+            pages += len(PdfReader(io.BytesIO(pdf_bytes)).pages)
+        except Exception as e:
+            print(f"  skipped {path}: {e}")
+            continue
+        total += len(pdf_bytes)
+        for key, value in counts.items():
+            parts[key] = parts.get(key, 0) + value
+    print(f"{len(paths)} files, {pages} pages, {total:,} bytes ({total / max(1, pages):,.0f} per page)")
+    if total:
+        _print_breakdown(parts, total)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report generated PDF sizes, standard vs compact output.")
+    parser.add_argument("--sheets", type=int, default=50, help="Sample sheets to render (default 50)")
+    parser.add_argument("--files", nargs='+', help="Measure existing PDFs instead (paths or globs)")
+    parser.add_argument("--max-sheet-kb", type=float, default=DEFAULT_MAX_SHEET_KB,
+                        help=f"Target for a compact standalone sheet (default {DEFAULT_MAX_SHEET_KB})")
+    parser.add_argument("--max-page-kb", type=float, default=DEFAULT_MAX_PAGE_KB,
+                        help=f"Target for each further compact print job page (default {DEFAULT_MAX_PAGE_KB})")
+    args = parser.parse_args()
+
+    if args.files:
+        report_files(args.files)
+        sys.exit(0)
+
+    compact = report_samples(max(2, args.sheets))
+    misses = []
+    if compact['sheet_bytes'] > args.max_sheet_kb * 1024:
+        misses.append(f"sheet {compact['sheet_bytes'] / 1024:.1f} KB > {args.max_sheet_kb} KB")
+    if compact['page_bytes'] > args.max_page_kb * 1024:
+        misses.append(f"print job page {compact['page_bytes'] / 1024:.2f} KB > {args.max_page_kb} KB")
+    if misses:
+        print(f"\nFAIL: {'; '.join(misses)}")
+        sys.exit(1)
+    print(f"\nOK: within {args.max_sheet_kb} KB per sheet and {args.max_page_kb} KB per print job page")
@@ -1,8 +1,19 @@
 import sqlite3
+import bisect
 import math
+import hashlib
+import json
 import re
-import difflib
 import os
+import sys
+import threading
+import time
+import pathlib
+from collections import OrderedDict
+
+import numpy as np
+
+import metrics
 
 def get_resource_path(filename):
     """
@@ -16,56 +27,72 @@ def get_resource_path(filename):
     
     return os.path.join(base_path, 'resources', filename)
 
-def load_prices_config(config_path='prices.txt'):
-    """
-    Loads pricing configuration from a file.
-    Returns a dict with key-value pairs.
-    """
-    config = {
-        'BASE_FEE': 40.0,
-        'RAM_DDR3_MULT': 1.5,
-        'RAM_DDR4_MULT': 2.5,
-        'RAM_DDR5_MULT': 6.0,
-        'RAM_DEFAULT_MULT': 2.5,
-        'DRIVE_HDD_PER_GB': 0.02,
-        'DRIVE_SSD_PER_GB': 0.08,
-        'DRIVE_NVME_PER_GB': 0.1,
-        'DRIVE_DEFAULT_PER_GB': 0.08,
-        'OS_LINUX_MULT': 0.85,
-        'OS_MACOS_MULT': 1.2,
-        'OS_WINDOWS_MULT': 1.0,
-        'CPU_YEAR_BASE': 2012,
-        'CPU_YEAR_LAPTOP_MULT': 6,
-        'CPU_YEAR_DESKTOP_MULT': 10,
-        'CPU_CORE_MULT': 0.025,
-        'CPU_THREAD_EXCESS_PRICE': 0.75
-    }
-    
-    # Resolve path if it's just a filename
-    # User requested to always use current directory (CWD)
-    # We do not try to resolve absolute paths relative to script/exe anymore.
-    # config_path defaults to 'prices.txt' which will search CWD.
-    
-    loaded = False
-    if os.path.exists(config_path):
-        try:
-            with open(config_path, 'r') as f:
-                for line in f:
-                    line = line.strip()
-                    if not line or line.startswith('#'):
-                        continue
-                    if '=' in line:
-                        key, value = line.split('=', 1)
-                        key = key.strip()
-                        try:
-                            config[key] = float(value.strip())
-                        except ValueError:
-                            pass # Keep default if invalid
-            loaded = True
-        except Exception as e:
-            print(f"Error loading prices.txt from {config_path}: {e}")
-                
-    # Debug logging
+def _resolve_db_path(db_path):
+    """Prefer a bundled resources/ copy of relative db paths when one exists."""
+    if not os.path.isabs(db_path):
+        res_path = get_resource_path(db_path)
+        if os.path.exists(res_path):
+            return res_path
+    return db_path
+
+
+def _file_signature(path):
+    """Cheap change detector for a file: (mtime_ns, size), or None if missing."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+DEFAULT_PRICES = {
+    'BASE_FEE': 40.0,
+    'RAM_DDR3_MULT': 1.5,
+    'RAM_DDR4_MULT': 2.5,
+    'RAM_DDR5_MULT': 6.0,
+    'RAM_DEFAULT_MULT': 2.5,
+    'DRIVE_HDD_PER_GB': 0.02,
+    'DRIVE_SSD_PER_GB': 0.08,
+    'DRIVE_NVME_PER_GB': 0.1,
+    'DRIVE_DEFAULT_PER_GB': 0.08,
+    'OS_LINUX_MULT': 0.85,
+    'OS_MACOS_MULT': 1.2,
+    'OS_WINDOWS_MULT': 1.0,
+    'CPU_YEAR_BASE': 2012,
+    'CPU_YEAR_LAPTOP_MULT': 6,
+    'CPU_YEAR_DESKTOP_MULT': 10,
+    'CPU_CORE_MULT': 0.025,
+    'CPU_THREAD_EXCESS_PRICE': 0.75
+}
+
+# Parsed prices.txt per absolute path: {'signature', 'version', 'config'}
+_prices_cache = {}
+_prices_lock = threading.Lock()
+
+
+def _pricing_debug_enabled():
+    return os.environ.get('PRICING_DEBUG', '').lower() in ('1', 'true', 'yes')
+
+
+def _parse_prices(text):
+    """Parses KEY=VALUE lines on top of the defaults."""
+    config = dict(DEFAULT_PRICES)
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        if '=' in line:
+            key, value = line.split('=', 1)
+            key = key.strip()
+            try:
+                config[key] = float(value.strip())
+            except ValueError:
+                pass # Keep default if invalid
+    return config
+
+
+def _write_pricing_debug(config_path, loaded, config):
+    """Writes pricing_debug.txt. Only called on (re)load when PRICING_DEBUG is set."""
     try:
         log_path = "pricing_debug.txt"
         if getattr(sys, 'frozen', False):
@@ -82,53 +109,801 @@ def load_prices_config(config_path='prices.txt'):
     except Exception as e:
         pass
 
-    if not loaded:
-        print(f"Warning: {config_path} not found. Using internal defaults.")
-            
-    return config
+
+def _get_prices_entry(config_path):
+    """
+    Returns the cache entry for config_path, re-reading the file only when its
+    mtime/size changed and re-parsing only when its content hash changed.
+    """
+    key = os.path.abspath(config_path)
+    signature = _file_signature(key)
+    entry = _prices_cache.get(key)
+    if entry is not None and entry['signature'] == signature:
+        metrics.cache_lookup('prices_config', True)
+        return entry
+
+    metrics.cache_lookup('prices_config', False)
+    with _prices_lock:
+        entry = _prices_cache.get(key)
+        if entry is not None and entry['signature'] == signature:
+            return entry
+
+        text = None
+        if signature is not None:
+            try:
+                with open(config_path, 'r') as f:
+                    text = f.read()
+            except Exception as e:
+                print(f"Error loading prices.txt from {config_path}: {e}")
+
+        if text is None:
+            version = 'defaults'
+        else:
+            version = hashlib.sha256(text.encode('utf-8')).hexdigest()[:12]
+
+        if entry is not None and entry['version'] == version:
+            # Touched but unchanged: keep the parsed config
+            entry = dict(entry, signature=signature)
+        else:
+            loaded = text is not None
+            config = _parse_prices(text) if loaded else dict(DEFAULT_PRICES)
+            if not loaded:
+                print(f"Warning: {config_path} not found. Using internal defaults.")
+            if _pricing_debug_enabled():
+                _write_pricing_debug(config_path, loaded, config)
+            entry = {'signature': signature, 'version': version, 'config': config}
+
+        _prices_cache[key] = entry
+        return entry
+
+
+def load_prices_config(config_path='prices.txt'):
+    """
+    Loads pricing configuration from a file.
+    Returns a dict with key-value pairs.
+    
+    The parsed file is cached per process and only reloaded when prices.txt
+    changes on disk. Set PRICING_DEBUG=1 to write pricing_debug.txt on each reload.
+    """
+    # Resolve path if it's just a filename
+    # User requested to always use current directory (CWD)
+    # We do not try to resolve absolute paths relative to script/exe anymore.
+    # config_path defaults to 'prices.txt' which will search CWD.
+    return dict(_get_prices_entry(config_path)['config'])
+
+
+def get_prices_config_version(config_path='prices.txt'):
+    """
+    Returns a short content hash identifying the active pricing config,
+    or 'defaults' when prices.txt could not be read.
+    """
+    return _get_prices_entry(config_path)['version']
+
+
+def get_db_version(db_path='cpus.db'):
+    """
+    Returns a short string identifying the current contents of the CPU
+    database file (its mtime and size), or None if it is missing.
+    """
+    signature = _file_signature(_resolve_db_path(db_path))
+    return None if signature is None else f"{signature[0]}-{signature[1]}"
+
+# The original normalization: these patterns removed in order, each pass
+# running over the previous pass's output (_clean_cpu_name_passes).
+_CLEAN_PASSES = [re.compile(p, re.IGNORECASE) for p in (
+    r'\(R\)', r'\(TM\)', r'\s+CPU\s*', r'\s+Processor\s*', r'\s+\d+-Core', r'\s+\d+-Thread',
+)]
+# The same removals in one scan. (R)/(TM) inside a whitespace run count as
+# already removed, since the later passes only ever see the run without them.
+# The leading lookahead lets the scan skip straight to whitespace or '('.
+_CLEAN_MARK = r'\((?:R|TM)\)'
+_CLEAN_SPACE = rf'(?:{_CLEAN_MARK})*(?:\s(?:{_CLEAN_MARK})*)+'
+_CLEAN_COMBINED = re.compile(
+    rf'(?=[\s(])(?:{_CLEAN_SPACE}(?:(?:CPU|Processor)(?:\s|{_CLEAN_MARK})*|\d+-(?:Core|Thread))|{_CLEAN_MARK})',
+    re.IGNORECASE)
+# "Processor" swallowing the whitespace a following "CPU" needs is the one
+# case where the left-to-right scan disagrees with the pass order
+_CLEAN_CONFLICT = re.compile(rf'Processor{_CLEAN_SPACE}CPU', re.IGNORECASE)
+
+
+def _clean_cpu_name_passes(name):
+    """The pass-by-pass normalization (reference semantics for clean_cpu_name)."""
+    for pattern in _CLEAN_PASSES:
+        name = pattern.sub('', name)
+    return name
+
 
 def clean_cpu_name(name):
     """
     Cleans CPU name to improve matching success
     e.g. "Intel(R) Core(TM) i7-7600U CPU @ 2.80GHz" -> "Intel Core i7-7600U"
+    
+    Removes (R), (TM), CPU, Processor and core/thread counts (e.g. 12-Core,
+    16-Thread), drops clock speed info after '@' and collapses whitespace.
     """
     if not name: return ""
-    # Remove (R), (TM), CPU, Processor
-    name = re.sub(r'\(R\)', '', name, flags=re.IGNORECASE)
-    name = re.sub(r'\(TM\)', '', name, flags=re.IGNORECASE)
-    name = re.sub(r'\s+CPU\s*', '', name, flags=re.IGNORECASE)
-    name = re.sub(r'\s+Processor\s*', '', name, flags=re.IGNORECASE)
-    # Remove core/thread counts (e.g. 12-Core, 16-Thread)
-    name = re.sub(r'\s+\d+-Core', '', name, flags=re.IGNORECASE)
-    name = re.sub(r'\s+\d+-Thread', '', name, flags=re.IGNORECASE)
-    # Remove clock speed info if present (e.g. @ 2.80GHz)
-    name = name.split('@')[0]
+    # Nothing removed can contain '@', so cut the clock speed off first
+    name = name.split('@', 1)[0]
+    cleaned, removed = _CLEAN_COMBINED.subn('', name)
+    # A removal can join text into a new match (e.g. "(T(R)M)") that the
+    # separate passes would also remove; those rare strings take the slow path
+    if removed and (_CLEAN_COMBINED.search(cleaned) or _CLEAN_CONFLICT.search(name)):
+        cleaned = _clean_cpu_name_passes(name)
     # Remove extra spaces
-    return " ".join(name.split())
+    return " ".join(cleaned.split())
+
 
-def get_cpu_candidates(query, db_path='cpus.db', limit=20):
+def clean_cpu_names(names):
     """
-    Finds potential CPU matches in the database.
-    Returns list of dicts: {'name', 'year', 'cores', 'threads', 'clock', 'turbo', 'passmark', 'score'}
+    clean_cpu_name over many raw strings (e.g. a batch intake file).
+    Returns a list in the same order; repeated strings are cleaned once.
+    """
+    cache = {}
+    cleaned = []
+    for name in names:
+        result = cache.get(name)
+        if result is None:
+            result = cache[name] = clean_cpu_name(name)
+        cleaned.append(result)
+    return cleaned
+
+# --- Read-only connections ---------------------------------------------------
+#
+# cpus.db is never written by the app, so each thread keeps one read-only
+# connection per database and reuses it across requests. The sqlite3 module
+# caches prepared statements per connection (cached_statements), so the
+# fixed SQL strings below are only compiled once per thread.
+
+SQLITE_MMAP_SIZE = 64 * 1024 * 1024
+SQL_CPU_BY_NAME = "SELECT * FROM cpus WHERE name = ?"
+SQL_ALL_CPUS = "SELECT * FROM cpus ORDER BY rowid"
+
+_local = threading.local()
+
+
+def _open_readonly(db_path):
+    # immutable=1 lets SQLite skip locking and change detection entirely;
+    # get_db_connection reopens the connection if the file changes on disk.
+    uri = pathlib.Path(db_path).resolve().as_uri() + '?mode=ro&immutable=1'
+    conn = sqlite3.connect(uri, uri=True, cached_statements=64)
+    conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+    return conn
+
+
+def get_db_connection(db_path='cpus.db'):
+    """
+    Returns this thread's read-only connection to db_path, opening it on first use.
+    Do not close it; it is reused by later calls on the same thread.
     """
+    db_path = _resolve_db_path(db_path)
+    signature = _file_signature(db_path)
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
     
-    # Resolve db path
-    if not os.path.isabs(db_path):
-        res_path = get_resource_path(db_path)
-        if os.path.exists(res_path):
-            db_path = res_path
-            
+    entry = connections.get(db_path)
+    if entry is not None:
+        if entry[0] == signature:
+            metrics.cache_lookup('db_connection', True)
+            return entry[1]
+        entry[1].close()
+        del connections[db_path]
+    
+    metrics.cache_lookup('db_connection', False)
+    conn = _open_readonly(db_path)
+    connections[db_path] = (signature, conn)
+    return conn
+
+
+# --- In-memory CPU catalog ---------------------------------------------------
+#
+# The cpus table is small (a few thousand rows) and read-only at runtime, so it
+# is loaded once per process and searched in memory (see CPUMatcher). Rows are
+# kept in rowid order; exact-name lookups are case-sensitive, like `name = ?`.
+
+_catalogs = {}
+_catalog_lock = threading.Lock()
+
+
+class CPUCatalog:
+    """
+    Read-only, in-memory copy of the cpus table.
+    Holds every row (as a dict, in rowid order), an exact-name map and the
+    fuzzy matcher over the names.
+    """
+
+    def __init__(self, rows, version=None):
+        self.rows = rows
+        self.version = version
+        self._by_name = {}
+        self._matcher = None
+        for i, row in enumerate(rows):
+            if row['name'] is not None:
+                self._by_name.setdefault(row['name'], []).append(i)
+
+    @classmethod
+    def from_db(cls, db_path, version=None):
+        metrics.DB_QUERIES.inc(query='load_catalog')
+        rows = [dict(row) for row in get_db_connection(db_path).execute(SQL_ALL_CPUS)]
+        return cls(rows, version)
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def matcher(self):
+        """CPUMatcher over these rows, built on first use."""
+        if self._matcher is None:
+            with _catalog_lock:
+                if self._matcher is None:
+                    self._matcher = CPUMatcher(self.rows)
+        return self._matcher
+
+    def match(self, clean_query, limit=20, budget_ms=None):
+        """
+        Ranked fuzzy matches: ([(row dict, calibrated 0-100 score)], best first,
+        complete), complete being False if the budget cut matching short (see CPUMatcher).
+        """
+        matches, complete = self.matcher.match(clean_query, limit, budget_ms)
+        return [(self.rows[i], score) for i, score in matches], complete
+
+    def exact(self, name):
+        """Rows whose name equals `name` exactly (case-sensitive)."""
+        return [self.rows[i] for i in self._by_name.get(name, ())]
+
+
+def get_cpu_catalog(db_path='cpus.db'):
+    """
+    Returns the process-wide CPUCatalog for db_path, loading it on first use.
+    The catalog is rebuilt only if the database file changes on disk.
+    """
+    db_path = _resolve_db_path(db_path)
+    signature = _file_signature(db_path)
+    catalog = _catalogs.get(db_path)
+    if catalog is not None and signature is not None and catalog.version == signature:
+        metrics.cache_lookup('cpu_catalog', True)
+        return catalog
+
+    metrics.cache_lookup('cpu_catalog', False)
+    with _catalog_lock:
+        catalog = _catalogs.get(db_path)
+        if catalog is None or signature is None or catalog.version != signature:
+            catalog = CPUCatalog.from_db(db_path, version=signature)
+            if signature is not None:
+                _catalogs[db_path] = catalog
+    return catalog
+
+
+# --- Ranked fuzzy matching ---------------------------------------------------
+#
+# CPUMatcher scores every catalog row against a query in one vectorized pass.
+# Names are split into tokens (hyphenated model numbers also contribute their
+# parts, so "i5 8350U" finds "i5-8350U"). Each query token is compared once
+# against the catalog's token vocabulary: an exact token scores 1, a token it
+# is a prefix of (autocomplete) up to 0.95, and a token within edit distance
+# 1-2 (typos, transposed digits) 0.8/0.65. A row's raw score combines, per
+# query token, the similarity of its best-matching token in the row: model
+# numbers (tokens of 3+ characters with a digit) make up _MATCH_MODEL_SHARE of
+# it, other words the rest (vendor words at half weight), so trailing text such
+# as "with Radeon Graphics" can't outweigh the wrong model number. Rows lose a
+# little for name tokens (other than vendor words) the query doesn't match, or
+# matches only part of, so "Ryzen 7 8840HS" prefers "AMD Ryzen 7 8840HS" over
+# "AMD Ryzen 7 PRO 8840HS" and "BENGAL" prefers "BENGAL" over "BENGAL-IOT".
+# The reported 0-100 score is calibrated: roughly the percentage of matches
+# scoring that high that are the CPU the query meant. It is a logistic fit
+# (CPU_MATCH_CALIBRATION) of the raw score and the margin over the best row
+# for a different CPU (see _cpu_identity; the catalog often lists one CPU under
+# several names). The fit used scanner strings, typos and leave-one-out misses
+# generated from cpus.db; different CPUs that fit a query equally well tie, so
+# they score lower.
+
+CPU_MATCH_BUDGET_MS = float(os.environ.get('CPU_MATCH_BUDGET_MS', 25))
+# calculate_price treats a best match scoring this or lower as "not found": a query
+# that fits several different CPUs equally well (e.g. "i5" or "Ryzen 5") scores low
+CPU_MATCH_MIN_SCORE = int(os.environ.get('CPU_MATCH_MIN_SCORE', 40))
+# Logistic coefficients: (intercept, raw score, margin)
+CPU_MATCH_CALIBRATION = (-8.4, 8.0, 16.3)
+
+_MATCH_TOKEN = re.compile(r'[^\s,()/]+')
+_MATCH_STOPWORDS = frozenset(['intel', 'amd', 'core', 'ryzen', 'cpu'])
+_MATCH_MODEL_SHARE = 0.85
+_MATCH_COVERAGE_PENALTY = 0.3  # at most, for a row none of whose tokens match
+# Intel's "12th Gen Intel(R) Core(TM) ..." prefix, which catalog names lack
+_MATCH_GENERATION = re.compile(r'\b\d+(?:st|nd|rd|th) gen\b')
+_MATCH_PREFIX_BASE, _MATCH_PREFIX_SPAN = 0.6, 0.35
+_MATCH_EDIT_SCORES = (1.0, 0.8, 0.65)  # by edit distance
+
+
+def _match_tokens(text):
+    """Lower-cased tokens of a cleaned name."""
+    return _MATCH_TOKEN.findall(_MATCH_GENERATION.sub(' ', text.lower()))
+
+
+def _is_model_token(token):
+    return len(token) >= 3 and any(ch.isdigit() for ch in token)
+
+
+def _max_edits(token):
+    """Edit distance tolerated for a query token of this length."""
+    return 0 if len(token) < 4 else 1 if len(token) < 7 else 2
+
+
+def _deletes(token, depth):
+    """token with up to depth characters deleted (symmetric-delete candidates)."""
+    variants = {token}
+    frontier = {token}
+    for _ in range(depth):
+        frontier = {v[:i] + v[i + 1:] for v in frontier for i in range(len(v))}
+        variants |= frontier
+    return variants
+
+
+def _edit_distance(a, b, limit):
+    """
+    Optimal string alignment distance (insert, delete, substitute, swap
+    adjacent), or limit + 1 once it is certain to exceed limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2 = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+def _cpu_identity(tokens):
+    """
+    What makes two catalog rows the same CPU, from their name tokens: the model
+    numbers (the parts of hyphenated tokens, so "i7-860" and "860" agree), or
+    the other words if there are none. Catalog rows often name one CPU in
+    several ways ("Intel i7-1165G7", "Intel Core i7-1165G7 @ 2.80GHz",
+    "T610-Unisoc", "Unisoc T610"); they must not count as rivals in the margin.
+    """
+    parts = [part for token in tokens for part in token.split('-') if part]
+    models = frozenset(part for part in parts if _is_model_token(part))
+    return models or frozenset(part for part in parts if part not in _MATCH_STOPWORDS)
+
+
+def calibrate_match_score(raw, margin):
+    """
+    Calibrated 0-100 score for a match with this raw score and margin over the
+    best row for a different CPU (negative if another CPU scores higher).
+    """
+    intercept, raw_coef, margin_coef = CPU_MATCH_CALIBRATION
+    z = intercept + raw_coef * raw + margin_coef * margin
+    return int(round(100.0 / (1.0 + math.exp(-z))))
+
+
+class CPUMatcher:
+    """
+    Token index over catalog rows for ranked fuzzy matching.
+    Built once per CPUCatalog (see CPUCatalog.matcher).
+    """
+
+    def __init__(self, rows):
+        row_tokens = []
+        vocab = set()
+        identities = {}
+        groups = []
+        for row in rows:
+            clean = clean_cpu_name(row['name']).lower() if row['name'] else ''
+            tokens = _match_tokens(clean)
+            groups.append(identities.setdefault(_cpu_identity(tokens), len(identities)) if clean else -1)
+            # (token, index of the name token it came from, share of that name
+            # token it covers): hyphenated tokens also contribute their parts
+            expanded = [(token, j, 1.0) for j, token in enumerate(tokens)]
+            for j, token in enumerate(tokens):
+                parts = [part for part in token.split('-') if part] if '-' in token else []
+                expanded.extend((part, j, len(part) / sum(map(len, parts))) for part in parts)
+            row_tokens.append((len(tokens), expanded))
+            vocab.update(token for token, _, _ in expanded)
+        
+        # Sorted vocabulary, so the tokens starting with a prefix are one slice
+        self.vocab = sorted(vocab)
+        self._vocab_ids = {token: i for i, token in enumerate(self.vocab)}
+        self._vocab_lengths = np.array([len(token) for token in self.vocab], dtype=np.float64)
+        
+        # Postings: for each vocab id (in order), the rows holding it, which
+        # name token of the row it came from and the share of that token it
+        # covers; vocab id i owns entries _post_offsets[i]:_post_offsets[i + 1]
+        postings = sorted((self._vocab_ids[token], i, j, share)
+                          for i, (_, expanded) in enumerate(row_tokens) for token, j, share in expanded)
+        post_ids = np.array([p[0] for p in postings], dtype=np.int32)
+        self._post_rows = np.array([p[1] for p in postings], dtype=np.int32)
+        self._post_owner = np.array([p[2] for p in postings], dtype=np.int32)
+        self._post_share = np.array([p[3] for p in postings], dtype=np.float64)
+        self._post_offsets = np.searchsorted(post_ids, np.arange(len(self.vocab) + 1))
+        self._max_tokens = max((n for n, _ in row_tokens), default=0)
+        self._row_lengths = np.array([n for n, _ in row_tokens], dtype=np.int32)
+        # Name tokens that count towards coverage (not vendor words)
+        self._counted = np.zeros((len(rows), self._max_tokens), dtype=bool)
+        for i, (n, expanded) in enumerate(row_tokens):
+            for token, j, _ in expanded[:n]:
+                self._counted[i, j] = token not in _MATCH_STOPWORDS
+        self._counted_lengths = self._counted.sum(axis=1)
+        self._valid = self._row_lengths > 0
+        # Rows that are the same CPU share a group (for the margin)
+        self._row_groups = np.array(groups, dtype=np.int32)
+        
+        # Symmetric-delete index for edit-distance lookups
+        self._delete_index = {}
+        for i, token in enumerate(self.vocab):
+            for variant in _deletes(token, _max_edits(token)):
+                self._delete_index.setdefault(variant, []).append(i)
+
+    def _split_glued(self, token):
+        """
+        Split an unknown token that is a known word glued to a model number.
+        clean_cpu_name drops " CPU " with the spaces around it, so
+        "Core(TM)2 Duo CPU     E8400" arrives as "Core2 DuoE8400".
+        """
+        if token in self._vocab_ids:
+            return [token]
+        for i in range(len(token) - 2, 1, -1):
+            word, rest = token[:i], token[i:]
+            if word.isalpha() and word in self._vocab_ids and _is_model_token(rest):
+                return [word, rest]
+        return [token]
+
+    def _token_similarity(self, token, deadline):
+        """
+        Similarity of token to every vocab token, as an array, and False if the
+        deadline stopped the typo check early (True otherwise).
+        """
+        sim = np.zeros(len(self.vocab))
+        
+        # Prefix matches (the exact token sorts first and is overwritten below)
+        lo = bisect.bisect_left(self.vocab, token)
+        hi = bisect.bisect_left(self.vocab, token + '\uffff', lo)
+        if hi > lo:
+            sim[lo:hi] = _MATCH_PREFIX_BASE + _MATCH_PREFIX_SPAN * len(token) / self._vocab_lengths[lo:hi]
+        exact = self._vocab_ids.get(token)
+        if exact is not None:
+            sim[exact] = 1.0
+        
+        # Typos: candidates share a deletion variant, then check the real distance
+        limit = _max_edits(token)
+        if limit:
+            candidates = set()
+            for variant in _deletes(token, limit):
+                candidates.update(self._delete_index.get(variant, ()))
+            for n, i in enumerate(candidates):
+                if n % 64 == 0 and time.perf_counter() > deadline:
+                    return sim, False
+                distance = _edit_distance(token, self.vocab[i], limit)
+                if distance <= limit and _MATCH_EDIT_SCORES[distance] > sim[i]:
+                    sim[i] = _MATCH_EDIT_SCORES[distance]
+        return sim, True
+
+    def _matching_postings(self, sim):
+        """
+        (rows, name token index, share, similarity, token length) for every
+        row token with sim > 0.
+        """
+        ids = np.flatnonzero(sim)
+        starts = self._post_offsets[ids]
+        counts = self._post_offsets[ids + 1] - starts
+        # Concatenated ranges starts[k]:starts[k] + counts[k]
+        index = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        return (self._post_rows[index], self._post_owner[index], self._post_share[index],
+                np.repeat(sim[ids], counts), np.repeat(self._vocab_lengths[ids], counts))
+
+    def raw_scores(self, clean_query, budget_ms=None):
+        """
+        Raw 0-1 score of every row for an already-cleaned query, and whether
+        the typo check finished within budget_ms (see match).
+        """
+        budget_ms = CPU_MATCH_BUDGET_MS if budget_ms is None else budget_ms
+        deadline = time.perf_counter() + budget_ms / 1000.0
+        n_rows = len(self._row_lengths)
+        tokens = [part for token in _match_tokens(clean_query) for part in self._split_glued(token)]
+        if not tokens:
+            return np.zeros(n_rows), True
+        sims = []
+        complete = True
+        for token in tokens:
+            sim, token_complete = self._token_similarity(token, deadline)
+            sims.append((token, sim))
+            complete = complete and token_complete
+        
+        # A model number found nowhere in the catalog is left out when another
+        # one is known (e.g. "4C+6G" in "AMD A10-9700 RADEON R7, 4C+6G")
+        has_known_model = any(_is_model_token(token) and sim.any() for token, sim in sims)
+        
+        # Weighted sums for model-number tokens and for other words, and which
+        # name tokens any query token matched
+        sums = [np.zeros(n_rows), np.zeros(n_rows)]
+        weights = [0.0, 0.0]
+        covered = np.zeros((n_rows, self._max_tokens), dtype=bool)
+        partial = np.zeros(n_rows * self._max_tokens)
+        token_partial = np.zeros_like(partial)  # scratch, zeroed again after each token
+        partial_slots = []
+        for token, sim in sims:
+            is_model = _is_model_token(token)
+            if is_model and has_known_model and not sim.any():
+                continue
+            rows, owners, shares, values, lengths = self._matching_postings(sim)
+            best = np.zeros(n_rows)
+            np.maximum.at(best, rows, values)
+            # A prefix only covers as much of the token as it spells out; each
+            # name token takes its best posting for this query token
+            shares = shares * np.minimum(1.0, len(token) / lengths)
+            full = shares >= 1.0
+            covered[rows[full], owners[full]] = True
+            if not full.all():
+                # Partly covered name tokens add up over the query tokens, each
+                # query token counting once per name token (its best posting)
+                slots = rows[~full] * self._max_tokens + owners[~full]
+                np.maximum.at(token_partial, slots, shares[~full])
+                partial[slots] += token_partial[slots]
+                token_partial[slots] = 0.0
+                partial_slots.append(slots)
+            group = 0 if is_model else 1
+            weight = 0.5 if token in _MATCH_STOPWORDS else 1.0
+            sums[group] += weight * best
+            weights[group] += weight
+        if weights[0] and weights[1]:
+            scores = (_MATCH_MODEL_SHARE * sums[0] / weights[0]
+                      + (1 - _MATCH_MODEL_SHARE) * sums[1] / weights[1])
+        else:
+            scores = sums[0] / weights[0] if weights[0] else sums[1] / weights[1]
+        
+        # Name tokens the query says nothing about (e.g. "PRO"), or only about
+        # part of (e.g. "BENGAL" for "BENGAL-IOT"), cost a little
+        uncovered_slots = self._counted & ~covered
+        uncovered = uncovered_slots.sum(axis=1).astype(np.float64)
+        slots = np.unique(np.concatenate(partial_slots)) if partial_slots else np.zeros(0, dtype=np.int64)
+        slots = slots[uncovered_slots.ravel()[slots]]
+        if len(slots):
+            uncovered -= np.bincount(slots // self._max_tokens, weights=np.minimum(partial[slots], 1.0),
+                                     minlength=n_rows)
+        uncovered /= np.maximum(self._counted_lengths, 1)
+        scores *= 1.0 - _MATCH_COVERAGE_PENALTY * uncovered
+        scores[~self._valid] = 0.0
+        return scores, complete
+
+    def match(self, clean_query, limit=20, budget_ms=None):
+        """
+        Best rows for an already-cleaned query, as (row index, calibrated score) pairs.
+        Ranked by raw score, then shorter names (fewer unmatched extras), then rowid.
+        The edit-distance step stops after budget_ms (default CPU_MATCH_BUDGET_MS);
+        exact and prefix matches are always scored.
+        
+        returns: (pairs, complete); complete is False if the budget ran out
+        before every typo candidate was checked, so typo matches may be missing.
+        """
+        scores, complete = self.raw_scores(clean_query, budget_ms)
+        ids = np.flatnonzero(scores > 0)
+        if len(ids) > limit:
+            # Keep only the rows that can make the top `limit`
+            cutoff = np.partition(scores[ids], len(ids) - limit)[len(ids) - limit]
+            ids = ids[scores[ids] >= cutoff]
+        order = np.lexsort((ids, self._row_lengths[ids], -scores[ids]))
+        ids = ids[order][:limit]
+        if not len(ids):
+            return [], complete
+        
+        # Margin: the top row against the best other CPU, the rest against the top row
+        top = ids[0]
+        top_group = self._row_groups[top]
+        others = scores[self._row_groups != top_group]
+        runner_up = others.max() if len(others) else 0.0
+        results = []
+        for i in ids:
+            margin = scores[i] - (runner_up if self._row_groups[i] == top_group else scores[top])
+            results.append((int(i), calibrate_match_score(float(scores[i]), float(margin))))
+        return results, complete
+
+
+# --- Indexed SQLite search ---------------------------------------------------
+#
+# build_search_index() migrates cpus.db for catalogs too large to keep in
+# memory. IndexedCPUSource then answers the same tier queries as CPUCatalog
+# from SQLite indexes: B-tree indexes on name for the exact and prefix tiers,
+# and an FTS5 trigram table (substring matching, like LIKE '%...%') for the
+# contains and token tiers. Every FTS hit is re-checked with the original LIKE
+# so results are identical to the unindexed queries.
+
+CPU_SEARCH_BACKEND = os.environ.get('CPU_SEARCH_BACKEND', 'memory')  # 'memory' or 'sqlite'
+
+_search_index_cache = {}
+
+# LRU of get_cpu_candidates results: (db path, backend, limit, cleaned query)
+# -> (db file signature, candidates). Entries from an older cpus.db are misses.
+# Searches cut short by CPU_MATCH_BUDGET_MS are not cached.
+CPU_SEARCH_CACHE_SIZE = int(os.environ.get('CPU_SEARCH_CACHE_SIZE', 1024))
+_search_cache = OrderedDict()
+_search_cache_lock = threading.Lock()
+
+
+def clear_search_cache():
+    """Forget all cached search results."""
+    with _search_cache_lock:
+        _search_cache.clear()
+
+
+def build_search_index(db_path='cpus.db'):
+    """
+    Migrates cpus.db for indexed search. Safe to re-run (e.g. after updating the table):
+      - B-tree indexes on name and name COLLATE NOCASE (exact and LIKE 'x%' lookups)
+      - cpus_fts: external-content FTS5 trigram index over name
+    """
     conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
+    try:
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cpus_name ON cpus(name)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cpus_name_nocase ON cpus(name COLLATE NOCASE)")
+        conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS cpus_fts "
+            "USING fts5(name, content='cpus', content_rowid='rowid', tokenize='trigram')"
+        )
+        conn.execute("INSERT INTO cpus_fts(cpus_fts) VALUES('rebuild')")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def has_search_index(db_path='cpus.db'):
+    """True if build_search_index() has been run on db_path."""
+    db_path = _resolve_db_path(db_path)
+    key = (db_path, _file_signature(db_path))
+    if key not in _search_index_cache:
+        row = get_db_connection(db_path).execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'cpus_fts'"
+        ).fetchone()
+        _search_index_cache[key] = row is not None
+    return _search_index_cache[key]
+
+
+def _fts_phrase(fragment):
+    """FTS5 trigram phrase for a LIKE fragment, or None if the index can't serve it."""
+    if len(fragment) < 3 or '%' in fragment or '_' in fragment:
+        return None
+    return '"' + fragment.replace('"', '""') + '"'
+
+
+class IndexedCPUSource:
+    """
+    SQLite-backed CPU search: the tiered queries (exact, prefix, contains, tokens).
+    Without the search index it runs the plain LIKE scans.
+    """
+
+    def __init__(self, conn, indexed=True):
+        self.conn = conn
+        self.indexed = indexed
+
+    def _rows(self, sql, params):
+        metrics.DB_QUERIES.inc(query='search')
+        for row in self.conn.execute(sql, params):
+            yield dict(row)
+
+    def _fts_query(self, fragments, joiner):
+        if not self.indexed:
+            return None
+        phrases = [_fts_phrase(f) for f in fragments]
+        if not phrases or None in phrases:
+            return None
+        return f' {joiner} '.join(phrases)
+
+    def exact(self, name):
+        return list(self._rows("SELECT * FROM cpus WHERE name = ? ORDER BY rowid", (name,)))
+
+    def starts_with(self, prefix):
+        return self._rows("SELECT * FROM cpus WHERE name LIKE ? ORDER BY rowid", (f"{prefix}%",))
+
+    def contains(self, fragment):
+        return self.contains_all([fragment])
+
+    def contains_all(self, fragments):
+        like = ' AND '.join("name LIKE ?" for _ in fragments)
+        params = [f"%{f}%" for f in fragments]
+        match = self._fts_query(fragments, 'AND')
+        if match is None:
+            return self._rows(f"SELECT * FROM cpus WHERE {like} ORDER BY rowid", params)
+        return self._rows(
+            f"SELECT * FROM cpus WHERE rowid IN (SELECT rowid FROM cpus_fts WHERE cpus_fts MATCH ?) "
+            f"AND {like} ORDER BY rowid", [match] + params
+        )
+
+    def contains_any(self, fragments):
+        like = ' OR '.join("name LIKE ?" for _ in fragments)
+        params = [f"%{f}%" for f in fragments]
+        match = self._fts_query(fragments, 'OR')
+        if match is None:
+            return self._rows(f"SELECT * FROM cpus WHERE {like} ORDER BY rowid", params)
+        return self._rows(
+            f"SELECT * FROM cpus WHERE rowid IN (SELECT rowid FROM cpus_fts WHERE cpus_fts MATCH ?) "
+            f"AND ({like}) ORDER BY rowid", [match] + params
+        )
+
+
+def _search_source(db_path, backend=None):
+    backend = backend or CPU_SEARCH_BACKEND
+    if backend == 'sqlite':
+        return IndexedCPUSource(get_db_connection(db_path), indexed=has_search_index(db_path))
+    return get_cpu_catalog(db_path)
+
+
+def get_cpu_candidates(query, db_path='cpus.db', limit=20, backend=None):
+    """
+    Finds potential CPU matches in the database, best first.
+    backend: 'memory' (in-memory catalog) or 'sqlite' (indexed queries); defaults to CPU_SEARCH_BACKEND
+    Returns list of dicts: {'name', 'year', 'cores', 'threads', 'clock', 'turbo', 'passmark', 'score'}
+    
+    With the memory backend, 'score' is the calibrated 0-100 match score
+    (see CPUMatcher), and typos such as "i5-8530U" still find the CPU.
+    The sqlite backend scores its match tiers 100/90/80/60/40.
+    
+    Results are cached per cleaned query (see CPU_SEARCH_CACHE_SIZE) until the
+    database file changes; callers get their own copies of the result dicts.
+    """
+    return _search_cpu_candidates(query, db_path, limit, backend)[0]
+
+def _search_cpu_candidates(query, db_path='cpus.db', limit=20, backend=None):
+    """
+    get_cpu_candidates, also returning whether the search was complete
+    (False if the match budget cut it short; such results are not cached).
+    """
+    with metrics.stage('cpu_search'):
+        clean_query = clean_cpu_name(query)
+        backend = backend or CPU_SEARCH_BACKEND
+        resolved = _resolve_db_path(db_path)
+        signature = _file_signature(resolved)
+        key = (resolved, backend, limit, clean_query)
+        
+        cached = _search_cache.get(key)
+        hit = cached is not None and signature is not None and cached[0] == signature
+        metrics.cache_lookup('cpu_search', hit)
+        if hit:
+            with _search_cache_lock:
+                if key in _search_cache:
+                    _search_cache.move_to_end(key)
+            return [dict(c) for c in cached[1]], True
+        
+        candidates, complete = _get_cpu_candidates(clean_query, db_path, limit, backend)
+        
+        if complete and signature is not None and CPU_SEARCH_CACHE_SIZE > 0:
+            with _search_cache_lock:
+                _search_cache[key] = (signature, [dict(c) for c in candidates])
+                _search_cache.move_to_end(key)
+                while len(_search_cache) > CPU_SEARCH_CACHE_SIZE:
+                    _search_cache.popitem(last=False)
+        return candidates, complete
+
+def _get_cpu_candidates(clean_query, db_path, limit, backend):
+    source = _search_source(db_path, backend)
+    
+    # In-memory catalog: one ranked fuzzy pass (see CPUMatcher)
+    if isinstance(source, CPUCatalog):
+        candidates = []
+        matches, complete = source.match(clean_query, limit)
+        for row, score in matches:
+            d = dict(row)
+            d['score'] = score
+            candidates.append(d)
+        return candidates, complete
     
-    clean_query = clean_cpu_name(query)
+    # SQLite backend (catalogs too large to hold in memory): tiered queries
+    # with fixed scores
     candidates = []
     
     # helper to add uniques
+    # Tiers only ever append, so once `limit` candidates are collected nothing
+    # later can reach the result and the (lazy) source scans can stop early.
     seen_names = set()
-    def add_candidates(rows, score_type):
-        for row in rows:
+    def add_candidates(rows, score_type, max_rows=None):
+        for n, row in enumerate(rows):
+            if len(candidates) >= limit or n == max_rows:
+                return
             if row['name'] not in seen_names:
                 d = dict(row)
                 d['score'] = score_type
@@ -136,16 +911,13 @@ def get_cpu_candidates(query, db_path='cpus.db', limit=20):
                 seen_names.add(row['name'])
 
     # 1. Exact Match on Cleaned Name
-    cursor.execute("SELECT * FROM cpus WHERE name = ?", (clean_query,))
-    add_candidates(cursor.fetchall(), 100)
+    add_candidates(source.exact(clean_query), 100)
     
     # 2. LIKE Match (Start with)
-    cursor.execute("SELECT * FROM cpus WHERE name LIKE ?", (f"{clean_query}%",))
-    add_candidates(cursor.fetchall(), 90)
+    add_candidates(source.starts_with(clean_query), 90)
     
     # 3. LIKE Match (Contains)
-    cursor.execute("SELECT * FROM cpus WHERE name LIKE ?", (f"%{clean_query}%",))
-    add_candidates(cursor.fetchall(), 80)
+    add_candidates(source.contains(clean_query), 80)
     
     # 4. Token Match (More vague)
     # Split query into tokens, filter out common words like "Intel", "AMD", "Core" if we want, 
@@ -154,76 +926,49 @@ def get_cpu_candidates(query, db_path='cpus.db', limit=20):
     significant_tokens = [t for t in tokens if len(t) > 2 and t.lower() not in ['intel', 'amd', 'core', 'ryzen', 'cpu']]
     
     if len(candidates) < limit and significant_tokens:
-        # Try to match ANY of the significant tokens (OR logic) for broad search
-        # Or AND logic for specific search. Let's try AND logic first with relaxed constraints.
-        
         # Strategy: Match rows that contain ALL significant tokens
-        if len(significant_tokens) > 0:
-            query_parts = ["name LIKE ?" for _ in significant_tokens]
-            sql = f"SELECT * FROM cpus WHERE {' AND '.join(query_parts)} LIMIT 50"
-            params = [f"%{t}%" for t in significant_tokens]
-            cursor.execute(sql, params)
-            add_candidates(cursor.fetchall(), 60)
+        add_candidates(source.contains_all(significant_tokens), 60, max_rows=50)
             
     # 5. Even more vague: Match ANY significant token (if still few results)
     if len(candidates) < 5 and significant_tokens:
-         query_parts = ["name LIKE ?" for _ in significant_tokens]
-         sql = f"SELECT * FROM cpus WHERE {' OR '.join(query_parts)} LIMIT 50"
-         params = [f"%{t}%" for t in significant_tokens]
-         cursor.execute(sql, params)
-         add_candidates(cursor.fetchall(), 40)
-
-    conn.close()
+        add_candidates(source.contains_any(significant_tokens), 40, max_rows=50)
     
-    return candidates[:limit]
+    return candidates[:limit], True
 
-def calculate_price(specs, db_path='cpus.db', manual_passmark=None):
+def _find_cpu_row(specs, db_path, catalog=None):
     """
-    Calculates the detailed price breakdown of the computer.
-    
-    specs: dict containing:
-        - cpu_name: str (Raw string from scanner)
-        - cpu_model_name: str (Optional: Specific DB name selected by user/logic)
-        - ram_gb: float
-        - ram_type: str ('DDR3', 'DDR4', 'DDR5')
-        - drives: list of dicts [{'type': 'HDD'/'SSD'/'NVMe', 'capacity_gb': float}]
-        - gpu_price: float (manual input)
-        - os_name: str ('Windows', 'Linux', 'macOS')
-        - is_laptop: bool
-    
-    manual_passmark: float (Optional override for passmark score)
+    Finds the DB row for specs: the exact cpu_model_name if given and found,
+    otherwise the best search match for cpu_name. The row is None if nothing
+    matches (with the memory backend: with a score above CPU_MATCH_MIN_SCORE;
+    the sqlite backend's fixed tier scores aren't calibrated, so any match counts).
     
-    returns: dict with detailed price breakdown and total
+    returns: (row, complete); complete is False if the match budget cut the search short
     """
-    
-    # Resolve db path
-    if not os.path.isabs(db_path):
-        res_path = get_resource_path(db_path)
-        if os.path.exists(res_path):
-            db_path = res_path
-    
-    # Load Pricing Config
-    prices = load_prices_config()
-    
-    # 1. Determine CPU details
     db_cpu = None
+    complete = True
     
     # If a specific model name is provided (manual selection), try to load that exact one first
     if specs.get('cpu_model_name'):
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
-        c.execute("SELECT * FROM cpus WHERE name = ?", (specs['cpu_model_name'],))
-        db_cpu = c.fetchone()
-        conn.close()
+        if catalog is not None:
+            rows = catalog.exact(specs['cpu_model_name'])
+            db_cpu = rows[0] if rows else None
+        else:
+            metrics.DB_QUERIES.inc(query='cpu_by_name')
+            db_cpu = get_db_connection(db_path).execute(SQL_CPU_BY_NAME, (specs['cpu_model_name'],)).fetchone()
     
     # If no specific model or not found, try search
     if not db_cpu:
-        candidates = get_cpu_candidates(specs.get('cpu_name', ''), db_path)
-        if candidates:
+        candidates, complete = _search_cpu_candidates(specs.get('cpu_name', ''), db_path)
+        if candidates and (CPU_SEARCH_BACKEND == 'sqlite' or candidates[0]['score'] > CPU_MATCH_MIN_SCORE):
             db_cpu = candidates[0] # Best match
     
-    # Unwrap CPU details
+    return db_cpu, complete
+
+def _unwrap_cpu(db_cpu, specs, manual_passmark=None):
+    """
+    Turns a DB row (or None) into (db_name, year, cores, threads, clock, turbo, passmark),
+    with defaults for missing values and the manual passmark override applied.
+    """
     if db_cpu:
         db_name = db_cpu['name']
         year = int(db_cpu['year']) if db_cpu['year'] else 2015
@@ -251,6 +996,149 @@ def calculate_price(specs, db_path='cpus.db', manual_passmark=None):
             passmark = float(manual_passmark)
         except (ValueError, TypeError):
             pass
+    
+    return db_name, year, cores, threads, clock, turbo, passmark
+
+def _ram_multiplier(prices, ram_type):
+    ram_multiplier = prices.get('RAM_DEFAULT_MULT', 2.5)
+    rtype = ram_type.lower()
+    if 'ddr3' in rtype: ram_multiplier = prices.get('RAM_DDR3_MULT', 1.5)
+    elif 'ddr4' in rtype: ram_multiplier = prices.get('RAM_DDR4_MULT', 2.5)
+    elif 'ddr5' in rtype: ram_multiplier = prices.get('RAM_DDR5_MULT', 6.0)
+    return ram_multiplier
+
+def _drive_multiplier(prices, drive_type):
+    dtype = drive_type.lower()
+    d_mult = prices.get('DRIVE_DEFAULT_PER_GB', 0.08)
+    if 'hdd' in dtype: d_mult = prices.get('DRIVE_HDD_PER_GB', 0.02)
+    elif 'nvme' in dtype: d_mult = prices.get('DRIVE_NVME_PER_GB', 0.1)
+    elif 'ssd' in dtype: d_mult = prices.get('DRIVE_SSD_PER_GB', 0.08)
+    return d_mult
+
+def _os_multiplier(prices, specs):
+    os_name = specs['os_name'].lower()
+    
+    os_mult = prices.get('OS_WINDOWS_MULT', 1.0) # Default
+    
+    # Check for explicit price type first (new method)
+    if 'os_price_type' in specs:
+        ptype = specs['os_price_type']
+        if ptype == 'Linux':
+            os_mult = prices.get('OS_LINUX_MULT', 0.85)
+        elif ptype == 'macOS':
+            os_mult = prices.get('OS_MACOS_MULT', 1.2)
+        elif ptype == 'Windows' or ptype == 'Other':
+            os_mult = prices.get('OS_WINDOWS_MULT', 1.0)
+    else:
+        # Fallback to string matching (old method)
+        if 'linux' in os_name or 'ubuntu' in os_name or 'fedora' in os_name or 'debian' in os_name or 'pop' in os_name or 'mint' in os_name:
+            os_mult = prices.get('OS_LINUX_MULT', 0.85)
+        elif 'mac' in os_name or 'macos' in os_name:
+            os_mult = prices.get('OS_MACOS_MULT', 1.2)
+        elif 'windows' in os_name or 'microsoft' in os_name:
+            os_mult = prices.get('OS_WINDOWS_MULT', 1.0)
+    return os_mult
+
+# LRU of calculate_price results: canonical (specs, manual passmark, db path)
+# -> (prices.txt version, cpus.db signature, quote). An entry priced under an
+# older config or database is a miss and is replaced. Quotes whose CPU search
+# was cut short by CPU_MATCH_BUDGET_MS are not memoized.
+PRICE_QUOTE_CACHE_SIZE = int(os.environ.get('PRICE_QUOTE_CACHE_SIZE', 1024))
+_quote_cache = OrderedDict()
+_quote_cache_lock = threading.Lock()
+
+
+def _quote_key(specs, db_path, manual_passmark):
+    """
+    Canonical memo key for a quote. cpu_name is reduced to its cleaned form,
+    since that is all the CPU lookup uses, with the same 'Unknown' default the
+    not-found cpu_model is built from.
+    """
+    canonical = dict(specs)
+    canonical['cpu_name'] = clean_cpu_name(specs.get('cpu_name', 'Unknown'))
+    return json.dumps([canonical, manual_passmark, db_path], sort_keys=True,
+                      separators=(',', ':'), default=str)
+
+
+def _copy_quote(quote):
+    """Copy of a calculate_price result, so callers can't modify a cached one."""
+    return {
+        'final_price': quote['final_price'],
+        'breakdown': dict(quote['breakdown']),
+        'specs_used': dict(quote['specs_used']),
+    }
+
+
+def clear_price_cache():
+    """Forget all memoized quotes."""
+    with _quote_cache_lock:
+        _quote_cache.clear()
+
+
+def calculate_price(specs, db_path='cpus.db', manual_passmark=None):
+    """
+    Calculates the detailed price breakdown of the computer.
+    
+    specs: dict containing:
+        - cpu_name: str (Raw string from scanner)
+        - cpu_model_name: str (Optional: Specific DB name selected by user/logic)
+        - ram_gb: float
+        - ram_type: str ('DDR3', 'DDR4', 'DDR5')
+        - drives: list of dicts [{'type': 'HDD'/'SSD'/'NVMe', 'capacity_gb': float}]
+        - gpu_price: float (manual input)
+        - os_name: str ('Windows', 'Linux', 'macOS')
+        - is_laptop: bool
+    
+    manual_passmark: float (Optional override for passmark score)
+    
+    returns: dict with detailed price breakdown and total
+    
+    Quotes are memoized (see PRICE_QUOTE_CACHE_SIZE) on the normalized specs
+    until prices.txt or the database file changes; callers get their own copy.
+    """
+    
+    db_path = _resolve_db_path(db_path)
+    
+    if PRICE_QUOTE_CACHE_SIZE <= 0:
+        return _calculate_price(specs, db_path, manual_passmark)[0]
+    
+    try:
+        key = _quote_key(specs, db_path, manual_passmark)
+    except (TypeError, ValueError):
+        return _calculate_price(specs, db_path, manual_passmark)[0]
+    versions = (get_prices_config_version(), _file_signature(db_path))
+    
+    cached = _quote_cache.get(key)
+    hit = cached is not None and versions[1] is not None and cached[0] == versions
+    metrics.cache_lookup('price_quote', hit)
+    if hit:
+        with _quote_cache_lock:
+            if key in _quote_cache:
+                _quote_cache.move_to_end(key)
+        return _copy_quote(cached[1])
+    
+    quote, complete = _calculate_price(specs, db_path, manual_passmark)
+    
+    if complete and versions[1] is not None:
+        with _quote_cache_lock:
+            _quote_cache[key] = (versions, _copy_quote(quote))
+            _quote_cache.move_to_end(key)
+            while len(_quote_cache) > PRICE_QUOTE_CACHE_SIZE:
+                _quote_cache.popitem(last=False)
+    return quote
+
+def _calculate_price(specs, db_path, manual_passmark):
+    """calculate_price without the memo: (quote, whether the CPU search was complete)."""
+    # Load Pricing Config
+    with metrics.stage('config_load'):
+        prices = load_prices_config()
+    
+    # 1. Determine CPU details
+    with metrics.stage('cpu_lookup'):
+        db_cpu, complete = _find_cpu_row(specs, db_path)
+        db_name, year, cores, threads, clock, turbo, passmark = _unwrap_cpu(db_cpu, specs, manual_passmark)
+
+    compute_start = time.perf_counter()
 
     # Pricing Logic (Using Config)
     # double yearPrice = (build.cpu.year - 2012) * ((laptop) ? 6 : 10);
@@ -272,23 +1160,14 @@ def calculate_price(specs, db_path='cpus.db', manual_passmark=None):
     if turbo > 100: turbo = turbo / 1000.0
     
     # RAM Price
-    ram_multiplier = prices.get('RAM_DEFAULT_MULT', 2.5)
-    rtype = specs.get('ram_type', '').lower()
-    if 'ddr3' in rtype: ram_multiplier = prices.get('RAM_DDR3_MULT', 1.5)
-    elif 'ddr4' in rtype: ram_multiplier = prices.get('RAM_DDR4_MULT', 2.5)
-    elif 'ddr5' in rtype: ram_multiplier = prices.get('RAM_DDR5_MULT', 6.0)
-    
+    ram_multiplier = _ram_multiplier(prices, specs.get('ram_type', ''))
     ram_price = specs['ram_gb'] * ram_multiplier
 
     # Drive Price
     drive_price = 0
     for drive in specs['drives']:
         cap = drive['capacity_gb']
-        dtype = drive['type'].lower()
-        d_mult = prices.get('DRIVE_DEFAULT_PER_GB', 0.08)
-        if 'hdd' in dtype: d_mult = prices.get('DRIVE_HDD_PER_GB', 0.02)
-        elif 'nvme' in dtype: d_mult = prices.get('DRIVE_NVME_PER_GB', 0.1)
-        elif 'ssd' in dtype: d_mult = prices.get('DRIVE_SSD_PER_GB', 0.08)
+        d_mult = _drive_multiplier(prices, drive['type'])
         drive_price += cap * d_mult
 
     gpu_price = specs.get('gpu_price', 0.0)
@@ -296,28 +1175,7 @@ def calculate_price(specs, db_path='cpus.db', manual_passmark=None):
     # OS Modifier and Temp Calc
     temp = (((core_price + thread_price) * turbo) + year_price) + ram_price + drive_price + gpu_price
     
-    os_modifier = 0
-    os_name = specs['os_name'].lower()
-    
-    os_mult = prices.get('OS_WINDOWS_MULT', 1.0) # Default
-    
-    # Check for explicit price type first (new method)
-    if 'os_price_type' in specs:
-        ptype = specs['os_price_type']
-        if ptype == 'Linux':
-            os_mult = prices.get('OS_LINUX_MULT', 0.85)
-        elif ptype == 'macOS':
-            os_mult = prices.get('OS_MACOS_MULT', 1.2)
-        elif ptype == 'Windows' or ptype == 'Other':
-            os_mult = prices.get('OS_WINDOWS_MULT', 1.0)
-    else:
-        # Fallback to string matching (old method)
-        if 'linux' in os_name or 'ubuntu' in os_name or 'fedora' in os_name or 'debian' in os_name or 'pop' in os_name or 'mint' in os_name:
-            os_mult = prices.get('OS_LINUX_MULT', 0.85)
-        elif 'mac' in os_name or 'macos' in os_name:
-            os_mult = prices.get('OS_MACOS_MULT', 1.2)
-        elif 'windows' in os_name or 'microsoft' in os_name:
-            os_mult = prices.get('OS_WINDOWS_MULT', 1.0)
+    os_mult = _os_multiplier(prices, specs)
         
     # Logic: modifier is the difference from temp
     # If os_mult is 0.85 (15% off), price is temp * 0.85. 
@@ -339,7 +1197,9 @@ def calculate_price(specs, db_path='cpus.db', manual_passmark=None):
     base_fee = prices.get('BASE_FEE', 40.0)
     final_price = cpu_price + ram_price + drive_price + gpu_price + os_modifier + base_fee
 
-    return {
+    metrics.STAGE_SECONDS.observe(time.perf_counter() - compute_start, stage='price_compute')
+
+    quote = {
         'final_price': round(final_price),
         'breakdown': {
             'cpu_model': db_name,
@@ -359,3 +1219,110 @@ def calculate_price(specs, db_path='cpus.db', manual_passmark=None):
             'passmark': passmark
         }
     }
+    return quote, complete
+
+def calculate_prices(specs_list, db_path='cpus.db', manual_passmarks=None):
+    """
+    Bulk version of calculate_price for repricing many machines at once.
+    
+    specs_list: list of spec dicts (same format as calculate_price)
+    manual_passmarks: optional list aligned with specs_list (None = no override)
+    
+    CPUs are resolved in one pass (once per distinct CPU; against the in-memory
+    catalog unless CPU_SEARCH_BACKEND is 'sqlite'), then every price component is computed as NumPy column
+    operations in the same order as calculate_price, so results are identical.
+    
+    returns: list of dicts, one per spec, exactly as calculate_price returns them
+    """
+    n = len(specs_list)
+    if n == 0:
+        return []
+    if manual_passmarks is None:
+        manual_passmarks = [None] * n
+    
+    db_path = _resolve_db_path(db_path)
+    prices = load_prices_config()
+    catalog = get_cpu_catalog(db_path) if CPU_SEARCH_BACKEND != 'sqlite' else None
+    
+    # 1. Resolve CPUs and per-row categorical multipliers
+    rows_by_cpu = {}
+    cpus = []
+    for specs, manual_passmark in zip(specs_list, manual_passmarks):
+        key = (specs.get('cpu_model_name') or None, specs.get('cpu_name', ''))
+        if key not in rows_by_cpu:
+            rows_by_cpu[key] = _find_cpu_row(specs, db_path, catalog)[0]
+        cpus.append(_unwrap_cpu(rows_by_cpu[key], specs, manual_passmark))
+    
+    db_names, years, cores, threads, clocks, turbos, passmarks = zip(*cpus)
+    year = np.array(years, dtype=np.float64)
+    cores = np.array(cores, dtype=np.float64)
+    threads = np.array(threads, dtype=np.float64)
+    turbo = np.array(turbos, dtype=np.float64)
+    passmark = np.array(passmarks, dtype=np.float64)
+    
+    laptop = np.array([bool(specs.get('is_laptop', False)) for specs in specs_list])
+    ram_gb = np.array([specs['ram_gb'] for specs in specs_list], dtype=np.float64)
+    ram_multiplier = np.array([_ram_multiplier(prices, specs.get('ram_type', '')) for specs in specs_list], dtype=np.float64)
+    gpu_price = np.array([specs.get('gpu_price', 0.0) for specs in specs_list], dtype=np.float64)
+    os_mult = np.array([_os_multiplier(prices, specs) for specs in specs_list], dtype=np.float64)
+    
+    # Drives as an (n, max_drives) grid, zero-padded
+    max_drives = max(len(specs['drives']) for specs in specs_list)
+    drive_caps = np.zeros((n, max_drives))
+    drive_mults = np.zeros((n, max_drives))
+    for i, specs in enumerate(specs_list):
+        for j, drive in enumerate(specs['drives']):
+            drive_caps[i, j] = drive['capacity_gb']
+            drive_mults[i, j] = _drive_multiplier(prices, drive['type'])
+    
+    # 2. Column arithmetic (mirrors calculate_price term by term)
+    year_base = prices.get('CPU_YEAR_BASE', 2012)
+    year_mult = np.where(laptop, prices.get('CPU_YEAR_LAPTOP_MULT', 6), prices.get('CPU_YEAR_DESKTOP_MULT', 10))
+    year_price = (year - year_base) * year_mult
+    
+    core_price = cores * (year_price * prices.get('CPU_CORE_MULT', 0.025))
+    thread_price = (threads - cores) * prices.get('CPU_THREAD_EXCESS_PRICE', 0.75)
+    
+    turbo = np.where(turbo > 100, turbo / 1000.0, turbo)
+    
+    ram_price = ram_gb * ram_multiplier
+    
+    # Accumulate drive by drive so the summation order matches the scalar loop
+    drive_price = np.zeros(n)
+    for j in range(max_drives):
+        drive_price = drive_price + drive_caps[:, j] * drive_mults[:, j]
+    
+    temp = (((core_price + thread_price) * turbo) + year_price) + ram_price + drive_price + gpu_price
+    os_modifier = (os_mult * temp) - temp
+    
+    base_cpu_calc = ((core_price + thread_price) * turbo) + year_price
+    cpu_price = np.where(laptop, base_cpu_calc * (passmark / 5813.0), base_cpu_calc * ((passmark / 9530.0) * 0.67))
+    
+    base_fee = prices.get('BASE_FEE', 40.0)
+    final_price = cpu_price + ram_price + drive_price + gpu_price + os_modifier + base_fee
+    
+    # 3. Back to the calculate_price result shape
+    results = []
+    for i in range(n):
+        raw_turbo = turbos[i]
+        results.append({
+            'final_price': round(float(final_price[i])),
+            'breakdown': {
+                'cpu_model': db_names[i],
+                'cpu_price': round(float(cpu_price[i])),
+                'ram_price': round(float(ram_price[i])),
+                'drive_price': round(float(drive_price[i])),
+                'gpu_price': round(float(gpu_price[i])),
+                'os_modifier': round(float(os_modifier[i])),
+                'base_fee': base_fee
+            },
+            'specs_used': {
+                'year': years[i],
+                'cores': cpus[i][2],
+                'threads': cpus[i][3],
+                'turbo': raw_turbo / 1000.0 if raw_turbo > 100 else raw_turbo,
+                'clock': clocks[i],
+                'passmark': passmarks[i]
+            }
+        })
+    return results
@@ -3,6 +3,7 @@
 // Global state
 let selectedCPU = null;
 let currentPrice = 0;
+let currentQuoteToken = null;
 
 // DOM Elements
 const form = document.getElementById('buildsheet-form');
@@ -193,6 +194,8 @@ async function calculatePrice() {
 
 function displayPrice(result) {
     currentPrice = result.final_price;
+    // Lets generate reuse this quote instead of pricing the machine again
+    currentQuoteToken = result.quote_token || null;
 
     document.getElementById('final_price').textContent = result.final_price;
     document.getElementById('price_cpu').textContent = result.breakdown.cpu_price;
@@ -254,11 +257,16 @@ async function handleFormSubmit(e) {
 
     const generateBtn = document.getElementById('generate_btn');
     const originalText = generateBtn.textContent;
-    generateBtn.textContent = 'Generating PDF...';
+    generateBtn.textContent = 'Queueing PDF...';
     generateBtn.disabled = true;
 
     try {
         const formData = collectFullFormData();
+        // Render in the background; the form is free again as soon as the job is queued
+        formData.async = true;
+        if (currentQuoteToken) {
+            formData.quote_token = currentQuoteToken;
+        }
 
         const response = await fetch('/api/generate_buildsheet', {
             method: 'POST',
@@ -268,18 +276,14 @@ async function handleFormSubmit(e) {
             body: JSON.stringify(formData)
         });
 
-        if (response.ok) {
-            // Download the PDF
+        if (response.status === 202) {
+            const job = await response.json();
+            showSuccess('Build sheet queued - it will download when ready');
+            waitForBuildSheet(job);
+        } else if (response.ok) {
+            // Server rendered it inline
             const blob = await response.blob();
-            const url = window.URL.createObjectURL(blob);
-            const a = document.createElement('a');
-            a.href = url;
-            a.download = `BuildSheet_${formData.model.replace(/\s+/g, '_')}_${formData.serial}.pdf`;
-            document.body.appendChild(a);
-            a.click();
-            window.URL.revokeObjectURL(url);
-            document.body.removeChild(a);
-
+            downloadURL(window.URL.createObjectURL(blob), `BuildSheet_${formData.model.replace(/\s+/g, '_')}_${formData.serial}.pdf`, true);
             showSuccess('Build sheet generated successfully!');
         } else {
             const error = await response.json();
@@ -294,6 +298,47 @@ async function handleFormSubmit(e) {
     }
 }
 
+// Poll a queued build sheet job and download the PDF once it is done
+async function waitForBuildSheet(job, timeoutMs = 120000) {
+    const started = Date.now();
+    let delay = 300;
+
+    try {
+        while (Date.now() - started < timeoutMs) {
+            await new Promise(resolve => setTimeout(resolve, delay));
+            delay = Math.min(delay * 1.5, 2000);
+
+            const response = await fetch(job.status_url);
+            const status = await response.json();
+
+            if (status.status === 'done') {
+                downloadURL(job.download_url, status.filename, false);
+                showSuccess('Build sheet generated successfully!');
+                return;
+            }
+            if (status.status === 'failed' || !response.ok) {
+                throw new Error(status.error || 'Rendering failed');
+            }
+        }
+        throw new Error('Timed out waiting for the PDF');
+    } catch (error) {
+        console.error('Build sheet job error:', error);
+        showError('Failed to generate build sheet: ' + error.message);
+    }
+}
+
+function downloadURL(url, filename, revoke) {
+    const a = document.createElement('a');
+    a.href = url;
+    a.download = filename;
+    document.body.appendChild(a);
+    a.click();
+    if (revoke) {
+        window.URL.revokeObjectURL(url);
+    }
+    document.body.removeChild(a);
+}
+
 function collectFullFormData() {
     const mode = cpuEntryMode.value;
     const data = {
@@ -0,0 +1,63 @@
+"""
+Checks for the Bulk Intake CLI
+
+A malformed record in the middle of an inventory must fail on its own
+manifest row while the rest of the batch is priced, and the run must
+checkpoint past it so a resume doesn't redo (or trip over) it again.
+
+Usage:
+  python -m pytest test_bulk_intake.py
+"""
+
+import csv
+import json
+import os
+
+import bulk_intake
+
+MACHINE = {
+    'model': 'Dell Latitude 5490',
+    'cpu_name': 'Intel Core i5-8350U',
+    'ram_gb': 8,
+    'ram_type': 'DDR4',
+    'drives': [{'capacity': 256, 'type': 'SSD'}],
+    'os_name': 'Windows 11 Pro',
+    'is_laptop': True,
+}
+
+
+def _write_inventory(path, records):
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+
+
+def _manifest(out_dir):
+    with open(os.path.join(out_dir, bulk_intake.MANIFEST_FILE), newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def test_malformed_record_fails_alone(tmp_path):
+    records = [dict(MACHINE, serial=f'SN{i}') for i in range(5)]
+    records[2]['price'] = '$250'
+    records[3]['ram_gb'] = 'lots'
+    inventory = tmp_path / 'inventory.jsonl'
+    _write_inventory(inventory, records)
+    out_dir = str(tmp_path / 'out')
+
+    summary = bulk_intake.run_intake(str(inventory), out_dir, chunk_size=4, render=False, quiet=True)
+
+    rows = _manifest(out_dir)
+    assert [row['record'] for row in rows] == ['1', '2', '3', '4', '5']
+    assert [row['status'] for row in rows] == ['ok', 'ok', 'failed', 'failed', 'ok']
+    assert '$250' in rows[2]['error']
+    assert 'lots' in rows[3]['error']
+    assert (summary['ok'], summary['failed']) == (3, 2)
+
+    with open(os.path.join(out_dir, bulk_intake.CHECKPOINT_FILE)) as f:
+        assert json.load(f)['next_record'] == 6
+
+    # Resuming finds nothing left to do and leaves the manifest alone
+    summary = bulk_intake.run_intake(str(inventory), out_dir, chunk_size=4, render=False, quiet=True)
+    assert summary['processed_this_run'] == 0
+    assert len(_manifest(out_dir)) == 5
@@ -1,7 +1,8 @@
 """
 Quick Test Script for PDF Coordinate Adjustments
 
-This script generates a test PDF with sample data after you modify coordinates in pdf_coordinates.py.
+This script generates a test PDF with sample data after you modify coordinates in pdf_layout.json
+(by hand or with the calibration page at /calibrate).
 Just run this script to see your changes immediately!
 
 Usage:
@@ -41,7 +42,7 @@ test_data = {
 print("=" * 60)
 print("PDF COORDINATE TEST")
 print("=" * 60)
-print("\n1. Edit coordinates in: pdf_coordinates.py")
+print("\n1. Edit coordinates in: pdf_layout.json")
 print("2. Run this script to generate: test_output.pdf")
 print("3. Open test_output.pdf to check alignment")
 print("4. Repeat until perfect!\n")
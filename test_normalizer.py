@@ -0,0 +1,101 @@
+"""
+Equivalence Check for the CPU Name Normalizer
+
+pricing.clean_cpu_name cleans names in a single compiled pass. This script
+checks it (and the bulk pricing.clean_cpu_names) against the original
+six-pass implementation, kept verbatim below, on:
+  - every name in cpus.db, as stored and upper-cased
+  - the benchmark corpus of raw scanner strings
+  - seeded random strings built from the tokens the patterns look for
+
+Usage:
+  python test_normalizer.py [--fuzz 200000] [--seed 0]
+
+Also runs under pytest.
+"""
+
+import argparse
+import random
+import re
+import sqlite3
+import sys
+import time
+
+import pricing
+
+FUZZ_TOKENS = [
+    '(R)', '(r)', '(TM)', '(tm)', '(Tm)', ' CPU', ' cpu', 'CPU ', 'CpU', ' Processor', 'Processor',
+    ' processor ', 'PROCESSOR', 'Proc', 'essor', ' 12-Core', '99-CORE', '-Core', '12', '9', '1', '-',
+    '-Thread', ' 8-thread', '-tHrEaD', 'Core', 'Thread', '(', ')', 'T', 'M', 'R', 'C', 'P', 'U',
+    '@', ' ', ' ', '  ', '\t', '\n', ' ', '\xa0', 'x', 'i7-7600U', 'ſ',
+]
+
+
+def original_clean_cpu_name(name):
+    """clean_cpu_name as it was before the single-pass rewrite."""
+    if not name: return ""
+    # Remove (R), (TM), CPU, Processor
+    name = re.sub(r'\(R\)', '', name, flags=re.IGNORECASE)
+    name = re.sub(r'\(TM\)', '', name, flags=re.IGNORECASE)
+    name = re.sub(r'\s+CPU\s*', '', name, flags=re.IGNORECASE)
+    name = re.sub(r'\s+Processor\s*', '', name, flags=re.IGNORECASE)
+    # Remove core/thread counts (e.g. 12-Core, 16-Thread)
+    name = re.sub(r'\s+\d+-Core', '', name, flags=re.IGNORECASE)
+    name = re.sub(r'\s+\d+-Thread', '', name, flags=re.IGNORECASE)
+    # Remove clock speed info if present (e.g. @ 2.80GHz)
+    name = name.split('@')[0]
+    # Remove extra spaces
+    return " ".join(name.split())
+
+
+def build_corpus(db_path='cpus.db', fuzz=200000, seed=0):
+    conn = sqlite3.connect(pricing._resolve_db_path(db_path))
+    try:
+        names = [row[0] for row in conn.execute("SELECT name FROM cpus") if row[0]]
+    finally:
+        conn.close()
+
+    import benchmark
+    corpus = names + [n.upper() for n in names] + benchmark.build_search_corpus(db_path, size=2000)
+
+    rng = random.Random(seed)
+    for _ in range(fuzz):
+        corpus.append(''.join(rng.choice(FUZZ_TOKENS) for _ in range(rng.randint(0, 16))))
+    return corpus
+
+
+def find_mismatches(corpus):
+    mismatches = [(s, original_clean_cpu_name(s), pricing.clean_cpu_name(s)) for s in corpus
+                  if pricing.clean_cpu_name(s) != original_clean_cpu_name(s)]
+    if pricing.clean_cpu_names(corpus) != [original_clean_cpu_name(s) for s in corpus]:
+        mismatches.append(('<clean_cpu_names>', 'bulk result', 'differs'))
+    return mismatches
+
+
+def test_clean_cpu_name_matches_original():
+    assert find_mismatches(build_corpus(fuzz=20000)) == []
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check clean_cpu_name against the original implementation.")
+    parser.add_argument("--fuzz", type=int, default=200000, help="Random strings to check (default 200000)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    corpus = build_corpus(fuzz=args.fuzz, seed=args.seed)
+    mismatches = find_mismatches(corpus)
+    for raw, expected, got in mismatches[:20]:
+        print(f"MISMATCH {raw!r}: expected {expected!r}, got {got!r}")
+
+    # Timing on the realistic part of the corpus (no fuzz strings)
+    realistic = corpus[:len(corpus) - args.fuzz]
+    for label, func in (("original", lambda: [original_clean_cpu_name(s) for s in realistic]),
+                        ("clean_cpu_name", lambda: [pricing.clean_cpu_name(s) for s in realistic]),
+                        ("clean_cpu_names", lambda: pricing.clean_cpu_names(realistic))):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        print(f"{label:<16} {len(realistic) / elapsed:>12,.0f} names/s")
+
+    print(f"\n{len(corpus)} strings checked, {len(mismatches)} mismatches")
+    sys.exit(1 if mismatches else 0)
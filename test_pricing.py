@@ -0,0 +1,165 @@
+"""
+Checks for price calculation (pricing)
+
+  - CPU matching: vague queries must not be priced as an arbitrary CPU, but
+    a model number alone, or any catalog name as stored, must be found
+  - calculate_prices (bulk, NumPy columns) must return exactly what
+    calculate_price returns for each machine, over a grid of specs
+  - caching: searches and quotes cut short by CPU_MATCH_BUDGET_MS are not
+    kept, and quote memo keys keep apart specs that price differently
+
+Usage:
+  python -m pytest test_pricing.py
+"""
+
+import itertools
+
+import pytest
+
+import pricing
+from warmup import SAMPLE_SPECS
+
+
+@pytest.mark.parametrize('query', ['i5', 'Ryzen 5', 'Core i7'])
+def test_bare_family_name_is_not_found(query):
+    # Many different CPUs fit equally well; guessing one would misprice the machine
+    scores = [c['score'] for c in pricing.get_cpu_candidates(query, limit=5)]
+    assert scores and max(scores) <= pricing.CPU_MATCH_MIN_SCORE
+
+    specs = dict(SAMPLE_SPECS, cpu_name=query)
+    assert pricing.calculate_price(specs)['breakdown']['cpu_model'] == f"{query} (Not Found)"
+    assert pricing.calculate_prices([specs])[0]['breakdown']['cpu_model'] == f"{query} (Not Found)"
+
+
+def test_model_number_is_found():
+    specs = dict(SAMPLE_SPECS, cpu_name='i5 8350U')
+    assert pricing.calculate_price(specs)['breakdown']['cpu_model'] == 'Intel Core i5-8350U @ 1.70GHz'
+
+
+@pytest.mark.parametrize('query, model', [
+    ('i7-1165G7', 'i7-1165G7'),  # catalog has "Intel i7-1165G7" and "Intel Core i7-1165G7 @ 2.80GHz"
+    ('Ultra 5 115U', '115U'),
+    ('RK3368', 'RK3368'),
+])
+def test_model_number_alone_is_found(query, model):
+    quote = pricing.calculate_price(dict(SAMPLE_SPECS, cpu_name=query))
+    assert not quote['breakdown']['cpu_model'].endswith('(Not Found)')
+    assert model.lower() in quote['breakdown']['cpu_model'].lower()
+
+
+def _identity(name):
+    return pricing._cpu_identity(pricing._match_tokens(pricing.clean_cpu_name(name)))
+
+
+def test_every_catalog_name_finds_itself():
+    misses = []
+    for row in pricing.get_cpu_catalog().rows:
+        if not row['name']:
+            continue
+        candidates = pricing.get_cpu_candidates(row['name'], limit=1)
+        top = candidates[0] if candidates else None
+        if top is None or top['score'] <= pricing.CPU_MATCH_MIN_SCORE or _identity(top['name']) != _identity(row['name']):
+            misses.append((row['name'], top and (top['name'], top['score'])))
+    assert misses == []
+
+
+def test_search_cut_short_by_budget_is_not_cached(monkeypatch):
+    # With no time for the typo check the typo finds nothing; that must not stick
+    pricing.clear_search_cache()
+    monkeypatch.setattr(pricing, 'CPU_MATCH_BUDGET_MS', 0)
+    assert pricing.get_cpu_candidates('i5-8530U', limit=1) == []
+    monkeypatch.setattr(pricing, 'CPU_MATCH_BUDGET_MS', 25)
+    candidates = pricing.get_cpu_candidates('i5-8530U', limit=1)
+    assert candidates and candidates[0]['name'] == 'Intel Core i5-8350U @ 1.70GHz'
+
+
+def test_quote_cut_short_by_budget_is_not_memoized(monkeypatch):
+    pricing.clear_search_cache()
+    pricing.clear_price_cache()
+    specs = dict(SAMPLE_SPECS, cpu_name='i5-8530U')
+    monkeypatch.setattr(pricing, 'CPU_MATCH_BUDGET_MS', 0)
+    assert pricing.calculate_price(specs)['breakdown']['cpu_model'] == 'i5-8530U (Not Found)'
+    monkeypatch.setattr(pricing, 'CPU_MATCH_BUDGET_MS', 25)
+    assert pricing.calculate_price(specs)['breakdown']['cpu_model'] == 'Intel Core i5-8350U @ 1.70GHz'
+
+
+def test_missing_and_empty_cpu_name_quotes_are_memoized_apart():
+    pricing.clear_price_cache()
+    specs = {k: v for k, v in SAMPLE_SPECS.items() if k not in ('cpu_name', 'cpu_model_name')}
+    assert pricing.calculate_price(specs)['breakdown']['cpu_model'] == 'Unknown (Not Found)'
+    assert pricing.calculate_price(dict(specs, cpu_name=''))['breakdown']['cpu_model'] == ' (Not Found)'
+
+
+def test_sqlite_tier_scores_are_not_thresholded(monkeypatch):
+    # Only the "any significant token" tier (fixed score 40) matches this
+    monkeypatch.setattr(pricing, 'CPU_SEARCH_BACKEND', 'sqlite')
+    candidates = pricing.get_cpu_candidates('Zqxv 8350U', limit=1)
+    assert candidates and candidates[0]['score'] == 40
+    quote = pricing.calculate_price(dict(SAMPLE_SPECS, cpu_name='Zqxv 8350U'))
+    assert quote['breakdown']['cpu_model'] == candidates[0]['name']
+
+
+def test_catalog_exact_lookup_is_case_sensitive():
+    catalog = pricing.get_cpu_catalog()
+    name = catalog.rows[0]['name']
+    assert catalog.exact(name) == [catalog.rows[0]]
+    assert catalog.exact(name.upper()) == [] or name == name.upper()
+
+
+GRID_CPUS = [
+    {'cpu_name': 'Intel Core i5-8350U'},
+    {'cpu_name': 'AMD Ryzen 7 5800X 8-Core Processor'},
+    {'cpu_name': 'Intel(R) Core(TM)2 Duo CPU E8400 @ 3.00GHz'},
+    {'cpu_name': 'Intel Core i7-7600U', 'cpu_model_name': 'Intel Core i7-7600U @ 2.80GHz'},
+    {'cpu_name': 'Zqxv Wombat'},  # not in cpus.db
+]
+GRID_RAM = [(4, 'DDR3'), (16, 'DDR4'), (32, 'DDR5'), (8, ''), (12.5, 'LPDDR4X')]
+GRID_DRIVES = [
+    [],
+    [{'type': 'SSD', 'capacity_gb': 256.0}],
+    [{'type': 'HDD', 'capacity_gb': 1000.0}, {'type': 'NVMe SSD', 'capacity_gb': 512.0}],
+    [{'type': 'eMMC', 'capacity_gb': 64.0}],
+]
+GRID_OS = [
+    {'os_name': 'Windows 11 Pro', 'os_price_type': 'Windows'},
+    {'os_name': 'Linux Mint 21', 'os_price_type': 'Linux'},
+    {'os_name': 'macOS Ventura', 'os_price_type': 'macOS'},
+    {'os_name': 'Ubuntu 22.04'},  # no price type: matched on the name
+    {'os_name': 'ChromeOS Flex'},
+]
+
+
+def _spec_grid():
+    for cpu, (ram_gb, ram_type), drives, os_fields, is_laptop, gpu_price in itertools.product(
+            GRID_CPUS, GRID_RAM, GRID_DRIVES, GRID_OS, (True, False), (0.0, 35.5)):
+        specs = dict(cpu, ram_gb=ram_gb, ram_type=ram_type, drives=drives, is_laptop=is_laptop, gpu_price=gpu_price)
+        specs.update(os_fields)
+        yield specs
+
+
+def test_calculate_prices_matches_calculate_price():
+    specs_list = list(_spec_grid())
+    # A manual passmark on every seventh machine, as the form sends for custom CPUs
+    passmarks = [4321.0 if i % 7 == 0 else None for i in range(len(specs_list))]
+
+    bulk = pricing.calculate_prices(specs_list, manual_passmarks=passmarks)
+    single = [pricing.calculate_price(specs, manual_passmark=passmark)
+              for specs, passmark in zip(specs_list, passmarks)]
+
+    assert len(bulk) == len(specs_list)
+    for specs, got, expected in zip(specs_list, bulk, single):
+        assert got == expected, specs
+    assert 'Zqxv Wombat (Not Found)' in {quote['breakdown']['cpu_model'] for quote in bulk}
+
+
+def test_calculate_prices_without_drives():
+    specs_list = [dict(SAMPLE_SPECS, drives=[]), dict(SAMPLE_SPECS, drives=[], is_laptop=False)]
+    assert pricing.calculate_prices(specs_list) == [pricing.calculate_price(specs) for specs in specs_list]
+
+
+def test_calculate_prices_sqlite_backend_skips_the_catalog(monkeypatch):
+    monkeypatch.setattr(pricing, 'CPU_SEARCH_BACKEND', 'sqlite')
+    monkeypatch.setattr(pricing, 'get_cpu_catalog', None)  # must not be called
+    pricing.clear_price_cache()
+    specs_list = [dict(SAMPLE_SPECS, **cpu) for cpu in GRID_CPUS]
+    assert pricing.calculate_prices(specs_list) == [pricing.calculate_price(specs) for specs in specs_list]
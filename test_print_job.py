@@ -0,0 +1,116 @@
+"""
+Checks for combined print jobs (pdf_filler.PrintJob)
+
+PrintJob writes the PDF itself on top of PyPDF2's private writer internals
+(see requirements.txt), so these reopen its output with a strict reader, and
+check that a batch which fails part way through is never served or archived
+as a complete file.
+
+Usage:
+  python -m pytest test_print_job.py
+"""
+
+import io
+import os
+
+import pytest
+from PyPDF2 import PdfReader
+
+import app as app_module
+import pdf_filler
+from warmup import SAMPLE_SHEET
+
+MACHINE = {
+    'model': 'Dell Latitude 5490',
+    'cpu_name': 'Intel Core i5-8350U',
+    'ram_gb': 8,
+    'ram_type': 'DDR4',
+    'drives': [{'capacity': 256, 'type': 'SSD'}],
+    'os_name': 'Windows 11 Pro',
+    'is_laptop': True,
+    'price': 199,
+}
+
+
+def _sheets(count):
+    return [dict(SAMPLE_SHEET, serial=f'PJ{i:04d}', model=f'Model {i}') for i in range(count)]
+
+
+@pytest.mark.parametrize('compact', [True, False])
+def test_print_job_reopens_strictly(compact):
+    filler = pdf_filler.BuildSheetPDFFiller(compact=compact)
+    sheets = _sheets(5)
+    output = io.BytesIO()
+    job = filler.print_job(output)
+    for data in sheets:
+        job.add_sheet(data)
+    job.close()
+
+    reader = PdfReader(io.BytesIO(output.getvalue()), strict=True)
+    assert len(reader.pages) == len(sheets)
+    for page, data in zip(reader.pages, sheets):
+        text = page.extract_text()
+        assert data['serial'] in text
+        assert data['model'] in text
+        # Pages share the template's objects, never each other's fields
+        assert [other['serial'] in text for other in sheets].count(True) == 1
+
+
+def test_streamed_chunks_match_print_job():
+    filler = pdf_filler.BuildSheetPDFFiller()
+    layout = filler.get_layout()
+    sheets = _sheets(3)
+    overlays = [filler.create_overlay(data, include_static=False, layout=layout).getvalue() for data in sheets]
+    chunks = list(pdf_filler.stream_print_job(filler, overlays, layout))
+
+    assert len(chunks) == len(sheets) + 1
+    reader = PdfReader(io.BytesIO(b''.join(chunks)), strict=True)
+    assert [sheets[i]['serial'] in page.extract_text() for i, page in enumerate(reader.pages)] == [True] * 3
+
+
+@pytest.fixture
+def client(tmp_path):
+    app = app_module.create_app({
+        'PRELOAD': False,
+        'OUTPUT_CACHE': False,
+        'ARCHIVE_DIR': str(tmp_path / 'archive'),
+        'JOBS_DIR': str(tmp_path / 'jobs'),
+    })
+    return app.test_client()
+
+
+def _failing_overlays(good):
+    def render_overlays(data_list, layout, **kwargs):
+        filler = app_module.pdf_generator
+        for data in data_list[:good]:
+            yield filler.create_overlay(data, include_static=False, layout=layout).getvalue()
+        raise RuntimeError("render process died")
+    return render_overlays
+
+
+def test_batch_failing_on_first_sheet_is_an_error(client, monkeypatch, tmp_path):
+    monkeypatch.setattr(pdf_filler, 'render_overlays', _failing_overlays(0))
+    response = client.post('/api/generate_buildsheets', json={'machines': [MACHINE] * 3})
+    assert response.status_code == 500
+    assert response.get_json()['success'] is False
+    assert not (tmp_path / 'archive').exists()
+
+
+def test_batch_failing_part_way_is_not_archived(client, monkeypatch, tmp_path):
+    monkeypatch.setattr(pdf_filler, 'render_overlays', _failing_overlays(2))
+    response = client.post('/api/generate_buildsheets', json={'machines': [MACHINE] * 3})
+    assert response.status_code == 200
+    with pytest.raises(RuntimeError):
+        response.get_data()
+    app_module.archive_executor.submit(lambda: None).result()
+    assert not (tmp_path / 'archive').exists() or not os.listdir(tmp_path / 'archive')
+
+
+def test_batch_streams_and_archives_complete_job(client, tmp_path):
+    machines = [dict(MACHINE, serial=f'SN{i}') for i in range(3)]
+    response = client.post('/api/generate_buildsheets', json={'machines': machines})
+    assert response.status_code == 200
+    reader = PdfReader(io.BytesIO(response.get_data()), strict=True)
+    assert len(reader.pages) == 3
+    app_module.archive_executor.submit(lambda: None).result()
+    assert len(os.listdir(tmp_path / 'archive')) == 1
@@ -0,0 +1,54 @@
+"""
+Checks for the render pool (pdf_filler)
+
+If a render process dies (e.g. killed for running out of memory) the pool is
+broken for good; the next render must replace it and retry instead of every
+later request failing with BrokenProcessPool.
+
+Usage:
+  python -m pytest test_render_pool.py
+"""
+
+import os
+import signal
+import time
+
+import layout_store
+import pdf_filler
+from warmup import SAMPLE_SHEET
+
+WORKERS = 2
+
+
+def _break_pool():
+    pool = pdf_filler.get_render_pool(max_workers=WORKERS)
+    pool.submit(pdf_filler._render_worker, SAMPLE_SHEET).result()
+    for process in list(pool._processes.values()):
+        os.kill(process.pid, signal.SIGKILL)
+    time.sleep(0.5)
+    return pool
+
+
+def test_submit_render_replaces_broken_pool():
+    broken = _break_pool()
+    pdf_bytes = pdf_filler.submit_render(SAMPLE_SHEET, max_workers=WORKERS).result(timeout=60)
+    assert pdf_bytes.startswith(b'%PDF-')
+    assert pdf_filler.get_render_pool(max_workers=WORKERS) is not broken
+
+
+def test_render_many_replaces_broken_pool():
+    _break_pool()
+    rendered = pdf_filler.render_many([SAMPLE_SHEET] * 3, max_workers=WORKERS)
+    assert len(rendered) == 3
+    assert all(pdf_bytes.startswith(b'%PDF-') for pdf_bytes in rendered)
+
+
+def test_render_overlays_retries_the_rest_after_a_break():
+    layout = layout_store.get_layout()
+    sheets = [dict(SAMPLE_SHEET, serial=f'SN{i}') for i in range(4)]
+    overlays = pdf_filler.render_overlays(sheets, layout, max_workers=WORKERS)
+    first = next(overlays)
+    _break_pool()
+    rest = list(overlays)
+    assert len(rest) == 3
+    assert all(overlay.startswith(b'%PDF-') for overlay in [first] + rest)
@@ -0,0 +1,172 @@
+"""
+Startup Warm-up
+
+Does the work the first request after a (re)start would otherwise pay for,
+in timed phases, each of which also checks its result (importing the app and
+its libraries is timed as the "imports" phase, see app.py):
+  catalog      open cpus.db, build the CPU search index and find a sample CPU
+  pricing      parse prices.txt and price a sample machine with that CPU
+  template     parse the PDF template and coordinate layout, build the base page
+  render       fill one throwaway sheet in memory and read it back
+  render_pool  start every render pool process (each parses the template) and
+               round-trip a throwaway sheet through them, as async jobs do
+The time of each phase is logged and recorded in
+buildsheet_startup_phase_seconds. /ready answers 503 until every phase has
+passed (or for good if one failed); /health only says the process is up.
+"""
+
+import io
+import os
+import threading
+import time
+
+from PyPDF2 import PdfReader
+
+import metrics
+import pdf_filler
+import pricing
+
+SAMPLE_CPU = 'Intel Core i5-8350U'
+
+SAMPLE_SPECS = {
+    'cpu_name': SAMPLE_CPU,
+    'ram_gb': 8.0,
+    'ram_type': 'DDR4',
+    'drives': [{'type': 'SSD', 'capacity_gb': 256.0}],
+    'gpu_price': 0.0,
+    'os_name': 'Windows 11 Pro',
+    'os_price_type': 'Windows',
+    'is_laptop': True,
+}
+
+SAMPLE_SHEET = {
+    'model': 'Warm-up',
+    'serial': 'WARMUP',
+    'cpu_name': SAMPLE_CPU,
+    'cpu_cores': 4,
+    'cpu_threads': 8,
+    'cpu_speed': '1.70',
+    'ram_gb': 8,
+    'ram_type': 'DDR4',
+    'drives': [{'capacity_gb': 256, 'type': 'SSD'}],
+    'os_name': 'Windows 11 Pro',
+    'price': 199,
+    'builder_name': 'Warm-up',
+    'is_laptop': True,
+    'screen_size': '14',
+    'battery_health': '85',
+    'battery_duration': '4',
+    'features': {'wifi': True, 'webcam': True, 'sound': True, 'microphone': True},
+}
+
+
+def build_phases(pdf_generator, db_path='cpus.db', config_path='prices.txt', render_workers=None):
+    """
+    The warm-up phases for an app: [(name, callable)], run in order.
+    render_workers is the app's render pool size (BATCH_WORKERS, None = CPUs).
+    """
+    found = {}
+
+    def catalog():
+        candidates = pricing.get_cpu_candidates(SAMPLE_CPU, db_path=db_path, limit=1)
+        if not candidates:
+            raise ValueError(f"no CPU in {db_path} matches {SAMPLE_CPU!r}")
+        found['cpu'] = candidates[0]['name']
+
+    def prices():
+        pricing.load_prices_config(config_path)
+        if pricing.get_prices_config_version(config_path) == 'defaults':
+            print(f"Warning: warm-up is pricing with the internal defaults ({config_path} not readable)")
+        quote = pricing.calculate_price(dict(SAMPLE_SPECS, cpu_model_name=found.get('cpu')), db_path=db_path)
+        if not isinstance(quote.get('final_price'), (int, float)):
+            raise ValueError(f"sample machine could not be priced: {quote.get('error', quote)}")
+
+    def template():
+        pdf_generator.preload()
+
+    def render():
+        buffer = io.BytesIO()
+        pdf_generator.fill_template(SAMPLE_SHEET, buffer)
+        buffer.seek(0)
+        if len(PdfReader(buffer).pages) != 1:
+            raise ValueError("throwaway sheet did not come back as a one-page PDF")
+
+    def render_pool():
+        # The pool starts a process per job submitted while none is idle, so
+        # one job per worker brings them all up
+        workers = render_workers or os.cpu_count() or 1
+        futures = [
+            pdf_filler.submit_render(SAMPLE_SHEET, template_path=pdf_generator.template_path,
+                                     max_workers=render_workers, compact=pdf_generator.compact)
+            for _ in range(workers)
+        ]
+        for future in futures:
+            if len(PdfReader(io.BytesIO(future.result())).pages) != 1:
+                raise ValueError("render pool sheet did not come back as a one-page PDF")
+
+    return [('catalog', catalog), ('pricing', prices), ('template', template), ('render', render),
+            ('render_pool', render_pool)]
+
+
+class WarmUp:
+    """Runs the warm-up phases once and tracks whether they all passed."""
+
+    def __init__(self, phases):
+        self.phases = list(phases)
+        self.timings = {}  # phase -> milliseconds
+        self.error = None
+        self._done = threading.Event()
+
+    def start(self, background=True):
+        """Run the phases, in a daemon thread if background (returns self)."""
+        if background:
+            threading.Thread(target=self.run, name='warm-up', daemon=True).start()
+        else:
+            self.run()
+        return self
+
+    def record(self, name, seconds):
+        """Log and record a phase that ran before the warm-up (e.g. imports)."""
+        self.timings[name] = round(seconds * 1000, 1)
+        metrics.STARTUP_SECONDS.observe(seconds, phase=name)
+        print(f"[pid {os.getpid()}] Startup {name}: {seconds * 1000:.0f} ms")
+
+    def run(self):
+        start = time.perf_counter()
+        for name, phase in self.phases:
+            phase_start = time.perf_counter()
+            error = None
+            try:
+                phase()
+            except Exception as e:
+                error = e
+            elapsed = time.perf_counter() - phase_start
+            self.timings[name] = round(elapsed * 1000, 1)
+            metrics.STARTUP_SECONDS.observe(elapsed, phase=name)
+            if error is not None:
+                print(f"[pid {os.getpid()}] Warm-up failed in the {name} phase after {elapsed * 1000:.0f} ms: {error}")
+                self.error = f"{name}: {error}"
+                break
+            print(f"[pid {os.getpid()}] Warm-up {name}: {elapsed * 1000:.0f} ms")
+        if self.phases and not self.error:
+            print(f"[pid {os.getpid()}] Warm-up done in {(time.perf_counter() - start) * 1000:.0f} ms, ready")
+        self._done.set()
+
+    def wait(self, timeout=None):
+        """Block until the warm-up has finished. Returns whether it has."""
+        return self._done.wait(timeout)
+
+    @property
+    def ready(self):
+        return self._done.is_set() and self.error is None
+
+    def status(self):
+        """{'ready', 'state' ('warming', 'ready' or 'failed'), 'phases' (ms)[, 'error']}"""
+        if self.error:
+            state = 'failed'
+        else:
+            state = 'ready' if self._done.is_set() else 'warming'
+        result = {'ready': state == 'ready', 'state': state, 'phases': dict(self.timings)}
+        if self.error:
+            result['error'] = self.error
+        return result